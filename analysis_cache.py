@@ -0,0 +1,115 @@
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 위치 분석 결과 캐시 (프로세스 공용)
+# (반올림 좌표, 반경, 데이터 버전) 키로 위치 단계 결과를 보관하고,
+# 전체 용량(바이트)이 한도를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다.
+# 저장된 객체를 복사 없이 그대로 돌려주므로 호출하는 쪽에서 수정하지 않아야 합니다.
+# ==========================================
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+# 좌표 반올림 자릿수 (소수점 5자리 = 약 1m)
+COORD_PRECISION = 5
+
+
+def location_key(center_lat, center_lon, radius, version, precision=COORD_PRECISION):
+    """캐시 키: (반올림 위도, 반올림 경도, 반경, 데이터 버전)"""
+    return round(float(center_lat), precision), round(float(center_lon), precision), radius, version
+
+
+def estimate_bytes(value):
+    """
+    캐시 항목의 메모리 사용량을 추정합니다.
+    데이터프레임/시리즈/배열은 복사나 직렬화 없이 버퍼 크기(nbytes)로 계산하고,
+    그 밖의 값만 직렬화(pickle) 크기로 추정합니다.
+    """
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True, deep=False)))
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class AnalysisCache:
+    """바이트 한도가 있는 스레드 안전 LRU 캐시입니다. 적중/미스/삭제 횟수를 함께 집계합니다."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """값을 반환하고 최근 사용으로 표시합니다. 없으면 None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """값을 저장하고 한도를 넘는 만큼 오래된 항목을 삭제합니다. (한도보다 큰 값은 저장하지 않음)"""
+        size = estimate_bytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """캐시에 있으면 그대로, 없으면 compute() 결과를 저장한 뒤 반환합니다."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """적중/미스/삭제 횟수와 현재 항목 수/사용량을 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_analysis_cache(max_bytes=DEFAULT_MAX_BYTES):
+    """프로세스 전체(모든 세션)가 공유하는 분석 캐시를 반환합니다."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnalysisCache(max_bytes)
+        return _default_cache
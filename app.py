@@ -3,14 +3,19 @@ import pandas as pd
 import folium
 import plotly.express as px
 import plotly.graph_objects as go
-from geopy.distance import geodesic
 import os
-import requests
 from dotenv import load_dotenv
 from streamlit_folium import st_folium
 import re
 import base64
 from io import BytesIO
+import seulsekwon_engine
+import facility_store
+import kakao_geo
+import score_grid
+import analysis_cache
+import dataset_service
+import map_layers
 
 # ==========================================
 # 1. 환경 설정 및 상수 정의
@@ -26,25 +31,13 @@ ACCENT_COLOR = "#6366f1"
 BACKGROUND_COLOR = "#f8fafc"
 CARD_BG = "#ffffff"
 
-EMOJI_MAP = {
-    "스타벅스": "☕", "카페": "☕", "편의점": "🏪", "세탁소": "🏪", "마트": "🏪", "대형마트": "🏬",
-    "백화점": "🏬", "버스": "🚌", "bus": "🚌", "정류장": "🚌", "정류소": "🚌",
-    "지하철": "🚇", "metro": "🚇", "역": "🚇", "병원": "🏥", "의원": "💊",
-    "약국": "💊", "경찰": "🚓", "파출소": "🚓", "도서관": "📚", "서점": "📚",
-    "학교": "🏫", "공원": "🌳", "park": "🌳", "체육": "🏋️", "운동": "🏋️", "은행": "🏦", "금융": "🏦"
-}
-
-CATEGORY_GROUPS = {
-    "생활/편의🏪": ["스타벅스", "편의점", "세탁소", "마트", "대형마트", "백화점", "카페"],
-    "교통🚌": ["버스", "지하철", "정류장", "정류소", "역", "bus", "metro"],
-    "의료💊": ["병원", "의원", "약국", "치과", "한의원"],
-    "안전/치안🚨": ["경찰", "파출소", "치안", "소방", "119"],
-    "교육/문화📚": ["도서관", "서점", "학교", "유치원", "학원"],
-    "자연/여가🌳": ["공원", "체육", "운동", "산책", "park"],
-    "금융🏦": ["은행", "금융", "ATM"]
-}
+# 카테고리 분류 기준은 공통 엔진(seulsekwon_engine)에서 가져옵니다.
+EMOJI_MAP = seulsekwon_engine.EMOJI_MAP
+CATEGORY_GROUPS = seulsekwon_engine.CATEGORY_GROUPS
 
-DEFAULT_WEIGHTS = {"생활/편의🏪": 30, "교통🚌": 20, "의료💊": 15, "안전/치안🚨": 10, "교육/문화📚": 5, "자연/여가🌳": 15, "금융🏦": 5}
+DEFAULT_WEIGHTS = seulsekwon_engine.DEFAULT_WEIGHTS
+MAX_CAPS = seulsekwon_engine.MAX_CAPS
+RADIUS_OPTIONS = seulsekwon_engine.RADIUS_OPTIONS
 
 st.markdown(f"""
 <style>
@@ -81,15 +74,11 @@ def get_coords_from_address(address: str):
     except: pass
     if not api_key: api_key = os.getenv("KAKAO_REST_API_KEY")
     if not api_key: return None
-    url = "https://dapi.kakao.com/v2/local/search/keyword.json"
-    headers = {"Authorization": f"KakaoAK {api_key}"}
+    # 공용 지오코딩 클라이언트 (커넥션 풀 + 키워드/주소 동시 검색 + 디스크 캐시)
     try:
-        response = requests.get(url, headers=headers, params={"query": address})
-        if response.status_code == 200:
-            result = response.json()
-            if result['documents']:
-                info = result['documents'][0]
-                return {"address_name": info['address_name'], "lat": float(info['y']), "lng": float(info['x'])}
+        info = kakao_geo.get_geocoder(api_key).geocode(address)
+        if info:
+            return {"address_name": info['address_name'], "lat": info['lat'], "lng": info['lng']}
     except: pass
     return None
 
@@ -98,151 +87,46 @@ def get_dong_name(address):
     match = re.search(r'([가-힣]+동)', address)
     return match.group(1) if match else "서울시 전체"
 
-@st.cache_data
 def load_all_data():
     base_path = "data/cleaned"
     if not os.path.exists(base_path): base_path = os.path.join(os.path.dirname(__file__), "data/cleaned")
     if not os.path.exists(base_path): return pd.DataFrame()
 
-    file_map = {
-        'starbucks_seoul_cleaned.csv': '스타벅스', 'bus_station_seoul_cleaned.csv': '버스정류장',
-        'metro_station_seoul_cleaned.csv': '지하철역', 'hospital_seoul_cleaned.csv': '병원',
-        'police_seoul_cleaned_ver2.csv': '경찰서', 'library_seoul_cleaned.csv': '도서관',
-        'bookstore_seoul_cleaned.csv': '서점', 'school_seoul_cleaned.csv': '학교',
-        'park_raw_cleaned_revised.csv': '공원', 'finance_seoul_cleaned.csv': '은행',
-        'large_scale_shop_seoul_cleaned.csv': '대형마트', 'sosang_seoul_cleaned.csv': '소상공인',
-        'sosang_seoul_cleaned_ver2.csv': '소상공인'
-    }
-
-    all_dfs = []
-    # 매우 강력한 컬럼 매핑
-    lat_names = ['위도', 'lat', 'latitude', '좌표정보(Y)', 'Y', 'y', 'lat_wgs84', '위도(WGS84)']
-    lon_names = ['경도', 'lon', 'longitude', 'lng', '좌표정보(X)', 'X', 'x', 'lon_wgs84', '경도(WGS84)']
-    name_names = ['상호명', '점포명', '정류소명', '이름', '사업장명', '시설명', '공원명', '도서관명', '학교명', '기관명', 'name']
-
-    for file, default_cat in file_map.items():
-        path = os.path.join(base_path, file)
-        if os.path.exists(path):
-            df = None
-            for enc in ['utf-8-sig', 'cp949', 'utf-8', 'euc-kr']:
-                try:
-                    df = pd.read_csv(path, encoding=enc)
-                    break
-                except: continue
-            
-            if df is not None:
-                # 서브 카테고리 결정 로직 강화 (NaN 처리 포함)
-                if '카테고리_소' in df.columns:
-                    df['sub_category'] = df['카테고리_소'].fillna(default_cat)
-                elif '업태구분명' in df.columns:
-                    df['sub_category'] = df['업태구분명'].fillna(default_cat)
-                else:
-                    df['sub_category'] = default_cat
-                
-                # 빈 문자열 처리
-                df['sub_category'] = df['sub_category'].replace('', default_cat)
-                
-                lat_c = next((c for c in lat_names if c in df.columns), None)
-                lon_c = next((c for c in lon_names if c in df.columns), None)
-                name_c = next((c for c in name_names if c in df.columns), None)
-
-                if lat_c and lon_c:
-                    if not name_c: 
-                        name_c = next((c for c in df.columns if any(k in str(c) for k in ['명', '이름', '역', '정류'])), df.columns[0])
-                    
-                    temp_df = df[[name_c, lat_c, lon_c, 'sub_category']].copy()
-                    temp_df.columns = ['name', 'lat', 'lon', 'sub_category']
-                    temp_df['lat'] = pd.to_numeric(temp_df['lat'], errors='coerce')
-                    temp_df['lon'] = pd.to_numeric(temp_df['lon'], errors='coerce')
-                    temp_df = temp_df.dropna(subset=['lat', 'lon'])
-                    
-                    if not temp_df.empty:
-                        # --- 위경도 뒤바뀜 자동 교정 로직 ---
-                        # 서울 지역의 정상 범위: 위도(Lat) 36~39, 경도(Lon) 125~129
-                        # 만약 평균값이 이를 크게 벗어나고 서로 바뀌어 있다면 자동으로 교정합니다.
-                        lat_mean = temp_df['lat'].mean()
-                        lon_mean = temp_df['lon'].mean()
-                        
-                        if lat_mean > 100 and lon_mean < 100:
-                            # 위도 열에 경도 값이, 경도 열에 위도 값이 들어간 경우로 판단하여 스왑(Swap)
-                            temp_df['lat'], temp_df['lon'] = temp_df['lon'], temp_df['lat']
-                        
-                        # 좌표 필터링 범위 최적화 및 이상치 제거 (정상적인 서울 데이터만 추출)
-                        mask = (temp_df['lat'] > 36.0) & (temp_df['lat'] < 39.0) & \
-                               (temp_df['lon'] > 125.0) & (temp_df['lon'] < 129.0)
-                        temp_df = temp_df[mask]
-                        
-                        if not temp_df.empty:
-                            all_dfs.append(temp_df)
-    
-    if not all_dfs: return pd.DataFrame()
-    
-    full_df = pd.concat(all_dfs, ignore_index=True)
-    
-    # 중복 제거 고도화: 이름과 좌표(소수점 4자리까지)가 동일한 경우 중복으로 간주
-    # 소수점 4자리는 약 11m 오차범위로, 같은 시설물이 중복 등록된 경우를 효과적으로 잡아냅니다.
-    full_df['lat_round'] = full_df['lat'].round(4)
-    full_df['lon_round'] = full_df['lon'].round(4)
-    
-    # 이름과 반올림된 좌표가 모두 같은 데이터 제거 (첫 번째 데이터 유지)
-    deduped_df = full_df.drop_duplicates(subset=['name', 'lat_round', 'lon_round'], keep='first')
-    
-    # 임시 컬럼 삭제 후 반환
-    return deduped_df.drop(columns=['lat_round', 'lon_round'])
-
-def calculate_seulsekwon_index(center_lat, center_lon, data, weights, radius_m):
-    if data.empty: return 0.0, {cat: 0.0 for cat in CATEGORY_GROUPS.keys()}, {cat: 0 for cat in CATEGORY_GROUPS.keys()}, [], {cat: 0.0 for cat in CATEGORY_GROUPS.keys()}
-    radius_km = radius_m / 1000.0
-    # 기준치 현실화 (도심 내 500m 반경 기준)
-    max_counts = {"생활/편의🏪": 15, "교통🚌": 8, "의료💊": 5, "안전/치안🚨": 1, "교육/문화📚": 2, "자연/여가🌳": 2, "금융🏦": 3}
-    
-    lat_margin, lon_margin = radius_km / 111.0, radius_km / 88.0
-    mask = (data['lat'] >= center_lat - lat_margin) & (data['lat'] <= center_lat + lat_margin) & \
-           (data['lon'] >= center_lon - lon_margin) & (data['lon'] <= center_lon + lon_margin)
-    filtered = data[mask].copy()
-
-    scores, counts, nearby, raw_scores = {}, {}, [], {}
-    for g_name, sub_cats in CATEGORY_GROUPS.items():
-        g_data = filtered[filtered['sub_category'].apply(lambda x: any(str(sc).lower() in str(x).lower() for sc in sub_cats))]
-        
-        # 그룹 내 임시 리스트 (거리 계산 후 중복 제거를 위해)
-        group_facilities = []
-        for _, row in g_data.iterrows():
-            dist = geodesic((center_lat, center_lon), (row['lat'], row['lon'])).meters
-            if dist <= radius_m:
-                r_dict = row.to_dict(); r_dict['distance'] = dist; r_dict['group'] = g_name
-                r_dict['emoji'] = next((emoji for key, emoji in EMOJI_MAP.items() if key in str(row['sub_category'])), "📍")
-                group_facilities.append(r_dict)
-        
-        # --- 이름 및 유사 거리 기반 중복 제거 ---
-        # 1. 거리순 정렬
-        group_facilities = sorted(group_facilities, key=lambda x: x['distance'])
-        final_group_facilities = []
-        
-        for item in group_facilities:
-            # 같은 이름 && 거리 차이가 5m 이내인 시설이 이미 있는지 확인
-            is_dup = any(
-                item['name'] == other['name'] and abs(item['distance'] - other['distance']) < 5.0 
-                for other in final_group_facilities
-            )
-            if not is_dup:
-                final_group_facilities.append(item)
-        
-        counts[g_name] = len(final_group_facilities)
-        nearby.extend(final_group_facilities)
-        
-        m = max_counts.get(g_name, 5)
-        rate = min(counts[g_name], m) / m
-        raw_scores[g_name] = rate
-        scores[g_name] = round(rate * weights.get(g_name, 0), 2)
-    
-    # 전체 리스트 거리순 최종 정렬
-    nearby = sorted(nearby, key=lambda x: x['distance'])
-    
-    total = round(sum(scores.values()), 1)
+    # scripts/build_facility_store.py 로 만든 컬럼형 저장소(Feather)를 메모리 매핑으로 읽고,
+    # 저장소가 없거나 원본 CSV보다 오래된 경우에만 CSV를 직접 정규화합니다.
+    return facility_store.load_facilities(base_path, CATEGORY_GROUPS, EMOJI_MAP, ignore_case=True)
+
+@st.cache_resource
+def load_dataset():
+    # 시설 테이블/격자 공간 인덱스/데이터 버전을 프로세스당 한 번만 만들어 모든 세션이 같은 읽기 전용 객체를 공유합니다.
+    # (st.cache_data 는 호출마다 복사본을 돌려주므로 세션 수만큼 메모리가 늘어납니다.)
+    version = facility_store.dataset_version(facility_store.default_data_dir(), CATEGORY_GROUPS, EMOJI_MAP, ignore_case=True)
+    return dataset_service.FacilityDataset(load_all_data(), version)
+
+@st.cache_resource
+def load_score_grid(radius_m):
+    # scripts/build_score_grid.py 로 미리 계산한 서울 전역 격자 (없거나 원본보다 오래되었으면 None)
+    return score_grid.load_score_grid(facility_store.default_data_dir(), radius_m, CATEGORY_GROUPS, EMOJI_MAP)
+
+def analyze_location(center_lat, center_lon, radii, dataset):
+    # 위치 단계(반경 질의 + 그룹 분류)는 좌표별로 모든 반경 선택지를 한 번에 계산해 프로세스 공용 캐시에 보관하여,
+    # 같은 위치를 검색한 다른 사용자나 가중치/반경 변경 시에는 시설 테이블을 다시 훑지 않습니다.
+    lat, lon, radii, version = analysis_cache.location_key(center_lat, center_lon, radii, dataset.version)
+    return analysis_cache.get_analysis_cache().get_or_compute(
+        (lat, lon, radii, version),
+        lambda: seulsekwon_engine.analyze_location_radii(lat, lon, dataset.data, radii, index=dataset.index, category_groups=CATEGORY_GROUPS,
+                                                         emoji_map=EMOJI_MAP, ignore_case=True)
+    )
+
+def calculate_seulsekwon_index(center_lat, center_lon, dataset, weights, radius_m):
+    if dataset.empty: return 0.0, {cat: 0.0 for cat in CATEGORY_GROUPS.keys()}, {cat: 0 for cat in CATEGORY_GROUPS.keys()}, [], {cat: 0.0 for cat in CATEGORY_GROUPS.keys()}
+    radii = tuple(RADIUS_OPTIONS) if radius_m in RADIUS_OPTIONS else (radius_m,)
+    counts, nearby = analyze_location(center_lat, center_lon, radii, dataset)[radius_m]
+    # 가중치 단계: 기준치(도심 내 500m 반경 기준)와 가중치만 적용
+    total, scores, raw_scores = seulsekwon_engine.score_counts(counts, weights, MAX_CAPS)
     return total, scores, counts, nearby, raw_scores
 
-def create_visualizations(total_score, scores, counts, facilities, dong_name, raw_scores):
+def create_visualizations(total_score, scores, counts, facilities, dong_name, raw_scores, seoul_avg=None):
     layout_opts = dict(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(family="Inter", color=SECONDARY_COLOR))
     
     # 1. 레이더 차트 (달성률 %)
@@ -270,8 +154,9 @@ def create_visualizations(total_score, scores, counts, facilities, dong_name, ra
     
     # 3. 인프라 구성 비교 (100% 누적 바 차트: 행정동 평균 vs 서울시 전체 평균)
     # 서울시 전체 평균 (단순 점수가 아닌 구성 비중 비중으로 사용)
-    seoul_avg_raw = {"생활/편의🏪": 22.5, "교통🚌": 15.0, "의료💊": 11.5, "안전/치안🚨": 8.0, "교육/문화📚": 3.5, "자연/여가🌳": 11.0, "금융🏦": 4.0}
-    seoul_total = sum(seoul_avg_raw.values())
+    # 사전 계산 격자의 그룹별 평균 점수를 사용하고, 격자가 없으면 예시값으로 표시합니다.
+    seoul_avg_raw = seoul_avg or {"생활/편의🏪": 22.5, "교통🚌": 15.0, "의료💊": 11.5, "안전/치안🚨": 8.0, "교육/문화📚": 3.5, "자연/여가🌳": 11.0, "금융🏦": 4.0}
+    seoul_total = sum(seoul_avg_raw.values()) or 1
     seoul_percent = {k: (v / seoul_total) * 100 for k, v in seoul_avg_raw.items()}
     
     # 해당 행정동 비중 (현재 분석 지점 기준 정규화)
@@ -312,10 +197,8 @@ def create_enhanced_map(lat, lon, facilities, radius_m):
     m = folium.Map(location=[lat, lon], zoom_start=16, tiles="cartodbpositron")
     folium.Circle([lat, lon], radius=radius_m, color=PRIMARY_COLOR, fill=True, fill_opacity=0.1).add_to(m)
     folium.Marker([lat, lon], icon=folium.Icon(color='red', icon='home', prefix='fa'), tooltip="분석 지점").add_to(m)
-    # 지도에 표시할 시설물 개수 상향 (최대 500개) 및 카테고리별 분산 배치
-    for f in facilities[:500]:
-        html = f'<div style="font-size: 16px; background: white; border-radius: 50%; width: 28px; height: 28px; display: flex; align-items: center; justify-content: center; box-shadow: 0 2px 5px rgba(0,0,0,0.2); border: 2.5px solid {ACCENT_COLOR};">{f["emoji"]}</div>'
-        folium.Marker([f['lat'], f['lon']], icon=folium.DivIcon(html=html), popup=f"<b>{f['name']}</b><br>{f['distance']:.0f}m").add_to(m)
+    # 반경 내 시설 전체를 이모지 마커 클러스터로 표시 (확대하면 개별 마커)
+    map_layers.add_facility_markers(m, facilities, ACCENT_COLOR, size=28, font_size=16)
     return m
 
 # ==========================================
@@ -421,17 +304,21 @@ def export_to_html(total_score, scores, counts, facilities, address, radius, viz
 # 3. Streamlit UI 메인
 # ==========================================
 
-if 'data' not in st.session_state:
+# 시설 데이터는 모든 세션이 공유하는 읽기 전용 객체이므로 세션 상태에는 로드 여부만 기록합니다.
+if 'data_ready' not in st.session_state:
     with st.status("🚀 분석 엔진 및 지도 데이터 초기화 중...", expanded=True) as status:
         st.write("📊 대용량 지리 정보 데이터를 로드하고 있습니다...")
-        st.session_state.data = load_all_data()
-        if not st.session_state.data.empty:
-            st.write(f"✅ 총 {len(st.session_state.data):,}개의 생활 인프라 데이터 추출 완료")
+        dataset = load_dataset()
+        st.session_state.data_ready = True
+        if not dataset.empty:
+            st.write(f"✅ 총 {len(dataset):,}개의 생활 인프라 데이터 추출 완료")
             status.update(label="분석 준비 완료", state="complete", expanded=False)
         else:
             st.error("🚨 데이터를 로드하지 못했습니다. /data/cleaned 폴더를 확인하세요.")
             status.update(label="초기화 실패", state="error", expanded=True)
 
+dataset = load_dataset()
+
 # 초기 세션 상태 설정
 state_init = {
     'coords': (37.5006, 127.0363), 'address': "역삼역", 'radius': 500,
@@ -446,7 +333,7 @@ st.markdown(f'<h1 style="text-align: center; color: {SECONDARY_COLOR}; margin-bo
 with st.form("main_search"):
     c1, c2, c3 = st.columns([2.5, 1, 1])
     with c1: query = st.text_input("📍 분석할 주소 또는 건물명", value=st.session_state.address, placeholder="예: 강남역, 한남동 6-1")
-    with c2: rad = st.select_slider("📏 분석 반경 (m)", options=[300, 500, 700, 1000, 1500], value=st.session_state.radius)
+    with c2: rad = st.select_slider("📏 분석 반경 (m)", options=RADIUS_OPTIONS, value=st.session_state.radius)
     with c3: st.write("<div style='height:28px;'></div>", unsafe_allow_html=True); submit = st.form_submit_button("실시간 지수 분석하기")
 
 if submit and query:
@@ -460,10 +347,12 @@ if submit and query:
 
 # 분석 데이터 계산 및 시각화 객체 생성 (사이드바에서 사용하기 위해 먼저 실행)
 t_score, scores, counts, facilities, raw_scores = calculate_seulsekwon_index(
-    st.session_state.coords[0], st.session_state.coords[1], st.session_state.data, st.session_state.weights, st.session_state.radius
+    st.session_state.coords[0], st.session_state.coords[1], dataset, st.session_state.weights, st.session_state.radius
 )
 dong = get_dong_name(st.session_state.address)
-viz = create_visualizations(t_score, scores, counts, facilities, dong, raw_scores)
+grid = load_score_grid(st.session_state.radius)
+seoul_avg = grid.average_scores(st.session_state.weights, MAX_CAPS) if grid is not None else None
+viz = create_visualizations(t_score, scores, counts, facilities, dong, raw_scores, seoul_avg)
 
 if st.session_state.address:
     with st.sidebar:
@@ -516,9 +405,12 @@ if st.session_state.address:
         )
 
         st.markdown("---")
-        st.caption(f"📊 로드된 데이터: {len(st.session_state.data):,}건")
+        st.caption(f"📊 로드된 데이터: {len(dataset):,}건")
+        cache_stats = analysis_cache.get_analysis_cache().stats()
+        st.caption(f"⚡ 분석 캐시: 적중 {cache_stats['hits']:,} / 미스 {cache_stats['misses']:,} · "
+                   f"{cache_stats['entries']}건 ({cache_stats['bytes'] / 1024 / 1024:.1f}MB)")
         if st.button("🔄 엔진 재부팅 (캐시 삭제)"):
-            st.cache_data.clear(); st.rerun()
+            st.cache_data.clear(); st.cache_resource.clear(); analysis_cache.get_analysis_cache().clear(); st.rerun()
 
 
     # 1. 상단 섹션: 지도 및 슬세권 지수/게이지
@@ -538,6 +430,9 @@ if st.session_state.address:
         st.subheader("💰 슬세권 분석 결과")
         grade = "s" if t_score >= 90 else ("a" if t_score >= 80 else ("b" if t_score >= 70 else "c"))
         st.markdown(f'<div style="text-align: center; margin-top: 1rem; margin-bottom: 2rem;"><div class="metric-value" style="font-size: 3.5rem;">{t_score}</div><span class="grade-badge-{grade}">{grade.upper()} GRADE</span></div>', unsafe_allow_html=True)
+        if grid is not None:
+            pct = grid.percentile(t_score, st.session_state.weights, MAX_CAPS)
+            st.caption(f"서울 평균 {grid.average_total(st.session_state.weights, MAX_CAPS)}점 · 서울 상위 {max(100 - pct, 1):.0f}% (반경 {st.session_state.radius}m 격자 기준)")
         
         # 지수 게이지 차트 (상하 직렬 배치)
         st.markdown('<p style="font-weight:600; font-size:1.3rem; margin-top:2rem; margin-bottom:0.5rem; text-align:center;">📈 종합 지수 게이지</p>', unsafe_allow_html=True)
@@ -23,10 +23,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Data Load
-if 'data' not in st.session_state:
-    with st.spinner("🚀 데이터를 엔진에 로드 중입니다... 잠시만 기다려주세요."):
-        st.session_state.data = utils.load_all_data()
+# Data Load (모든 세션이 공유하는 읽기 전용 데이터셋, 세션 상태에는 설정만 저장)
+with st.spinner("🚀 데이터를 엔진에 로드 중입니다... 잠시만 기다려주세요."):
+    dataset = utils.load_dataset()
 
 # Session State for Location
 if 'coords' not in st.session_state:
@@ -50,7 +49,7 @@ with st.container():
     with col_s1:
         address_query = st.text_input("📍 분석하고 싶은 주소나 장소를 입력하세요", placeholder="예: 강남역, 성수동, 서울시청 등")
     with col_s2:
-        radius_input = st.select_slider("📏 분석 반경 (m)", options=[300, 500, 700, 1000, 1500], value=500)
+        radius_input = st.select_slider("📏 분석 반경 (m)", options=utils.RADIUS_OPTIONS, value=500)
     with col_s3:
         st.write("") # 패딩
         search_btn = st.button("🚀 지수 분석 시작")
@@ -87,14 +86,16 @@ if st.session_state.address:
     # 분석 수행
     total_score, scores, counts, facilities = utils.calculate_seulsekwon_index(
         st.session_state.coords[0], st.session_state.coords[1], 
-        st.session_state.data, st.session_state.weights, st.session_state.radius
+        dataset, st.session_state.weights, st.session_state.radius
     )
     
     # 행정동 추출
     dong_name = utils.get_dong_name(st.session_state.address)
     
     # 시각화 데이터 생성
-    viz = utils.create_visualizations(total_score, scores, counts, facilities, dong_name)
+    # 서울 평균은 사전 계산 격자에서 조회 (격자가 없으면 예시값)
+    avg_score = utils.seoul_average_score(st.session_state.weights, st.session_state.radius)
+    viz = utils.create_visualizations(total_score, scores, counts, facilities, dong_name, avg_score)
     
     # 레이아웃: 점수 및 주요 지표
     col_r1, col_r2, col_r3 = st.columns([1, 1, 1])
@@ -0,0 +1,81 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import seulsekwon_engine
+
+# ==========================================
+# 여러 지점 일괄 시설 수 계산 (프로세스 풀)
+# scripts/bulk_score.py(지점 목록 지수)와 price_score(건물별 시설 수)가 함께 사용합니다.
+# 시설 데이터와 격자 공간 인덱스는 작업 프로세스마다 한 번만 받아 모든 작업에 재사용하고,
+# 작업 하나(지점 묶음)는 seulsekwon_engine.facility_counts_batch 로 배열 연산으로 계산합니다.
+# ==========================================
+
+DEFAULT_CHUNK_POINTS = 1000
+
+# 작업 프로세스 전역 상태 (init_worker 에서 한 번만 설정)
+_facilities = None
+_index = None
+_scheme = None
+
+
+def init_worker(facilities, index, category_groups=seulsekwon_engine.CATEGORY_GROUPS,
+                emoji_map=seulsekwon_engine.EMOJI_MAP, ignore_case=True):
+    global _facilities, _index, _scheme
+    _facilities = facilities
+    _index = index
+    _scheme = (category_groups, emoji_map, ignore_case)
+
+
+def count_chunk(lats, lons, radii):
+    """작업 프로세스의 시설 데이터로 지점 묶음의 (지점 x 반경 x 그룹) 시설 수를 계산합니다."""
+    category_groups, emoji_map, ignore_case = _scheme
+    return seulsekwon_engine.facility_counts_batch(lats, lons, _facilities, radii, _index,
+                                                   category_groups, emoji_map, ignore_case)
+
+
+def ordered_map(func, tasks, workers, initargs):
+    """
+    tasks(인자 튜플)마다 func 를 작업 프로세스에서 실행하고 결과를 입력 순서대로 내보냅니다.
+    동시에 처리 중인 작업 수를 제한하여 대용량 입력도 일정한 메모리로 처리하며, workers 가 1 이하면 현재 프로세스에서 실행합니다.
+    """
+    if workers <= 1:
+        init_worker(*initargs)
+        for args in tasks:
+            yield func(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as pool:
+        pending = deque()
+        for args in tasks:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def count_points(lats, lons, facilities, radii, index, category_groups=seulsekwon_engine.CATEGORY_GROUPS,
+                 emoji_map=seulsekwon_engine.EMOJI_MAP, ignore_case=True, workers=None,
+                 chunk_points=DEFAULT_CHUNK_POINTS, progress=None):
+    """
+    여러 지점의 반경별 그룹 시설 수를 프로세스 풀에서 계산하여 (지점 x 반경 x 그룹) 정수 배열로 반환합니다.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    workers = workers or os.cpu_count() or 1
+    tasks = ((lats[s:s + chunk_points], lons[s:s + chunk_points], radii) for s in range(0, len(lats), chunk_points))
+    initargs = (facilities, index, category_groups, emoji_map, ignore_case)
+
+    parts = []
+    done = 0
+    for part in ordered_map(count_chunk, tasks, workers, initargs):
+        parts.append(part)
+        done += len(part)
+        if progress is not None:
+            progress(done, len(lats))
+    if not parts:
+        return np.zeros((0, len(radii), len(category_groups)), dtype=np.int64)
+    return np.concatenate(parts)
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+import dataset_manifest
+import facility_store
+import seulsekwon_engine
+import spatial_index
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow가 없으면 통합 데이터를 만들거나 읽을 수 없습니다. (앱은 기존 통합 CSV 사용)
+    pa = None
+    feather = None
+
+# ==========================================
+# 통합 인프라 데이터 빌드 (myang_renew_app)
+# data/cleaned 의 원본 CSV를 파일별로 정규화한 조각(part)을 캐시해 두고, 입력이 바뀐 파일만 다시 읽어
+# name, lat, lon, sub_category + 그룹 코드(group_mask, emoji) 테이블 하나로 합칩니다.
+# 행은 격자 셀 순서(공간 정렬)로 저장하며, 입력/분류 기준으로 만든 버전 해시를 함께 기록합니다.
+# ==========================================
+
+COMBINED_FORMAT_VERSION = 1
+COMBINED_FILE_NAME = "seoul_combined_infrastructure.feather"
+METADATA_KEY = b"seulsekwon_combined"
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PARTS_DIR = os.path.join(PROJECT_DIR, ".cache", "combined_parts")
+
+PART_COLUMNS = ['name', 'lat', 'lon', 'sub_category']
+
+
+def default_combined_path():
+    """통합 데이터 기본 경로(data/combined/seoul_combined_infrastructure.feather)를 반환합니다."""
+    return os.path.join(PROJECT_DIR, "data", "combined", COMBINED_FILE_NAME)
+
+
+def _digest(payload):
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def part_signature(path, spec, category_groups, ignore_case=True):
+    """
+    파일 조각의 입력 서명: 파일 크기/수정 시각, 매니페스트 선언, 형식 버전.
+    그룹 키워드로 행을 거르는 streaming 파일은 분류 기준도 포함합니다.
+    """
+    stat = os.stat(path)
+    payload = [COMBINED_FORMAT_VERSION, spec]
+    if spec.get('streaming'):
+        payload.append([category_groups, bool(ignore_case)])
+    return [stat.st_size, stat.st_mtime_ns, _digest(payload)[:16]]
+
+
+def build_part(base_path, file, parts_dir, category_groups, ignore_case=True, force=False, report=None):
+    """
+    원본 CSV 하나의 정규화 조각을 반환합니다. 캐시된 조각의 입력 서명이 같으면 다시 읽지 않습니다.
+    파일을 읽지 못하면 조각을 저장하지 않고 데이터프레임 대신 None 을 반환합니다. (오류는 report 의 error 항목, 다음 빌드에서 다시 시도)
+    반환값: (조각 데이터프레임, 서명, 다시 만들었는지 여부)
+    """
+    spec = dataset_manifest.DATASETS[file]
+    path = os.path.join(base_path, file)
+    signature = part_signature(path, spec, category_groups, ignore_case)
+    part_path = os.path.join(parts_dir, file + ".feather")
+
+    meta = None if force else facility_store.read_feather_meta(part_path, METADATA_KEY)
+    if meta and meta.get("signature") == signature:
+        return feather.read_table(part_path).to_pandas(), signature, False
+
+    report = {} if report is None else report
+    df = facility_store.load_source(path, spec, category_groups, ignore_case, report)
+    if df is None and facility_store.ERROR_KEY in report:
+        return None, signature, True
+    if df is None:
+        # 정상적으로 읽었지만 남는 행이 없는 파일은 빈 조각으로 캐시합니다.
+        df = pd.DataFrame({c: pd.Series(dtype=object if c in ('name', 'sub_category') else 'float64')
+                           for c in PART_COLUMNS})
+    df = df[PART_COLUMNS].reset_index(drop=True)
+    facility_store.write_feather_meta(df, part_path, {"file": file, "signature": signature}, METADATA_KEY)
+    return df, signature, True
+
+
+def combined_version(signatures, category_groups, emoji_map, ignore_case=True):
+    """파일별 입력 서명과 분류 기준으로 만든 통합 데이터 버전 해시 (분석 캐시 키용)"""
+    return _digest([COMBINED_FORMAT_VERSION, signatures,
+                    facility_store.scheme_key(category_groups, emoji_map, ignore_case)])[:12]
+
+
+def current_version(base_path, category_groups=seulsekwon_engine.CATEGORY_GROUPS,
+                    emoji_map=seulsekwon_engine.EMOJI_MAP, ignore_case=True):
+    """현재 원본 CSV(파일 크기/수정 시각)와 분류 기준으로 만든 버전 해시. 원본을 읽지 않고 stat 만 사용합니다."""
+    signatures = {}
+    for file, spec in dataset_manifest.DATASETS.items():
+        path = os.path.join(base_path, file)
+        if os.path.exists(path):
+            signatures[file] = part_signature(path, spec, category_groups, ignore_case)
+    return combined_version(signatures, category_groups, emoji_map, ignore_case)
+
+
+def is_combined_fresh(path, base_path, category_groups=seulsekwon_engine.CATEGORY_GROUPS,
+                      emoji_map=seulsekwon_engine.EMOJI_MAP, ignore_case=True):
+    """통합 데이터가 현재 원본 CSV/분류 기준/형식 버전과 일치하는지 확인합니다."""
+    meta = facility_store.read_feather_meta(path, METADATA_KEY)
+    return bool(meta) and meta.get("format") == COMBINED_FORMAT_VERSION and \
+        meta.get("version") == current_version(base_path, category_groups, emoji_map, ignore_case)
+
+
+def spatial_order(df, cell_m=spatial_index.DEFAULT_CELL_M):
+    """격자 셀 번호(행 우선) 순서의 행 위치 배열. 가까운 시설이 파일 안에서도 이웃하게 저장됩니다."""
+    return spatial_index.GridIndex.from_frame(df, cell_m=cell_m).positions
+
+
+def build_combined(base_path, output_path=None, parts_dir=DEFAULT_PARTS_DIR,
+                   category_groups=seulsekwon_engine.CATEGORY_GROUPS, emoji_map=seulsekwon_engine.EMOJI_MAP,
+                   ignore_case=True, force=False):
+    """
+    통합 데이터를 만듭니다. 입력이 바뀐 파일 조각만 다시 읽고, 버전 해시가 같으면 기존 산출물을 그대로 둡니다.
+    읽지 못한 파일은 통합 데이터와 버전에서 제외하고 failed 에 오류를 남깁니다. 이 경우 버전이 현재 원본과 달라
+    is_combined_fresh 가 False 가 되므로 앱은 기존 통합 CSV를 사용하고, 다음 빌드에서 해당 파일을 다시 읽습니다.
+    반환값: {"version", "rows", "rebuilt": [파일], "reused": [파일], "failed": {파일: 오류}, "written": bool, "path"}
+    """
+    if pa is None:
+        raise ImportError("통합 데이터 빌드에는 pyarrow가 필요합니다.")
+    output_path = output_path or default_combined_path()
+
+    frames, signatures, rebuilt, reused, failed = [], {}, [], [], {}
+    for file in dataset_manifest.DATASETS:
+        if not os.path.exists(os.path.join(base_path, file)):
+            continue
+        report = {}
+        df, signature, was_built = build_part(base_path, file, parts_dir, category_groups, ignore_case, force, report)
+        if df is None:
+            failed[file] = report[facility_store.ERROR_KEY]
+            continue
+        frames.append(df)
+        signatures[file] = signature
+        (rebuilt if was_built else reused).append(file)
+
+    version = combined_version(signatures, category_groups, emoji_map, ignore_case)
+    result = {"version": version, "rebuilt": rebuilt, "reused": reused, "failed": failed,
+              "written": False, "path": output_path}
+    meta = facility_store.read_feather_meta(output_path, METADATA_KEY)
+    if not force and meta and meta.get("version") == version:
+        result["rows"] = meta.get("rows", 0)
+        return result
+
+    df = facility_store.to_store_frame(facility_store.merge_sources(frames), category_groups, emoji_map, ignore_case)
+    # 같은 그룹의 같은 이름 시설이 5m 안에 겹친 경우를 여기서 한 번만 제거
+    df = seulsekwon_engine.drop_nearby_duplicates(df)
+    if not df.empty:
+        df = df.iloc[spatial_order(df)].reset_index(drop=True)
+
+    meta = {"version": version, "format": COMBINED_FORMAT_VERSION, "rows": len(df), "sources": signatures}
+    facility_store.write_feather_meta(df, output_path, meta, METADATA_KEY)
+    result.update(rows=len(df), written=True)
+    return result
+
+
+def read_combined_version(path):
+    """통합 데이터 파일의 버전 해시를 반환합니다. (스키마만 읽음, 없으면 None)"""
+    meta = facility_store.read_feather_meta(path, METADATA_KEY)
+    return meta.get("version") if meta else None
+
+
+def load_combined(path):
+    """통합 데이터를 메모리 매핑으로 읽습니다. 없거나 읽을 수 없으면 None."""
+    if facility_store.read_feather_meta(path, METADATA_KEY) is None:
+        return None
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
@@ -0,0 +1,158 @@
+import numpy as np
+
+try:
+    from pyproj import Transformer
+except ImportError:  # pyproj가 없으면 아래의 NumPy 투영식을 사용합니다.
+    Transformer = None
+
+# ==========================================
+# 좌표계 변환 (TM -> WGS84) 및 행별 좌표 검사
+# 지방행정 인허가 데이터의 좌표정보(X/Y)는 한국 중부원점 TM(Bessel 타원체) 좌표입니다.
+# 변환/검사 모두 열 전체를 배열 단위로 한 번에 처리하며, 적재(시설 저장소 생성) 시 한 번만 수행합니다.
+# ==========================================
+
+WGS84 = 'EPSG:4326'
+# 한국 중부원점 TM (Bessel 타원체, 가산 200000/500000)
+KOREA_TM = 'EPSG:5174'
+
+# 좌표계별 투영 변수. towgs84 는 Bessel -> WGS84 7변수(이동 m, 회전 초, 축척 ppm, Position Vector 방식)
+PROJECTIONS = {
+    KOREA_TM: {
+        'a': 6377397.155, 'f': 1 / 299.1528128,
+        'lat0': 38.0, 'lon0': 127.0028902777778, 'k0': 1.0, 'x0': 200000.0, 'y0': 500000.0,
+        'towgs84': (-115.80, 474.99, 674.11, 1.16, -2.31, -1.63, 6.43),
+    },
+}
+
+# 행별 좌표 상태 코드 (coordinate_status)
+COORD_OK = 0
+COORD_SWAPPED = 1   # 위도/경도 값이 서로 바뀐 행 (바꾸면 범위 안)
+COORD_MISSING = 2   # 비어 있거나 숫자가 아닌 행
+COORD_OUTSIDE = 3   # 바꿔도 범위 밖인 행
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+
+_ARCSEC = np.pi / (180.0 * 3600.0)
+
+
+def proj_string(crs):
+    """pyproj 에 넘길 PROJ 문자열 (NumPy 경로와 같은 변수를 사용)"""
+    p = PROJECTIONS[crs]
+    return (f"+proj=tmerc +lat_0={p['lat0']} +lon_0={p['lon0']} +k={p['k0']} +x_0={p['x0']} +y_0={p['y0']} "
+            f"+a={p['a']} +rf={1 / p['f']} +towgs84={','.join(str(v) for v in p['towgs84'])} +units=m +no_defs")
+
+
+def _meridian_arc(phi, a, e2):
+    """적도에서 위도 phi 까지의 자오선 호 길이"""
+    e4, e6 = e2 * e2, e2 * e2 * e2
+    return a * ((1 - e2 / 4 - 3 * e4 / 64 - 5 * e6 / 256) * phi
+                - (3 * e2 / 8 + 3 * e4 / 32 + 45 * e6 / 1024) * np.sin(2 * phi)
+                + (15 * e4 / 256 + 45 * e6 / 1024) * np.sin(4 * phi)
+                - (35 * e6 / 3072) * np.sin(6 * phi))
+
+
+def inverse_tm(x, y, p):
+    """TM 좌표를 같은 타원체의 위경도(라디안)로 변환합니다. (Snyder 역변환식)"""
+    a, k0 = p['a'], p['k0']
+    e2 = p['f'] * (2 - p['f'])
+    ep2 = e2 / (1 - e2)
+    e1 = (1 - np.sqrt(1 - e2)) / (1 + np.sqrt(1 - e2))
+
+    m = _meridian_arc(np.radians(p['lat0']), a, e2) + (y - p['y0']) / k0
+    mu = m / (a * (1 - e2 / 4 - 3 * e2 ** 2 / 64 - 5 * e2 ** 3 / 256))
+    phi1 = (mu + (3 * e1 / 2 - 27 * e1 ** 3 / 32) * np.sin(2 * mu)
+            + (21 * e1 ** 2 / 16 - 55 * e1 ** 4 / 32) * np.sin(4 * mu)
+            + (151 * e1 ** 3 / 96) * np.sin(6 * mu)
+            + (1097 * e1 ** 4 / 512) * np.sin(8 * mu))
+
+    sin1, cos1, tan1 = np.sin(phi1), np.cos(phi1), np.tan(phi1)
+    c1 = ep2 * cos1 ** 2
+    t1 = tan1 ** 2
+    w = 1 - e2 * sin1 ** 2
+    n1 = a / np.sqrt(w)
+    r1 = a * (1 - e2) / w ** 1.5
+    d = (x - p['x0']) / (n1 * k0)
+
+    lat = phi1 - (n1 * tan1 / r1) * (
+        d ** 2 / 2
+        - (5 + 3 * t1 + 10 * c1 - 4 * c1 ** 2 - 9 * ep2) * d ** 4 / 24
+        + (61 + 90 * t1 + 298 * c1 + 45 * t1 ** 2 - 252 * ep2 - 3 * c1 ** 2) * d ** 6 / 720)
+    lon = np.radians(p['lon0']) + (
+        d
+        - (1 + 2 * t1 + c1) * d ** 3 / 6
+        + (5 - 2 * c1 + 28 * t1 - 3 * c1 ** 2 + 8 * ep2 + 24 * t1 ** 2) * d ** 5 / 120) / cos1
+    return lat, lon
+
+
+def _to_ecef(lat, lon, a, f, h=0.0):
+    e2 = f * (2 - f)
+    n = a / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+    return ((n + h) * np.cos(lat) * np.cos(lon),
+            (n + h) * np.cos(lat) * np.sin(lon),
+            (n * (1 - e2) + h) * np.sin(lat))
+
+
+def _from_ecef(x, y, z, a, f, iterations=4):
+    """지심 직교좌표를 위경도(라디안)로 변환합니다. (반복법, 지표 부근에서 수 회면 수렴)"""
+    e2 = f * (2 - f)
+    p = np.hypot(x, y)
+    lat = np.arctan2(z, p * (1 - e2))
+    for _ in range(iterations):
+        n = a / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+        h = p / np.cos(lat) - n
+        lat = np.arctan2(z, p * (1 - e2 * n / (n + h)))
+    return lat, np.arctan2(y, x)
+
+
+def helmert(x, y, z, params):
+    """7변수(Position Vector) 좌표 변환"""
+    tx, ty, tz, rx, ry, rz, s = params
+    rx, ry, rz = rx * _ARCSEC, ry * _ARCSEC, rz * _ARCSEC
+    scale = 1 + s * 1e-6
+    return (tx + scale * (x - rz * y + ry * z),
+            ty + scale * (rz * x + y - rx * z),
+            tz + scale * (-ry * x + rx * y + z))
+
+
+def _numpy_to_wgs84(x, y, crs):
+    p = PROJECTIONS[crs]
+    lat, lon = inverse_tm(x, y, p)
+    ex, ey, ez = helmert(*_to_ecef(lat, lon, p['a'], p['f']), p['towgs84'])
+    lat, lon = _from_ecef(ex, ey, ez, WGS84_A, WGS84_F)
+    return np.degrees(lat), np.degrees(lon)
+
+
+def to_wgs84(x, y, crs=KOREA_TM, use_pyproj=True):
+    """
+    투영 좌표 배열(x=동향, y=북향)을 WGS84 (위도, 경도) 배열로 변환합니다.
+    pyproj 가 있으면 pyproj 를, 없으면 같은 변수의 NumPy 식을 사용합니다. (두 경로의 차이는 1cm 미만)
+    NaN 좌표는 NaN 으로 남습니다.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if crs == WGS84:
+        return y, x
+    if use_pyproj and Transformer is not None:
+        transformer = Transformer.from_crs(proj_string(crs), WGS84, always_xy=True)
+        lon, lat = transformer.transform(x, y)
+        return np.asarray(lat), np.asarray(lon)
+    return _numpy_to_wgs84(x, y, crs)
+
+
+def coordinate_status(lat, lon, lat_range, lon_range):
+    """
+    위경도 배열의 행별 상태 코드(COORD_*) 배열을 반환합니다.
+    범위 안이면 OK, 두 값을 바꿨을 때만 범위 안이면 SWAPPED, NaN 이면 MISSING, 그 외는 OUTSIDE.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+
+    def inside(a, b):
+        return (a > lat_range[0]) & (a < lat_range[1]) & (b > lon_range[0]) & (b < lon_range[1])
+
+    status = np.full(lat.shape, COORD_OUTSIDE, dtype=np.int8)
+    status[inside(lon, lat)] = COORD_SWAPPED
+    status[inside(lat, lon)] = COORD_OK
+    status[np.isnan(lat) | np.isnan(lon)] = COORD_MISSING
+    return status
@@ -0,0 +1,142 @@
+import codecs
+import json
+import os
+import threading
+
+try:
+    import chardet
+except ImportError:  # chardet이 없으면 BOM/표본 디코딩 결과만 사용합니다.
+    chardet = None
+
+# ==========================================
+# CSV 인코딩 판별 + 매니페스트 캐시
+# 여러 인코딩으로 파일 전체를 차례로 읽어 보는 대신, BOM 확인 -> 앞부분 표본 디코딩(utf-8, cp949)
+# -> chardet 순서로 한 번만 판별하고, 결과를 파일 크기/수정 시각과 함께 매니페스트(JSON)에 기록합니다.
+# 파일이 바뀌지 않으면 다음 실행부터는 판별 없이 기록된 인코딩으로 한 번만 파싱합니다.
+# ==========================================
+
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "csv_encodings.json")
+
+SAMPLE_BYTES = 64 * 1024
+BLOCK_BYTES = 1024 * 1024
+
+# 표본 디코딩 후보 (앞선 것 우선). cp949 는 euc-kr 의 상위 집합입니다.
+CANDIDATE_ENCODINGS = ['utf-8', 'cp949']
+BOMS = [(codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')]
+FALLBACK_ENCODING = 'cp949'
+
+
+def _normalize(encoding):
+    """chardet 이 돌려주는 이름을 pandas 에서 쓰는 한국어 인코딩 이름으로 맞춥니다."""
+    encoding = encoding.lower()
+    if encoding in ('euc-kr', 'ks_c_5601-1987', 'uhc', 'johab'):
+        return 'cp949'
+    if encoding == 'ascii':
+        return 'utf-8'
+    return encoding
+
+
+def sniff_encoding(path, sample_bytes=SAMPLE_BYTES):
+    """
+    파일 인코딩을 판별합니다. BOM -> 표본 디코딩(utf-8, cp949) -> chardet 순서입니다.
+    sample_bytes=None 이면 파일 전체를 블록 단위로 디코딩해 확인합니다. (메모리는 블록 크기만 사용)
+    """
+    decoders = {enc: codecs.getincrementaldecoder(enc)() for enc in CANDIDATE_ENCODINGS}
+    head = b''
+    read = 0
+    with open(path, 'rb') as f:
+        while sample_bytes is None or read < sample_bytes:
+            size = BLOCK_BYTES if sample_bytes is None else min(BLOCK_BYTES, sample_bytes - read)
+            block = f.read(size)
+            if read == 0:
+                head = block
+                for bom, enc in BOMS:
+                    if block.startswith(bom):
+                        return enc
+            at_end = len(block) < size or not block
+            for enc in list(decoders):
+                try:
+                    # 표본 끝에서 잘린 멀티바이트 문자는 오류로 보지 않습니다. (final=False)
+                    decoders[enc].decode(block, final=at_end)
+                except UnicodeDecodeError:
+                    del decoders[enc]
+            read += len(block)
+            if at_end or not decoders:
+                break
+
+    for enc in CANDIDATE_ENCODINGS:
+        if enc in decoders:
+            return enc
+    if chardet is not None and head:
+        guess = chardet.detect(head).get('encoding')
+        if guess:
+            return _normalize(guess)
+    return FALLBACK_ENCODING
+
+
+class EncodingManifest:
+    """파일 경로별 (크기, 수정 시각, 인코딩)을 기록하는 JSON 매니페스트입니다."""
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # 읽기 전용 배포 환경에서는 메모리에만 기록합니다.
+
+    def encoding_for(self, file_path, full=False):
+        """
+        파일 인코딩을 반환합니다. 크기/수정 시각이 같은 기록이 있으면 판별하지 않습니다.
+        full=True 이면 기록을 무시하고 파일 전체를 디코딩해 다시 판별합니다.
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            entry = self._load().get(key)
+            if not full and entry and entry.get('signature') == signature:
+                return entry['encoding']
+
+        encoding = sniff_encoding(file_path, None if full else SAMPLE_BYTES)
+        with self._lock:
+            self._load()[key] = {'signature': signature, 'encoding': encoding, 'full': bool(full)}
+            self._save()
+        return encoding
+
+
+_default_manifest = None
+_default_manifest_lock = threading.Lock()
+
+
+def get_manifest(path=DEFAULT_MANIFEST_PATH):
+    """프로세스 전체가 공유하는 인코딩 매니페스트를 반환합니다."""
+    global _default_manifest
+    with _default_manifest_lock:
+        if _default_manifest is None:
+            _default_manifest = EncodingManifest(path)
+        return _default_manifest
+
+
+def detect_encoding(file_path, full=False):
+    """매니페스트를 거쳐 파일 인코딩을 반환합니다."""
+    return get_manifest().encoding_for(file_path, full)
+
@@ -0,0 +1,224 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import coord_transform
+import csv_encoding
+import seulsekwon_engine
+
+# ==========================================
+# 데이터셋 매니페스트 (스키마 레지스트리)
+# data/cleaned 의 파일마다 기본 카테고리, 인코딩, 좌표계, 열 역할을 선언해 두고,
+# 모든 앱/스크립트가 열 이름을 추측하지 않고 필요한 열만 자료형을 지정해 한 번에 읽습니다.
+# validate_dataset 은 실제 파일이 선언과 달라진 부분(드리프트)을 보고합니다.
+# ==========================================
+
+WGS84 = coord_transform.WGS84
+# 한국 중부원점 TM (Bessel 타원체, 가산 200000/500000) - 지방행정 인허가 데이터의 좌표정보(X/Y)
+KOREA_TM = coord_transform.KOREA_TM
+
+# 열 역할: name(시설명), lat/lon(WGS84 위경도), x/y(TM 좌표), sub_category(세부 업종), address(주소)
+TEXT_ROLES = ('name', 'sub_category', 'address')
+COORD_ROLES = ('lat', 'lon', 'x', 'y')
+
+# 좌표계별 정상 범위 (서울 및 인접 지역)
+COORD_RANGES = {
+    WGS84: {'lat': (36.0, 39.0), 'lon': (125.0, 129.0)},
+    KOREA_TM: {'x': (150000.0, 250000.0), 'y': (400000.0, 500000.0)},
+}
+
+# 파일별 선언 (순서 = 적재 순서). sub_category 열이 없는 파일은 category 를 세부 업종으로 사용합니다.
+# streaming: 청크 단위로 읽으며 필요한 업종만 남기는 대용량 파일, optional: 저장소에 포함되지 않는 파일
+DATASETS = {
+    'starbucks_seoul_cleaned.csv': {
+        'category': '스타벅스', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '점포명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소', 'address': '주소'},
+    },
+    'bus_station_seoul_cleaned.csv': {
+        # 원본의 위도/경도 열 이름이 서로 바뀌어 있습니다. ('위도' 열에 경도 값)
+        'category': '버스정류장', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '정류소명', 'lat': '경도', 'lon': '위도', 'sub_category': '카테고리_소'},
+    },
+    'metro_station_seoul_cleaned.csv': {
+        'category': '지하철역', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '역명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소'},
+    },
+    'hospital_seoul_cleaned.csv': {
+        'category': '병원', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '기관명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소', 'address': '주소'},
+    },
+    'police_seoul_cleaned_ver2.csv': {
+        'category': '경찰서', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '관서명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소', 'address': '주소'},
+    },
+    'library_seoul_cleaned.csv': {
+        'category': '도서관', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '도서관명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소', 'address': '주소'},
+    },
+    'bookstore_seoul_cleaned.csv': {
+        'category': '서점', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '책방 이름', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소', 'address': '주소'},
+    },
+    'school_seoul_cleaned.csv': {
+        'category': '학교', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '학교명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소',
+                    'address': '소재지도로명주소'},
+    },
+    'park_raw_cleaned_revised.csv': {
+        'category': '공원', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '공원명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소',
+                    'address': '소재지지번주소'},
+    },
+    'finance_seoul_cleaned.csv': {
+        # 세부 업종 열 이름이 '카태고리_소'(오타)라 category(은행)를 세부 업종으로 사용합니다.
+        'category': '은행', 'encoding': 'utf-8-sig', 'crs': WGS84,
+        'columns': {'name': '지점명', 'lat': '위도', 'lon': '경도', 'address': '주소'},
+    },
+    'large_scale_shop_seoul_cleaned.csv': {
+        'category': '대형마트', 'encoding': 'cp949', 'crs': KOREA_TM,
+        'columns': {'name': '사업장명', 'x': '좌표정보(X)', 'y': '좌표정보(Y)', 'sub_category': '업태구분명',
+                    'address': '도로명주소'},
+    },
+    'sosang_seoul_cleaned.csv': {
+        'category': '소상공인', 'encoding': 'utf-8-sig', 'crs': WGS84, 'streaming': True, 'optional': True,
+        'columns': {'name': '상호명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소', 'address': '주소'},
+    },
+    'sosang_seoul_cleaned_ver2.csv': {
+        'category': '소상공인', 'encoding': 'utf-8-sig', 'crs': WGS84, 'streaming': True, 'optional': True,
+        'columns': {'name': '상호명', 'lat': '위도', 'lon': '경도', 'sub_category': '카테고리_소', 'address': '주소'},
+    },
+}
+
+# data/cleaned 밖의 통합 인프라 파일 (myang_renew_app)
+COMBINED_DATASET = {
+    'category': None, 'encoding': None, 'crs': WGS84,
+    'columns': {'name': 'name', 'lat': 'latitude', 'lon': 'longitude', 'sub_category': 'category_small'},
+}
+
+
+def dataset_spec(file):
+    """파일 이름의 선언을 반환합니다. 등록되지 않은 파일이면 KeyError."""
+    return DATASETS[file]
+
+
+def role_dtypes(spec, roles):
+    """선언된 역할 열의 원본 열 이름과 읽기 자료형을 반환합니다."""
+    columns = spec['columns']
+    return {columns[r]: (str if r in TEXT_ROLES else np.float64) for r in roles if r in columns}
+
+
+def is_projected(spec):
+    """위경도 대신 투영 좌표(x/y)가 선언된 파일인지 여부"""
+    return spec['crs'] != WGS84 and 'x' in spec['columns'] and 'y' in spec['columns']
+
+
+def project_frame(frame, crs):
+    """x/y 열을 WGS84 lat/lon 열로 한 번에(배열 단위) 변환합니다."""
+    lat, lon = coord_transform.to_wgs84(frame['x'].to_numpy(), frame['y'].to_numpy(), crs)
+    return frame.assign(lat=lat, lon=lon)
+
+
+def read_dataset(path, spec, roles=None, chunksize=None):
+    """
+    선언된 역할 열만 지정 자료형으로 한 번에 읽어 역할 이름(name, lat, ...)으로 바꾼 데이터프레임을 반환합니다.
+    chunksize 를 주면 청크 반복자를 반환합니다. 인코딩이 선언되지 않았으면 csv_encoding 으로 판별합니다.
+    투영 좌표(TM) 파일에 lat/lon 을 요청하면 x/y 를 읽어 WGS84 로 변환한 값을 돌려줍니다.
+    """
+    columns = spec['columns']
+    project = is_projected(spec) and any(r in ('lat', 'lon') for r in (roles or ()))
+    roles = [r for r in (roles or columns) if r in columns or (project and r in ('lat', 'lon'))]
+    read_roles = [r for r in roles if r in columns] + (['x', 'y'] if project else [])
+    dtypes = role_dtypes(spec, read_roles)
+    rename = {columns[r]: r for r in read_roles}
+
+    def finish(frame):
+        frame = frame.rename(columns=rename)
+        return (project_frame(frame, spec['crs']) if project else frame)[roles]
+
+    encoding = spec.get('encoding') or csv_encoding.detect_encoding(path)
+    reader = pd.read_csv(path, encoding=encoding, usecols=list(dtypes), dtype=dtypes, chunksize=chunksize)
+    if chunksize is None:
+        return finish(reader)
+    return (finish(chunk) for chunk in reader)
+
+
+def validate_dataset(path, spec, category_groups=None, ignore_case=True, sample_rows=None):
+    """
+    실제 파일이 선언과 다른 부분(드리프트)을 (심각도, 내용) 목록으로 반환합니다.
+    - error: 파일 없음, 선언된 열 없음, 좌표가 숫자가 아님
+    - info: 선택 파일(optional) 없음
+    - warning: 인코딩 불일치, 좌표가 좌표계 범위를 벗어남, 위도/경도 뒤바뀜, 빈 좌표, 그룹에 속하지 않는 세부 업종
+    """
+    if not os.path.exists(path):
+        return [('info' if spec.get('optional') else 'error', "파일 없음")]
+    issues = []
+
+    detected = csv_encoding.detect_encoding(path)
+    declared = spec.get('encoding')
+    # utf-8-sig 선언은 BOM 이 없는 utf-8 파일도 읽을 수 있으므로 같은 계열로 봅니다.
+    if declared and detected.replace('-sig', '') != declared.replace('-sig', ''):
+        issues.append(('warning', f"인코딩 불일치: 선언 {declared}, 실제 {detected}"))
+
+    header = list(pd.read_csv(path, encoding=declared or detected, nrows=0).columns)
+    missing = [f"{role}({col})" for role, col in spec['columns'].items() if col not in header]
+    if missing:
+        issues.append(('error', f"선언된 열 없음: {', '.join(missing)} / 실제 열: {header}"))
+        return issues
+
+    df = pd.read_csv(path, encoding=declared or detected, usecols=list(spec['columns'].values()),
+                     dtype=str, nrows=sample_rows)
+    ranges = COORD_RANGES.get(spec['crs'], {})
+    for role in COORD_ROLES:
+        col = spec['columns'].get(role)
+        if col is None:
+            continue
+        values = pd.to_numeric(df[col], errors='coerce')
+        non_numeric = int((values.isna() & df[col].notna()).sum())
+        if non_numeric:
+            issues.append(('error', f"{role}({col}) 숫자가 아닌 값 {non_numeric:,}건"))
+        empty = int(df[col].isna().sum())
+        if empty:
+            issues.append(('warning', f"{role}({col}) 빈 좌표 {empty:,}건"))
+        if role in ranges:
+            lo, hi = ranges[role]
+            outside = int(((values < lo) | (values > hi)).sum())
+            if outside:
+                issues.append(('warning', f"{role}({col}) {spec['crs']} 범위({lo:g}~{hi:g}) 밖 {outside:,}건 "
+                                          f"(중앙값 {values.median():.4f})"))
+
+    if spec['crs'] == WGS84 and 'lat' in spec['columns'] and 'lon' in spec['columns']:
+        # 행 단위로 위도/경도 값이 서로 바뀐 행을 셉니다. (선언의 열 역할이 뒤바뀐 경우 포함)
+        status = coord_transform.coordinate_status(
+            pd.to_numeric(df[spec['columns']['lat']], errors='coerce'),
+            pd.to_numeric(df[spec['columns']['lon']], errors='coerce'),
+            ranges['lat'], ranges['lon'])
+        swapped = int((status == coord_transform.COORD_SWAPPED).sum())
+        if swapped:
+            issues.append(('warning', f"위도/경도 뒤바뀜 {swapped:,}건"))
+
+    if is_projected(spec):
+        # 좌표계 선언이 맞는지: 변환한 위경도가 서울 부근 범위에 들어오는지 확인합니다.
+        x = pd.to_numeric(df[spec['columns']['x']], errors='coerce')
+        y = pd.to_numeric(df[spec['columns']['y']], errors='coerce')
+        lat, lon = coord_transform.to_wgs84(x.to_numpy(), y.to_numpy(), spec['crs'])
+        (lat_lo, lat_hi), (lon_lo, lon_hi) = COORD_RANGES[WGS84]['lat'], COORD_RANGES[WGS84]['lon']
+        outside = int((~np.isnan(lat) & ~((lat > lat_lo) & (lat < lat_hi) & (lon > lon_lo) & (lon < lon_hi))).sum())
+        if outside:
+            issues.append(('warning', f"{spec['crs']} -> {WGS84} 변환 좌표가 범위 밖 {outside:,}건"))
+
+    if category_groups is not None:
+        sub_col = spec['columns'].get('sub_category')
+        values = df[sub_col].fillna(spec['category']) if sub_col else pd.Series([spec['category']] * len(df))
+        group_mask, _ = seulsekwon_engine.classify_categories(values, category_groups, {}, ignore_case)
+        unmatched = values[group_mask == 0]
+        if len(unmatched):
+            top = ', '.join(f"{k}({v:,})" for k, v in unmatched.value_counts().head(5).items())
+            issues.append(('warning', f"어느 그룹에도 속하지 않는 세부 업종 {len(unmatched):,}건: {top}"))
+    return issues
+
+
+def validate_all(base_path, category_groups=None, ignore_case=True):
+    """data/cleaned 의 선언된 모든 파일을 검증하여 {파일 이름: 문제 목록}을 반환합니다."""
+    return {file: validate_dataset(os.path.join(base_path, file), spec, category_groups, ignore_case)
+            for file, spec in DATASETS.items()}
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+import spatial_index
+
+# ==========================================
+# 세션 공용 시설 데이터셋
+# 앱에서는 st.cache_resource 로 프로세스당 한 번만 만들어 모든 세션이 같은 객체를 참조하고,
+# 세션 상태(st.session_state)에는 좌표/반경/가중치 같은 설정만 둡니다.
+# 숫자 열과 공간 인덱스 배열은 쓰기 금지로 고정하여 한 세션에서 공용 데이터를 바꿀 수 없게 합니다.
+# ==========================================
+
+
+def freeze_frame(data):
+    """숫자 열을 쓰기 금지 배열로 고정한 데이터프레임을 복사 없이 반환합니다."""
+    columns = {}
+    for name in data.columns:
+        column = data[name]
+        if isinstance(column.dtype, np.dtype):
+            values = column.to_numpy()
+            values.flags.writeable = False
+            columns[name] = values
+        else:
+            # 범주형/문자열 등 확장 배열은 그대로 공유합니다.
+            columns[name] = column.array
+    return pd.DataFrame(columns, index=data.index, copy=False)
+
+
+class FacilityDataset:
+    """
+    모든 세션이 공유하는 읽기 전용 시설 데이터셋입니다. (시설 테이블 + 격자 공간 인덱스 + 데이터 버전)
+    좌표 열 이름이 다른 테이블(실거래가의 latitude/longitude 등)도 lat_col/lon_col 로 같은 방식으로 공유합니다.
+    """
+
+    def __init__(self, data, version=None, index=None, lat_col='lat', lon_col='lon', cell_m=spatial_index.DEFAULT_CELL_M):
+        self.data = freeze_frame(data)
+        if index is None:
+            index = spatial_index.GridIndex.from_frame(self.data, lat_col, lon_col, cell_m)
+        self.index = index.freeze()
+        self.lat_col, self.lon_col = lat_col, lon_col
+        # 분석 결과 캐시(analysis_cache) 키에 쓰는 데이터 버전
+        self.version = version
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def empty(self):
+        return self.data.empty
+
+    def memory_bytes(self):
+        """시설 테이블과 공간 인덱스가 차지하는 메모리(바이트)를 반환합니다."""
+        return int(self.data.memory_usage(deep=True).sum()) + self.index.nbytes
@@ -4,6 +4,8 @@ import os
 import re
 from geopy.distance import geodesic
 
+import dataset_manifest
+
 CATEGORY_GROUPS = {
     '생활/편의🏪': ['스타벅스', '편의점', '세탁소', '마트', '대형마트', '백화점'],
     '교통🚌': ['버스정류장', '지하철역'],
@@ -16,36 +18,18 @@ CATEGORY_GROUPS = {
 
 def load_all_data():
     base_path = 'c:/Users/Administrator/Desktop/fcicb6/pj/seoul_seulsekwon/data/cleaned'
-    file_map = {
-        'starbucks_seoul_cleaned.csv': '스타벅스', 'bus_station_seoul_cleaned.csv': '버스정류장',
-        'metro_station_seoul_cleaned.csv': '지하철역', 'hospital_seoul_cleaned.csv': '병원',
-        'police_seoul_cleaned_ver2.csv': '경찰서', 'library_seoul_cleaned.csv': '도서관',
-        'bookstore_seoul_cleaned.csv': '서점', 'school_seoul_cleaned.csv': '학교',
-        'park_raw_cleaned_revised.csv': '공원', 'finance_seoul_cleaned.csv': '은행',
-        'large_scale_shop_seoul_cleaned.csv': '대형마트', 'sosang_seoul_cleaned.csv': '소상공인'
-    }
     all_dfs = []
-    lat_cols = ['위도', 'lat', 'latitude', 'Y', 'y']
-    lon_cols = ['경도', 'lon', 'longitude', 'lng', 'X', 'x']
-    for file, sub_cat in file_map.items():
+    for file, spec in dataset_manifest.DATASETS.items():
         path = os.path.join(base_path, file)
         if os.path.exists(path):
-            df = None
-            for enc in ['utf-8-sig', 'cp949', 'utf-8', 'euc-kr']:
-                try:
-                    df = pd.read_csv(path, encoding=enc)
-                    break
-                except: continue
-            if df is not None:
-                if sub_cat == '소상공인' and '카테고리_소' in df.columns: df['sub_category'] = df['카테고리_소']
-                else: df['sub_category'] = sub_cat
-                lat_c = next((c for c in lat_cols if c in df.columns), None)
-                lon_c = next((c for c in lon_cols if c in df.columns), None)
-                name_c = next((c for c in ['상호명', '점포명', '이름', 'name'] if c in df.columns), None)
-                if lat_c and lon_c and name_c:
-                    temp_df = df[[name_c, lat_c, lon_c, 'sub_category']].copy()
-                    temp_df.columns = ['name', 'lat', 'lon', 'sub_category']
-                    all_dfs.append(temp_df)
+            sub_cat = spec['category']
+            try:
+                temp_df = dataset_manifest.read_dataset(path, spec, ['name', 'lat', 'lon', 'sub_category'])
+            except Exception:
+                continue
+            if sub_cat != '소상공인' or 'sub_category' not in temp_df.columns:
+                temp_df['sub_category'] = sub_cat
+            all_dfs.append(temp_df)
     return pd.concat(all_dfs, ignore_index=True)
 
 data = load_all_data()
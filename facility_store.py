@@ -0,0 +1,349 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import coord_transform
+import csv_encoding
+import dataset_manifest
+import seulsekwon_engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow가 없으면 CSV 경로만 사용합니다.
+    pa = None
+    feather = None
+
+# ==========================================
+# 컬럼형 시설 저장소 (Feather)
+# data/cleaned 의 CSV들을 한 번만 정규화하여 타입이 지정된 단일 파일로 저장하고,
+# 앱은 시작 시 이 파일을 메모리 매핑으로 읽습니다. (원본 CSV가 더 새로우면 CSV 경로 사용)
+# ==========================================
+
+STORE_FORMAT_VERSION = 4
+STORE_FILE_NAME = "facility_store.feather"
+STORE_METADATA_KEY = b"seulsekwon"
+
+# 파일명: 기본 카테고리 (파일별 인코딩/열/좌표계 선언은 dataset_manifest)
+SOURCE_FILES = {file: spec['category'] for file, spec in dataset_manifest.DATASETS.items()}
+
+# 전국 단위로 커질 수 있는 소상공인 파일(streaming 선언)은 청크 단위로 읽으며 필요한 행만 남깁니다.
+SOSANG_CHUNKSIZE = 50000
+
+# 서울 지역의 정상 범위: 위도(Lat) 36~39, 경도(Lon) 125~129
+SEOUL_LAT_RANGE = (36.0, 39.0)
+SEOUL_LON_RANGE = (125.0, 129.0)
+
+# 좌표 품질 보고 항목 (전체 행, coord_transform.COORD_* 상태 순서)
+QUALITY_KEYS = ('rows', 'ok', 'swapped', 'missing', 'outside')
+# 파일을 읽지 못한 경우 품질 보고에 남기는 오류 메시지 항목
+ERROR_KEY = 'error'
+
+def default_data_dir():
+    """프로젝트 폴더 기준 data/cleaned 경로를 반환합니다."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cleaned")
+
+
+def default_store_path(base_path=None):
+    """저장소 파일 기본 경로(data/cleaned/facility_store.feather)를 반환합니다."""
+    return os.path.join(base_path or default_data_dir(), STORE_FILE_NAME)
+
+
+def clean_coordinates(temp_df, report=None):
+    """
+    좌표를 행 단위로 검사하여 위경도가 뒤바뀐 행은 바로잡고, 비어 있거나 서울 범위 밖인 행은 제거합니다.
+    report(dict)를 주면 상태별 행 수(rows, ok, swapped, missing, outside)를 더해 둡니다.
+    """
+    lat = pd.to_numeric(temp_df['lat'], errors='coerce').to_numpy(dtype=np.float64)
+    lon = pd.to_numeric(temp_df['lon'], errors='coerce').to_numpy(dtype=np.float64)
+    status = coord_transform.coordinate_status(lat, lon, SEOUL_LAT_RANGE, SEOUL_LON_RANGE)
+    swapped = status == coord_transform.COORD_SWAPPED
+
+    if report is not None:
+        counts = np.bincount(status, minlength=len(QUALITY_KEYS) - 1)
+        for key, n in zip(QUALITY_KEYS, [len(status), *counts]):
+            report[key] = report.get(key, 0) + int(n)
+
+    keep = (status == coord_transform.COORD_OK) | swapped
+    return temp_df.assign(lat=np.where(swapped, lon, lat), lon=np.where(swapped, lat, lon))[keep]
+
+
+def _read_with_encoding_retry(path, spec, read, report=None):
+    """
+    read(spec) 결과를 반환합니다. 선언/기록된 인코딩이 맞지 않으면(UnicodeDecodeError) 파일 전체로 다시 판별해
+    인코딩 매니페스트 기록을 갱신하고 한 번 더 읽습니다. 그래도 실패하면 오류를 report 에 남기고 None.
+    """
+    for attempt in range(2):
+        if attempt > 0:
+            spec = dict(spec, encoding=csv_encoding.detect_encoding(path, full=True))
+        try:
+            return read(spec)
+        except UnicodeDecodeError as e:
+            error = e
+        except Exception as e:
+            error = e
+            break
+    if report is not None:
+        report[ERROR_KEY] = f"{type(error).__name__}: {error}"
+    return None
+
+
+def read_source(path, spec, extra_roles=(), report=None):
+    """
+    dataset_manifest 선언에 따라 CSV 하나를 name, lat, lon, sub_category (+ extra_roles) 형태로 읽습니다. (실패 시 None)
+    필요한 열만 자료형을 지정해 한 번에 파싱하며, 세부 업종 열이 없거나 비어 있으면 기본 카테고리를 사용합니다.
+    TM 좌표 파일은 읽는 단계에서 열 전체를 WGS84 로 변환합니다.
+    """
+    default_cat = spec['category']
+    roles = ['name', 'lat', 'lon', 'sub_category', *extra_roles]
+    temp_df = _read_with_encoding_retry(path, spec, lambda s: dataset_manifest.read_dataset(path, s, roles), report)
+    if temp_df is None:
+        return None
+
+    if 'sub_category' in temp_df.columns:
+        temp_df['sub_category'] = temp_df['sub_category'].fillna(default_cat).replace('', default_cat)
+    else:
+        temp_df.insert(3, 'sub_category', default_cat)
+    temp_df = clean_coordinates(temp_df, report)
+    return temp_df if not temp_df.empty else None
+
+
+def stream_sosang_csv(path, spec, category_groups, ignore_case=True, extra_roles=(), chunksize=SOSANG_CHUNKSIZE,
+                      report=None):
+    """
+    소상공인 CSV를 청크 단위로 읽으면서 그룹 키워드에 해당하는 업종(sub_category)과 서울 범위의 행만 남깁니다.
+    선언된 열만 읽고 청크마다 바로 걸러 내므로, 최대 메모리는 파일 크기가 아니라 청크 크기에 비례합니다.
+    반환값은 read_source 와 같은 형태(name, lat, lon, sub_category + extra_roles)이며 실패 시 None.
+    """
+    default_cat = spec['category']
+    roles = ['name', 'lat', 'lon', 'sub_category', *extra_roles]
+    columns = ['name', 'lat', 'lon', 'sub_category'] + [r for r in extra_roles if r in spec['columns']]
+
+    def read(spec):
+        # 품질 집계는 시도마다 따로 모아, 인코딩 오류로 중단된 시도의 청크가 보고에 섞이지 않게 합니다.
+        matched, parts, counts = {}, [], {}  # matched: 업종 값 -> 그룹 키워드 일치 여부 (청크 간 재사용)
+        for chunk in dataset_manifest.read_dataset(path, spec, roles, chunksize=chunksize):
+            if 'sub_category' in chunk.columns:
+                sub_category = chunk['sub_category'].fillna(default_cat).replace('', default_cat)
+            else:
+                sub_category = pd.Series(default_cat, index=chunk.index)
+            new_values = [v for v in sub_category.unique() if v not in matched]
+            if new_values:
+                group_mask, _ = seulsekwon_engine.classify_categories(new_values, category_groups, {}, ignore_case)
+                matched.update(zip(new_values, group_mask != 0))
+            keep = sub_category.map(matched).to_numpy(dtype=bool)
+            if not keep.any():
+                continue
+
+            temp_df = clean_coordinates(chunk.assign(sub_category=sub_category).loc[keep, columns], counts)
+            if not temp_df.empty:
+                parts.append(temp_df)
+        return parts, counts
+
+    result = _read_with_encoding_retry(path, spec, read, report)
+    if result is None:
+        return None
+    parts, counts = result
+    if report is not None:
+        for key, n in counts.items():
+            report[key] = report.get(key, 0) + n
+    return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def load_source(path, spec, category_groups=None, ignore_case=True, report=None):
+    """
+    원본 CSV 하나를 정규화된 형태(name, lat, lon, sub_category)로 읽습니다. (실패 시 None)
+    category_groups 가 주어지면 소상공인(streaming) 파일은 청크 단위로 읽으며 그룹에 해당하는 업종만 남깁니다.
+    """
+    if spec.get('streaming') and category_groups is not None:
+        return stream_sosang_csv(path, spec, category_groups, ignore_case, report=report)
+    return read_source(path, spec, report=report)
+
+
+def merge_sources(frames):
+    """파일별로 정규화된 테이블을 (선언 순서대로) 합치고 파일 간 중복을 제거합니다."""
+    frames = [df for df in frames if df is not None and not df.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    full_df = pd.concat(frames, ignore_index=True)
+
+    # 중복 제거 고도화: 이름과 좌표(소수점 4자리까지)가 동일한 경우 중복으로 간주
+    # 소수점 4자리는 약 11m 오차범위로, 같은 시설물이 중복 등록된 경우를 효과적으로 잡아냅니다.
+    # (반올림 좌표는 임시 키로만 쓰고 시설 테이블에 열을 추가하지 않습니다.)
+    keys = pd.DataFrame({'name': full_df['name'], 'lat': full_df['lat'].round(4), 'lon': full_df['lon'].round(4)})
+    return full_df[~keys.duplicated(keep='first')].reset_index(drop=True)
+
+
+def normalize_sources(base_path, category_groups=None, ignore_case=True, reports=None):
+    """
+    data/cleaned 의 모든 원본 CSV를 읽어 하나의 시설 테이블로 합치고 중복을 제거합니다.
+    category_groups 가 주어지면 소상공인 파일은 청크 단위로 읽으며 그룹에 해당하는 업종만 남깁니다.
+    reports(dict)를 주면 파일별 좌표 품질 보고({파일: {rows, ok, swapped, missing, outside}})를 채웁니다.
+    읽지 못한 파일은 보고의 error 항목에 오류 메시지가 남습니다.
+    """
+    all_dfs = []
+    for file, spec in dataset_manifest.DATASETS.items():
+        path = os.path.join(base_path, file)
+        if os.path.exists(path):
+            report = None if reports is None else reports.setdefault(file, {})
+            all_dfs.append(load_source(path, spec, category_groups, ignore_case, report))
+    return merge_sources(all_dfs)
+
+
+def compact_frame(df, category_cols=None, max_category_ratio=0.5):
+    """
+    데이터프레임을 메모리를 줄인 스키마로 변환합니다.
+    float64 -> float32, 정수 -> 가장 작은 정수형, 문자열 -> 범주형(사전 인코딩).
+    category_cols 를 주지 않으면 고유값 비율이 max_category_ratio 이하인 문자열 열만 범주형으로 바꿉니다.
+    """
+    converted = {}
+    for name in df.columns:
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(col):
+            continue
+        if pd.api.types.is_float_dtype(col):
+            converted[name] = col.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(col):
+            converted[name] = pd.to_numeric(col, downcast='integer')
+        elif pd.api.types.is_string_dtype(col) or col.dtype == object:
+            if category_cols is not None:
+                to_category = name in category_cols
+            else:
+                to_category = len(col) > 0 and col.nunique() / len(col) <= max_category_ratio
+            if to_category:
+                converted[name] = col.astype('category')
+    return df.assign(**converted)
+
+
+def memory_report(before, after):
+    """두 데이터프레임의 열별 자료형과 메모리 사용량(KB)을 비교한 표를 반환합니다."""
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'before_dtype': before.dtypes.astype(str), 'after_dtype': after.dtypes.astype(str),
+        'before_kb': before_bytes / 1024, 'after_kb': after_bytes / 1024,
+    })
+    report.loc['(합계)'] = ['', '', before_bytes.sum() / 1024, after_bytes.sum() / 1024]
+    report['ratio'] = report['after_kb'] / report['before_kb']
+    return report
+
+
+def to_store_frame(df, category_groups, emoji_map, ignore_case=True):
+    """
+    정규화된 시설 테이블을 저장소 스키마로 변환합니다.
+    float32 좌표(약 1m 정밀도), 범주형(사전 인코딩) name/sub_category, 그룹 비트마스크(group_mask)와 이모지 열을 갖습니다.
+    """
+    if df.empty:
+        return df
+    df = seulsekwon_engine.attach_category_codes(df, category_groups, emoji_map, ignore_case)
+    df['name'] = df['name'].astype(str)
+    df['sub_category'] = df['sub_category'].astype(str)
+    return compact_frame(df, category_cols=['name', 'sub_category']).reset_index(drop=True)
+
+
+def build_facility_table(base_path, category_groups, emoji_map, ignore_case=True, reports=None):
+    """원본 CSV에서 저장소 스키마의 시설 테이블을 생성합니다. (CSV 경로)"""
+    df = to_store_frame(normalize_sources(base_path, category_groups, ignore_case, reports),
+                        category_groups, emoji_map, ignore_case)
+    # 같은 그룹의 같은 이름 시설이 5m 안에 겹친 경우를 여기서 한 번만 제거 (질의 시에는 중복 제거 없음)
+    return seulsekwon_engine.drop_nearby_duplicates(df)
+
+
+def source_signature(base_path):
+    """원본 CSV들의 크기/수정시각 서명을 반환합니다. (저장소 최신 여부 판단용)"""
+    signature = {}
+    for file in SOURCE_FILES:
+        path = os.path.join(base_path, file)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature[file] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def scheme_key(category_groups, emoji_map, ignore_case=True):
+    """분류 기준이 바뀌면 저장소의 그룹 코드도 무효가 되도록 기준 자체의 해시를 만듭니다."""
+    payload = json.dumps([category_groups, emoji_map, bool(ignore_case)], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def dataset_version(base_path, category_groups, emoji_map, ignore_case=True):
+    """원본 CSV 서명/분류 기준/저장소 형식으로 만든 데이터 버전입니다. (분석 결과 캐시 키용)"""
+    payload = json.dumps([STORE_FORMAT_VERSION, source_signature(base_path),
+                          scheme_key(category_groups, emoji_map, ignore_case)], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def write_feather_meta(df, path, meta, key=STORE_METADATA_KEY):
+    """
+    데이터프레임을 무압축 Feather(Arrow IPC) 파일로 저장하고 스키마 메타데이터의 key 항목에 meta(dict)를 기록합니다.
+    임시 파일에 쓴 뒤 교체하므로 중간에 중단되어도 기존 파일이 깨지지 않습니다. (메모리 매핑 가능)
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[key] = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = path + ".tmp"
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+
+def read_feather_meta(path, key=STORE_METADATA_KEY):
+    """Feather 파일 스키마 메타데이터의 key 항목(dict)을 읽습니다. 파일이 없거나 읽을 수 없으면 None."""
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path, 'r') as source:
+            schema = pa.ipc.open_file(source).schema
+    except (OSError, pa.ArrowInvalid):
+        return None
+    raw = (schema.metadata or {}).get(key)
+    return json.loads(raw) if raw else None
+
+
+def write_store(df, path, base_path, category_groups, emoji_map, ignore_case=True):
+    """시설 테이블을 무압축 Feather(Arrow IPC) 파일로 저장합니다. (메모리 매핑 가능)"""
+    if pa is None:
+        raise ImportError("facility_store 저장에는 pyarrow가 필요합니다.")
+    write_feather_meta(df, path, {
+        "version": STORE_FORMAT_VERSION,
+        "sources": source_signature(base_path),
+        "scheme": scheme_key(category_groups, emoji_map, ignore_case),
+    })
+
+
+def read_store_metadata(path):
+    """저장소 파일의 메타데이터(dict)를 읽습니다. 파일이 없거나 읽을 수 없으면 None."""
+    return read_feather_meta(path, STORE_METADATA_KEY)
+
+
+def is_store_fresh(path, base_path, category_groups, emoji_map, ignore_case=True):
+    """저장소가 현재 원본 CSV/분류 기준과 일치하는지 확인합니다."""
+    meta = read_store_metadata(path)
+    return bool(meta) and \
+        meta.get("version") == STORE_FORMAT_VERSION and \
+        meta.get("sources") == source_signature(base_path) and \
+        meta.get("scheme") == scheme_key(category_groups, emoji_map, ignore_case)
+
+
+def load_store(path, base_path, category_groups, emoji_map, ignore_case=True):
+    """최신 저장소를 메모리 매핑으로 읽어 반환합니다. 없거나 오래되었으면 None."""
+    if not is_store_fresh(path, base_path, category_groups, emoji_map, ignore_case):
+        return None
+    table = feather.read_table(path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def load_facilities(base_path, category_groups, emoji_map, ignore_case=True):
+    """저장소가 최신이면 저장소를, 아니면 원본 CSV를 정규화하여 시설 테이블을 반환합니다."""
+    df = load_store(default_store_path(base_path), base_path, category_groups, emoji_map, ignore_case)
+    if df is not None:
+        return df
+    return build_facility_table(base_path, category_groups, emoji_map, ignore_case)
@@ -1,46 +1,250 @@
 import requests
 import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 # .env 파일에서 환경 변수를 로드합니다.
 load_dotenv()
 
+# ==========================================
+# 카카오 로컬 API 지오코딩 클라이언트
+# - 연결을 재사용하는 공용 세션(keep-alive 커넥션 풀)
+# - 키워드 검색을 먼저 요청하고, 응답이 늦거나 결과가 없을 때만 주소 검색을 요청 (키워드 결과 우선)
+# - 정규화된 검색어 기준의 디스크 LRU 캐시 (프로세스 재시작 후에도 유지)
+# ==========================================
+
+KAKAO_API_BASE = "https://dapi.kakao.com"
+KEYWORD_PATH = "/v2/local/search/keyword.json"
+ADDRESS_PATH = "/v2/local/search/address.json"
+
+DEFAULT_TIMEOUT = 5
+# 키워드 검색 응답이 이 시간(초) 안에 오지 않으면 주소 검색을 함께 보내 대기 시간을 줄입니다.
+ADDRESS_HEDGE_DELAY = 0.2
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "kakao_geocode.sqlite3")
+DEFAULT_CACHE_SIZE = 10000
+
+
+class KakaoAuthError(Exception):
+    """API 키 권한 오류(401/403)입니다. 호출하는 쪽에서 안내 메시지를 표시합니다."""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"Kakao API 인증 오류 ({status_code}): {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def normalize_query(query):
+    """캐시 키용 검색어 정규화: 앞뒤 공백 제거, 연속 공백 축약, 소문자화."""
+    return re.sub(r'\s+', ' ', str(query)).strip().lower()
+
+
+class GeocodeCache:
+    """SQLite 기반 디스크 LRU 캐시입니다. 최근 사용 시각 기준으로 오래된 항목부터 삭제합니다."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                " query TEXT PRIMARY KEY, result TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS geocode_last_used ON geocode(last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, query):
+        key = normalize_query(query)
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT result FROM geocode WHERE query = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE geocode SET last_used = ? WHERE query = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, query, result):
+        key = normalize_query(query)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode (query, result, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(result, ensure_ascii=False), time.time())
+            )
+            # 용량 초과분은 가장 오래 사용되지 않은 항목부터 삭제
+            conn.execute(
+                "DELETE FROM geocode WHERE query IN ("
+                " SELECT query FROM geocode ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def __len__(self):
+        with self._lock, self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+
+
+class KakaoGeocoder:
+    """세션/스레드풀/디스크 캐시를 공유하는 카카오 지오코딩 클라이언트입니다."""
+
+    def __init__(self, api_key, base_url=KAKAO_API_BASE, timeout=DEFAULT_TIMEOUT,
+                 cache_path=DEFAULT_CACHE_PATH, cache_size=DEFAULT_CACHE_SIZE, pool_size=10,
+                 hedge_delay=ADDRESS_HEDGE_DELAY):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+
+        # keep-alive 커넥션 풀을 가진 공용 세션
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"KakaoAK {api_key}"})
+
+        self.cache = GeocodeCache(cache_path, cache_size) if cache_path else None
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="kakao-geo")
+
+    def _search(self, path, query):
+        """검색 API 한 번 호출 후 첫 번째 문서를 좌표 dict로 반환합니다. (결과 없음: None)"""
+        response = self.session.get(self.base_url + path, params={"query": query, "size": 1}, timeout=self.timeout)
+        if response.status_code in (401, 403):
+            raise KakaoAuthError(response.status_code, response.text)
+        if response.status_code == 429 or response.status_code >= 500:
+            # 일시적 오류(요청 한도 초과/서버 오류)는 예외로 알려 재시도할 수 있게 합니다.
+            response.raise_for_status()
+        if response.status_code != 200:
+            return None
+        documents = response.json().get('documents') or []
+        if not documents:
+            return None
+        info = documents[0]
+        return {
+            "address_name": info.get('address_name') or query,
+            "place_name": info.get('place_name'),
+            "lat": float(info['y']),
+            "lng": float(info['x'])
+        }
+
+    def search_keyword(self, query):
+        """키워드(장소명) 검색 결과를 반환합니다."""
+        return self._search(KEYWORD_PATH, query)
+
+    def search_address(self, query):
+        """주소(도로명/지번) 검색 결과를 반환합니다."""
+        return self._search(ADDRESS_PATH, query)
+
+    def geocode(self, query, use_cache=True, raise_on_error=False):
+        """
+        키워드 검색 결과를 우선 반환하고, 주소 결과는 키워드 검색이 결과 없음/실패일 때만 사용합니다.
+        (같은 검색어는 항상 같은 좌표로 풀립니다)
+        주소 검색은 키워드 검색이 결과 없음/실패이거나 hedge_delay 안에 응답하지 않을 때만 요청하므로,
+        키워드 검색이 빠르게 성공하면 API 호출은 한 번입니다. 늦게 성공한 경우 미리 보낸 주소 검색 결과는 버립니다.
+        둘 다 실패하면 None, API 키 권한 오류는 KakaoAuthError로 알립니다.
+        raise_on_error=True 이면 네트워크/서버 오류로 실패한 경우 None 대신 예외를 다시 던집니다.
+        (결과 없음과 일시적 실패를 구분해야 하는 일괄 처리용)
+        """
+        if not query or not str(query).strip():
+            return None
+        if use_cache and self.cache is not None:
+            cached = self.cache.get(query)
+            if cached is not None:
+                return cached
+
+        keyword = self._executor.submit(self.search_keyword, query)
+        address = None
+        if not wait([keyword], timeout=self.hedge_delay).done:
+            # 키워드 검색이 늦으면 주소 검색을 함께 보냅니다.
+            address = self._executor.submit(self.search_address, query)
+
+        # 우선순위 순서(키워드 -> 주소)로 결과를 확인합니다.
+        result, auth_error, request_error = None, None, None
+        for future in (keyword, address):
+            if future is None:  # 키워드 검색이 결과 없음/실패 -> 이제 주소 검색 요청
+                future = self._executor.submit(self.search_address, query)
+            try:
+                result = future.result()
+            except KakaoAuthError as e:
+                auth_error = e
+                continue
+            except requests.RequestException as e:
+                request_error = e
+                continue
+            if result is not None:
+                break
+        if address is not None:
+            address.cancel()  # 아직 시작하지 않은 주소 검색은 보내지 않습니다.
+
+        if result is None:
+            if auth_error is not None:
+                raise auth_error
+            if raise_on_error and request_error is not None:
+                raise request_error
+            return None
+
+        # 키워드 검색이 일시적으로 실패해 얻은 주소 결과는 캐시하지 않습니다. (다음 호출에서 키워드 결과로 교정)
+        if self.cache is not None and request_error is None:
+            self.cache.put(query, result)
+        return result
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+_geocoders = {}
+_geocoders_lock = threading.Lock()
+
+
+def get_geocoder(api_key, **kwargs):
+    """API 키별로 하나의 클라이언트를 만들어 프로세스 전체에서 재사용합니다."""
+    with _geocoders_lock:
+        key = (api_key, tuple(sorted(kwargs.items())))
+        if key not in _geocoders:
+            _geocoders[key] = KakaoGeocoder(api_key, **kwargs)
+        return _geocoders[key]
+
+
 def get_coordinates(query, api_key):
     """
     대략적인 주소나 키워드를 입력받아 위도(lat), 경도(lng)를 반환합니다.
     """
-    # 1. 키워드 검색 API 사용 (대략적인 주소나 장소명에 유리)
-    url = "https://dapi.kakao.com/v2/local/search/keyword.json"
-    headers = {"Authorization": f"KakaoAK {api_key}"}
-    params = {"query": query}
-    
-    response = requests.get(url, headers=headers, params=params)
-    
-    if response.status_code == 200:
-        result = response.json()
-        if result['documents']:
-            # 가장 연관도 높은 첫 번째 결과의 좌표 추출
-            address_info = result['documents'][0]
-            return {
-                "address_name": address_info['address_name'],
-                "lat": address_info['y'],  # 위도
-                "lng": address_info['x']   # 경도
-            }
-        else:
-            return "검색 결과가 없습니다."
-    else:
-        return f"Error: {response.status_code}"
+    # 키워드 검색 API 사용 (대략적인 주소나 장소명에 유리)
+    try:
+        result = get_geocoder(api_key).search_keyword(query)
+    except KakaoAuthError as e:
+        return f"Error: {e.status_code}"
+    except requests.RequestException as e:
+        return f"Error: {e}"
+
+    if result is None:
+        return "검색 결과가 없습니다."
+    # 가장 연관도 높은 첫 번째 결과의 좌표
+    return {
+        "address_name": result['address_name'],
+        "lat": result['lat'],  # 위도
+        "lng": result['lng']   # 경도
+    }
 
 # app.py와의 호환성을 위한 래퍼 함수
 def get_coords_from_address(address: str):
     """
-    주소 검색 API를 호출하여 (위도, 경도) 튜플을 반환합니다.
+    키워드/주소 동시 검색(캐시 포함)으로 (위도, 경도) 튜플을 반환합니다.
     """
     api_key = os.getenv("KAKAO_REST_API_KEY")
     if not api_key:
         return None
-    result = get_coordinates(address, api_key)
-    if isinstance(result, dict):
+    try:
+        result = get_geocoder(api_key).geocode(address)
+    except KakaoAuthError:
+        return None
+    if result:
         return float(result['lat']), float(result['lng'])
     return None
 
@@ -58,4 +262,4 @@ if __name__ == "__main__":
         print(f"위도(Latitude): {location_data['lat']}")
         print(f"경도(Longitude): {location_data['lng']}")
     else:
-        print(location_data)
\ No newline at end of file
+        print(location_data)
@@ -0,0 +1,128 @@
+from folium.plugins import FastMarkerCluster
+from folium.template import Template
+
+# ==========================================
+# 시설 마커 클러스터 레이어 (지도 공통)
+# 시설을 개별 folium.Marker(DivIcon HTML 포함)로 만들지 않고 [위도, 경도, 이모지, 이름, 거리] 행 배열 하나로 넘겨,
+# 브라우저에서 이모지 마커를 만들고 Leaflet.markercluster 로 확대 수준에 따라 묶어 보여줍니다.
+# 반경 안 시설을 모두 표시하면서 지도 HTML 크기와 렌더링 시간을 줄입니다.
+# ==========================================
+
+# 이 확대 수준부터는 묶지 않고 개별 마커로 표시 (건물 단위)
+DISABLE_CLUSTERING_AT_ZOOM = 18
+# 클러스터로 묶는 화면 반경(px)
+MAX_CLUSTER_RADIUS = 50
+# 좌표 소수 자릿수 (6자리, 약 0.1m)
+COORD_DECIMALS = 6
+
+# 행 -> 이모지 마커 함수 (HTML 특수문자는 이스케이프)
+_MARKER_CALLBACK = """
+    (function () {
+        var escapeHtml = function (s) {
+            return String(s).replace(/[&<>"']/g, function (c) {
+                return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+            });
+        };
+        return function (row) {
+            var icon = L.divIcon({
+                className: '', iconSize: [%(size)d, %(size)d], iconAnchor: [%(half)d, %(half)d],
+                html: '<div style="font-size: %(font_size)dpx; background: white; border-radius: 50%%; '
+                    + 'width: %(size)dpx; height: %(size)dpx; display: flex; align-items: center; '
+                    + 'justify-content: center; box-shadow: 0 2px 4px rgba(0,0,0,0.15); '
+                    + 'border: 2px solid %(border_color)s;">' + row[2] + '</div>'
+            });
+            var popup = '<b>' + escapeHtml(row[3]) + '</b><br>' + row[4] + 'm'
+                + (row.length > 5 ? ' (' + escapeHtml(row[5]) + ')' : '');
+            return L.marker(new L.LatLng(row[0], row[1]), {icon: icon, emoji: row[2]}).bindPopup(popup);
+        };
+    })()
+"""
+
+# 클러스터 아이콘: 가장 많은 시설군의 이모지 + 시설 수
+_CLUSTER_ICON = """
+    function (cluster) {
+        var children = cluster.getAllChildMarkers();
+        var tally = {}, top = null;
+        for (var i = 0; i < children.length; i++) {
+            var e = children[i].options.emoji;
+            tally[e] = (tally[e] || 0) + 1;
+            if (top === null || tally[e] > tally[top]) { top = e; }
+        }
+        var n = children.length;
+        var size = n < 10 ? 34 : (n < 100 ? 40 : 46);
+        return L.divIcon({
+            className: '', iconSize: [size, size],
+            html: '<div style="width: ' + size + 'px; height: ' + size + 'px; border-radius: 50%%; '
+                + 'background: white; border: 3px solid %(border_color)s; box-shadow: 0 2px 6px rgba(0,0,0,0.2); '
+                + 'display: flex; flex-direction: column; align-items: center; justify-content: center; '
+                + 'line-height: 1; font-family: Pretendard, sans-serif;">'
+                + '<span style="font-size: 14px;">' + top + '</span>'
+                + '<span style="font-size: 11px; font-weight: 700; color: #1e293b;">' + n + '</span></div>'
+        });
+    }
+"""
+
+
+class FacilityClusterLayer(FastMarkerCluster):
+    """
+    시설 행 배열을 브라우저에서 마커로 만들어 한 번에(addLayers) 클러스터에 넣는 레이어입니다.
+    (FastMarkerCluster 는 마커를 하나씩 추가하므로 시설이 많으면 느립니다)
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                {{ this.callback }}
+
+                var data = {{ this.data|tojson }};
+                var cluster = L.markerClusterGroup({{ this.options|tojavascript }});
+                {%- if this.icon_create_function is not none %}
+                cluster.options.iconCreateFunction =
+                    {{ this.icon_create_function.strip() }};
+                {%- endif %}
+
+                var markers = new Array(data.length);
+                for (var i = 0; i < data.length; i++) {
+                    markers[i] = callback(data[i]);
+                }
+                cluster.addLayers(markers);
+
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}"""
+    )
+
+
+def facility_rows(facilities, include_category=False):
+    """시설 레코드(dict) 목록을 [위도, 경도, 이모지, 이름, 거리(m)(, 분류)] 행 목록으로 바꿉니다."""
+    rows = []
+    for f in facilities:
+        row = [round(float(f['lat']), COORD_DECIMALS), round(float(f['lon']), COORD_DECIMALS),
+               f['emoji'], str(f['name']), int(round(f['distance']))]
+        if include_category:
+            row.append(str(f['sub_category']))
+        rows.append(row)
+    return rows
+
+
+def add_facility_markers(m, facilities, border_color, size=28, font_size=16, include_category=False):
+    """
+    반경 내 시설 전체를 이모지 마커 클러스터 레이어로 지도에 추가합니다.
+    size/font_size 는 개별 마커 원 크기와 이모지 크기(px), include_category 면 팝업에 세부 분류를 표시합니다.
+    """
+    if not facilities:
+        return m
+    params = {'size': size, 'half': size // 2, 'font_size': font_size, 'border_color': border_color}
+    FacilityClusterLayer(
+        facility_rows(facilities, include_category),
+        callback=_MARKER_CALLBACK % params,
+        icon_create_function=_CLUSTER_ICON % params,
+        control=False,
+        disableClusteringAtZoom=DISABLE_CLUSTERING_AT_ZOOM,
+        maxClusterRadius=MAX_CLUSTER_RADIUS,
+        spiderfyOnMaxZoom=False,
+        chunkedLoading=True,
+    ).add_to(m)
+    return m
@@ -3,15 +3,24 @@ import pandas as pd
 import folium
 import plotly.express as px
 import plotly.graph_objects as go
-from geopy.distance import geodesic
 import os
-import requests
 from dotenv import load_dotenv
 from streamlit_folium import st_folium
 import re
 import base64
 from io import BytesIO
 import datetime
+import seulsekwon_engine
+import kakao_geo
+import facility_store
+import score_grid
+import analysis_cache
+import dataset_service
+import dataset_manifest
+import combined_dataset
+import real_estate_store
+import price_score
+import map_layers
 
 # ==========================================
 # 1. Configuration & Constants
@@ -69,33 +78,19 @@ THEME = {
     "text_muted": "#64748b"
 }
 
-EMOJI_MAP = {
-    "스타벅스": "☕", "카페": "☕", "편의점": "🏪", "세탁소": "🏪", "마트": "🏪", "대형마트": "🏬",
-    "백화점": "🏬", "버스": "🚌", "bus": "🚌", "정류장": "🚌", "정류소": "🚌",
-    "지하철": "🚇", "metro": "🚇", "역": "🚇", "병원": "🏥", "의원": "💊",
-    "약국": "💊", "경찰": "🚓", "파출소": "🚓", "도서관": "📚", "서점": "📚",
-    "학교": "🏫", "공원": "🌳", "park": "🌳", "체육": "🏋️", "운동": "🏋️", "은행": "🏦", "금융": "🏦"
-}
+# 카테고리 분류 기준은 공통 엔진(seulsekwon_engine)에서 가져옵니다.
+EMOJI_MAP = seulsekwon_engine.EMOJI_MAP
+CATEGORY_GROUPS = seulsekwon_engine.CATEGORY_GROUPS
 
-CATEGORY_GROUPS = {
-    "생활/편의🏪": ["스타벅스", "편의점", "세탁소", "마트", "대형마트", "백화점", "카페"],
-    "교통🚌": ["버스", "지하철", "정류장", "정류소", "역", "bus", "metro"],
-    "의료💊": ["병원", "의원", "약국", "치과", "한의원"],
-    "안전/치안🚨": ["경찰", "파출소", "치안", "소방", "119"],
-    "교육/문화📚": ["도서관", "서점", "학교", "유치원", "학원"],
-    "자연/여가🌳": ["공원", "체육", "운동", "산책", "park"],
-    "금융🏦": ["은행", "금융", "ATM"]
-}
+DEFAULT_WEIGHTS = seulsekwon_engine.DEFAULT_WEIGHTS
 
-DEFAULT_WEIGHTS = {
-    "생활/편의🏪": 30, 
-    "교통🚌": 20, 
-    "의료💊": 15, 
-    "안전/치안🚨": 10, 
-    "교육/문화📚": 5, 
-    "자연/여가🌳": 15, 
-    "금융🏦": 5
-}
+# 카테고리별 정상 기여 최대치 (도심 기준)
+MAX_CAPS = seulsekwon_engine.MAX_CAPS
+
+# 반경 선택지 (m)
+RADIUS_OPTIONS = seulsekwon_engine.RADIUS_OPTIONS
+# 실거래가 공간 인덱스 격자 크기(m) - 반경 3km 질의 기준
+REAL_ESTATE_CELL_M = 500.0
 
 # ==========================================
 # 2. Styling (CSS)
@@ -400,50 +395,30 @@ def get_kakao_api_key():
 
 @st.cache_data(ttl=3600)
 def get_coords_from_address(query: str):
-    """주소 또는 장소명(ex. 강남경찰서)으로 좌표를 검색합니다. (키워드 -> 주소 순차 검색)"""
+    """주소 또는 장소명(ex. 강남경찰서)으로 좌표를 검색합니다. (키워드/주소 동시 검색, 디스크 캐시)"""
     api_key = get_kakao_api_key()
     if not api_key:
         st.error("카카오 API 키가 설정되지 않았습니다.")
         return None
         
-    headers = {"Authorization": f"KakaoAK {api_key}"}
-
-    # 1. 키워드 검색 시도 (장소명 위주)
-    url_kw = "https://dapi.kakao.com/v2/local/search/keyword.json"
+    # 공용 지오코딩 클라이언트: 키워드 검색 우선(늦거나 결과가 없으면 주소 검색), 디스크 캐시를 공유합니다.
     try:
-        res_kw = requests.get(url_kw, headers=headers, params={"query": query, "size": 1}, timeout=5)
-        if res_kw.status_code == 200:
-            data = res_kw.json()
-            if data['documents']:
-                info = data['documents'][0]
-                return {
-                    "address_name": info.get('place_name', info.get('address_name', query)),
-                    "lat": float(info['y']),
-                    "lng": float(info['x'])
-                }
-        elif res_kw.status_code == 401 and "ip mismatched" in res_kw.text:
+        res = kakao_geo.get_geocoder(api_key).geocode(query)
+    except kakao_geo.KakaoAuthError as e:
+        if "ip mismatched" in e.message:
             st.error("❌ 카카오 API IP 인증 오류가 발생했습니다. 개발자 센터에 현재 서버 IP를 등록해주세요.")
-    except Exception as e:
-        pass # 키워드 실패 시 주소 검색으로 넘어감
-
-    # 2. 주소 검색 시도 (새주소, 지번주소 위주)
-    url_addr = "https://dapi.kakao.com/v2/local/search/address.json"
-    try:
-        res_addr = requests.get(url_addr, headers=headers, params={"query": query, "size": 1}, timeout=5)
-        if res_addr.status_code == 200:
-            data = res_addr.json()
-            if data['documents']:
-                info = data['documents'][0]
-                # 주소 검색 결과에서 좌표 추출
-                return {
-                    "address_name": info['address_name'],
-                    "lat": float(info['y']),
-                    "lng": float(info['x'])
-                }
+        return None
     except Exception as e:
         st.error(f"좌표 변환 중 예외 발생: {e}")
+        return None
 
-    return None
+    if res is None:
+        return None
+    return {
+        "address_name": res.get('place_name') or res['address_name'],
+        "lat": res['lat'],
+        "lng": res['lng']
+    }
 
 def get_dong_name(address):
     """주소에서 행정동 이름을 추출합니다."""
@@ -452,105 +427,106 @@ def get_dong_name(address):
     match = re.search(r'([가-힣]+동)', address)
     return match.group(1) if match else "서울시"
 
-@st.cache_data
+def infrastructure_data_path():
+    """
+    최종 통합 및 중복 제거된 데이터 파일 경로를 반환합니다.
+    scripts/build_combined_dataset.py 로 만든 통합 데이터가 현재 data/cleaned 원본/분류 기준과 일치하면 그 파일을,
+    없거나 원본이 바뀌었으면 기존 통합 CSV를 프로젝트 기준 상대 경로(share/data, 없으면 ../data)에서 찾습니다.
+    """
+    built_path = combined_dataset.default_combined_path()
+    if combined_dataset.is_combined_fresh(built_path, facility_store.default_data_dir(), CATEGORY_GROUPS, EMOJI_MAP):
+        return built_path
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    candidates = [
+        os.path.join(current_dir, "share", "data", "seoul_combined_data_final_v3.csv"),
+        os.path.join(current_dir, "..", "data", "seoul_combined_data_final_v3.csv"),
+    ]
+    return next((p for p in candidates if os.path.exists(p)), candidates[-1])
+
 def load_infrastructure_data():
     """최종 통합된 인프라 데이터를 로드합니다."""
-    # 최종 통합 및 중복 제거된 데이터 파일 경로
-    file_path = "/Users/kimsuhyun/Desktop/fcicb6/seoul_seulsekwon/share/data/seoul_combined_data_final_v3.csv"
-    
+    file_path = infrastructure_data_path()
+    if not file_path.endswith(".feather") and combined_dataset.read_combined_version(combined_dataset.default_combined_path()):
+        st.warning("통합 인프라 데이터가 원본 CSV와 맞지 않아 기존 통합 CSV를 사용합니다. "
+                   "scripts/build_combined_dataset.py 를 다시 실행하세요.")
     if not os.path.exists(file_path):
-        # 상대 경로 시도
-        current_dir = os.path.dirname(__file__)
-        file_path = os.path.join(current_dir, "..", "data", "seoul_combined_data_final_v3.csv")
-        
-        if not os.path.exists(file_path):
-            st.error(f"데이터 파일을 찾을 수 없습니다: {file_path}")
-            return pd.DataFrame()
+        st.error(f"데이터 파일을 찾을 수 없습니다: {file_path}")
+        return pd.DataFrame()
+
+    if file_path.endswith(".feather"):
+        # 빌드 단계에서 정제/중복 제거/그룹 분류/압축 스키마까지 끝난 테이블을 메모리 매핑으로 읽습니다.
+        df = combined_dataset.load_combined(file_path)
+        return df if df is not None else pd.DataFrame()
 
     try:
-        df = pd.read_csv(file_path)
-        
-        # 내부 스키마에 맞게 컬럼명 매핑 (lat, lon, sub_category)
-        df_slim = pd.DataFrame()
-        df_slim['name'] = df['name']
-        df_slim['lat'] = df['latitude']
-        df_slim['lon'] = df['longitude']
-        df_slim['sub_category'] = df['category_small']
-        
-        # 유효성 검사 및 정제
-        df_slim = df_slim.dropna(subset=['lat', 'lon'])
+        # 필요한 4개 열만 자료형을 지정해 읽고 내부 스키마(name, lat, lon, sub_category)로 바꿉니다.
+        df_slim = dataset_manifest.read_dataset(file_path, dataset_manifest.COMBINED_DATASET)
+
+        # 유효성 검사 및 정제: 행 단위로 위경도 뒤바뀜을 교정하고 좌표 없음/서울 범위 밖 행은 제거
+        df_slim = facility_store.clean_coordinates(df_slim)
         
-        return df_slim
+        # 카테고리 그룹/이모지는 로드 시 한 번만 분류해 정수/범주형 열로 저장
+        df_slim = seulsekwon_engine.attach_category_codes(df_slim, CATEGORY_GROUPS, EMOJI_MAP, ignore_case=True)
+        # 같은 그룹의 같은 이름 시설이 5m 안에 겹친 경우 로드 시 한 번만 제거
+        df_slim = seulsekwon_engine.drop_nearby_duplicates(df_slim)
+        # 이름/카테고리는 범주형, 좌표는 float32 로 줄여 메모리를 절약
+        return facility_store.compact_frame(df_slim, category_cols=['name', 'sub_category'])
     except Exception as e:
         st.error(f"데이터 파일을 읽는 중 오류 발생: {e}")
         return pd.DataFrame()
 
-def calculate_seulsekwon_index(center_lat, center_lon, data, weights, radius_m):
+@st.cache_resource
+def load_infrastructure_dataset():
+    """인프라 데이터/격자 공간 인덱스/데이터 버전을 한 번만 만들어 모든 세션이 같은 읽기 전용 객체를 공유합니다."""
+    return dataset_service.FacilityDataset(load_infrastructure_data(), infrastructure_version())
+
+@st.cache_resource
+def load_score_grid(radius_m):
+    """서울 전역 사전 계산 격자(scripts/build_score_grid.py)를 반경별로 한 번만 읽습니다. 없으면 None."""
+    return score_grid.load_score_grid(facility_store.default_data_dir(), radius_m, CATEGORY_GROUPS, EMOJI_MAP)
+
+def infrastructure_version():
+    """분석 캐시 키에 쓰는 인프라 데이터 버전 (통합 데이터의 버전 해시, 기존 CSV는 파일 크기/수정 시각 + 분류 기준)"""
+    file_path = infrastructure_data_path()
+    built_version = combined_dataset.read_combined_version(file_path)
+    if built_version:
+        return built_version
+    stat = os.stat(file_path) if os.path.exists(file_path) else None
+    signature = f"{stat.st_size}-{stat.st_mtime_ns}" if stat else "missing"
+    return f"{signature}-{facility_store.scheme_key(CATEGORY_GROUPS, EMOJI_MAP, True)[:8]}"
+
+def analyze_location(center_lat, center_lon, radii, dataset):
+    """
+    위치 단계(반경 필터링, 그룹 분류)를 (좌표, 반경, 데이터 버전) 키로 프로세스 공용 캐시에 보관합니다.
+    가장 큰 반경으로 한 번만 조회해 모든 반경 선택지의 결과를 함께 만들어 두므로,
+    같은 위치를 검색한 다른 사용자나 가중치/반경만 바뀐 재실행에서는 시설 테이블을 다시 조회하지 않습니다.
+    """
+    lat, lon, radii, version = analysis_cache.location_key(center_lat, center_lon, radii, dataset.version)
+    return analysis_cache.get_analysis_cache().get_or_compute(
+        (lat, lon, radii, version),
+        lambda: seulsekwon_engine.analyze_location_radii(
+            lat, lon, dataset.data, radii, index=dataset.index,
+            category_groups=CATEGORY_GROUPS, emoji_map=EMOJI_MAP, ignore_case=True
+        )
+    )
+
+def calculate_seulsekwon_index(center_lat, center_lon, dataset, weights, radius_m):
     """슬세권 지수를 계산하고 주변 시설을 반환합니다."""
-    if data.empty:
+    if dataset.empty:
         return 0.0, {}, {}, [], {}
 
-    radius_km = radius_m / 1000.0
-    # 카테고리별 정상 기여 최대치 (도심 기준)
-    MAX_CAPS = {
-        "생활/편의🏪": 15, "교통🚌": 8, "의료💊": 5, 
-        "안전/치안🚨": 1, "교육/문화📚": 2, "자연/여가🌳": 2, "금융🏦": 3
-    }
-    
-    # 1차 공간 필터링 (사각형 범위)
-    lat_margin, lon_margin = radius_km / 111.0, radius_km / 88.0
-    mask = (data['lat'].between(center_lat - lat_margin, center_lat + lat_margin)) & \
-           (data['lon'].between(center_lon - lon_margin, center_lon + lon_margin))
-    candidates = data[mask].copy()
-
-    scores, counts, nearby, raw_progress = {}, {}, [], {}
-    
-    for g_name, sub_cats in CATEGORY_GROUPS.items():
-        # 서브 카테고리 매칭 (부분 일치)
-        pattern = '|'.join([re.escape(str(sc).lower()) for sc in sub_cats])
-        g_data = candidates[candidates['sub_category'].str.lower().str.contains(pattern, na=False)]
-        
-        group_facilities = []
-        for _, row in g_data.iterrows():
-            dist = geodesic((center_lat, center_lon), (row['lat'], row['lon'])).meters
-            if dist <= radius_m:
-                d = row.to_dict()
-                d['distance'] = dist
-                d['group'] = g_name
-                d['emoji'] = next((emoji for key, emoji in EMOJI_MAP.items() if key in str(row['sub_category'])), "📍")
-                group_facilities.append(d)
-        
-        # 그룹 내 거리 기반 중복 제거 (같은 이름 && 거리차 < 5m)
-        group_facilities = sorted(group_facilities, key=lambda x: x['distance'])
-        unique_group_facilities = []
-        seen_names = set()
-        for item in group_facilities:
-            is_dup = False
-            for u_item in unique_group_facilities:
-                if item['name'] == u_item['name'] and abs(item['distance'] - u_item['distance']) < 5:
-                    is_dup = True
-                    break
-            if not is_dup:
-                unique_group_facilities.append(item)
-        
-        counts[g_name] = len(unique_group_facilities)
-        nearby.extend(unique_group_facilities)
-        
-        cap = MAX_CAPS.get(g_name, 5)
-        progress = min(counts[g_name], cap) / cap
-        raw_progress[g_name] = progress
-        scores[g_name] = round(progress * weights.get(g_name, 0), 2)
-    
-    nearby = sorted(nearby, key=lambda x: x['distance'])
-    total_score = round(sum(scores.values()), 1)
-    
+    # 위치 단계(캐시) + 가중치 단계(기준치/가중치 적용)
+    radii = tuple(RADIUS_OPTIONS) if radius_m in RADIUS_OPTIONS else (radius_m,)
+    counts, nearby = analyze_location(center_lat, center_lon, radii, dataset)[radius_m]
+    total_score, scores, raw_progress = seulsekwon_engine.score_counts(counts, weights, MAX_CAPS)
     return total_score, scores, counts, nearby, raw_progress
 
 # ==========================================
 # 4. Visualizations
 # ==========================================
 
-def create_viz_objects(total_score, scores, counts, facilities, raw_progress):
+def create_viz_objects(total_score, scores, counts, facilities, raw_progress, seoul_avg=None):
     """보고서 및 대시보드용 시각화 객체를 생성합니다."""
     layout_base = dict(
         paper_bgcolor='rgba(0,0,0,0)', 
@@ -605,8 +581,9 @@ def create_viz_objects(total_score, scores, counts, facilities, raw_progress):
     
     # 인프라 구성 비율 비교를 위한 데이터 준비
     # 1. 서울 도심 평균 데이터 (비교용 기준 데이터)
-    SEOUL_AVG = {"생활/편의🏪": 20, "교통🚌": 15, "의료💊": 12, "안전/치안🚨": 8, "교육/문화📚": 5, "자연/여가🌳": 12, "금융🏦": 5}
-    s_total = sum(SEOUL_AVG.values())
+    # 사전 계산 격자의 그룹별 평균 점수를 사용하고, 격자가 없으면 예시값으로 표시합니다.
+    SEOUL_AVG = seoul_avg or {"생활/편의🏪": 20, "교통🚌": 15, "의료💊": 12, "안전/치안🚨": 8, "교육/문화📚": 5, "자연/여가🌳": 12, "금융🏦": 5}
+    s_total = sum(SEOUL_AVG.values()) or 1
     s_perc = {k: (v/s_total)*100 for k, v in SEOUL_AVG.items()} # 서울 평균의 카테고리별 비중(%)
     
     # 2. 현재 분석 지점의 데이터 비중 계산
@@ -641,24 +618,13 @@ def create_viz_objects(total_score, scores, counts, facilities, raw_progress):
     return {'radar': fig_radar, 'gauge': fig_gauge, 'compare': fig_compare}
 
 def create_folium_map(lat, lon, facilities, radius_m):
-    """주변 시설 포함 지도를 생성합니다."""
+    """주변 시설 포함 지도를 생성합니다. 반경 내 시설 전체를 확대 수준에 따라 묶어 표시합니다."""
     m = folium.Map(location=[lat, lon], zoom_start=16, tiles="cartodbpositron")
     folium.Circle([lat, lon], radius=radius_m, color=THEME['primary'], fill=True, fill_opacity=0.05).add_to(m)
     folium.Marker([lat, lon], icon=folium.Icon(color='red', icon='home', prefix='fa'), tooltip="내 중심지").add_to(m)
-    
-    for f in facilities[:300]: # 성능 최적화를 위해 300개 제한
-        html = f"""
-        <div style="font-size: 14px; background: white; border-radius: 50%; width: 24px; height: 24px; 
-        display: flex; align-items: center; justify-content: center; box-shadow: 0 2px 4px rgba(0,0,0,0.1); 
-        border: 2px solid {THEME['accent']};">
-            {f['emoji']}
-        </div>
-        """
-        folium.Marker(
-            [f['lat'], f['lon']], 
-            icon=folium.DivIcon(html=html),
-            popup=f"<b>{f['name']}</b><br>{f['distance']:.0f}m ({f['sub_category']})"
-        ).add_to(m)
+
+    # 시설 마커는 행 배열로 넘겨 브라우저에서 만들고 클러스터로 묶습니다. (개수 제한 없음)
+    map_layers.add_facility_markers(m, facilities, THEME['accent'], size=24, font_size=14, include_category=True)
     return m
 
 # --- 신규 추가: AI 분석 및 부동산 데이터 관련 함수 ---
@@ -698,59 +664,138 @@ def get_ai_analysis_report(t_score, counts, weights):
 
     return report
 
-@st.cache_data
+def real_estate_data_path():
+    """서울 부동산 실거래가 통합 데이터 파일 경로를 반환합니다."""
+    return real_estate_store.default_source_path()
+
+@st.cache_resource
 def load_real_estate_data():
-    """서울 부동산 실거래가 통합 데이터를 데이터프레임으로 로드합니다."""
-    # 데이터 파일 경로 설정
-    file_path = "share/data/seoul_real_estate_combined_2023_2026_geo.csv"
-    if not os.path.exists(file_path):
-        # 파일이 없을 경우 상대 경로 재시도
-        file_path = os.path.join(os.path.dirname(__file__), "..", "data", "seoul_real_estate_combined_2023_2026_geo.csv")
-    
-    if not os.path.exists(file_path):
+    """
+    서울 부동산 실거래가 통합 데이터를 한 번만 로드하여 모든 세션이 읽기 전용으로 공유합니다.
+    scripts/build_real_estate_store.py 로 만든 Parquet 저장소가 최신이면 자료형이 지정된 거래 테이블을 바로 읽고,
+    없으면 원본 CSV를 읽습니다. 반경 필터링용 격자 공간 인덱스와 데이터 버전을 함께 만들어 둡니다.
+    """
+    file_path = real_estate_data_path()
+    store_dir = real_estate_store.default_store_dir()
+    use_store = real_estate_store.is_store_fresh(store_dir, file_path)
+    if not use_store and not os.path.exists(file_path):
         st.error("부동산 데이터 파일을 찾을 수 없습니다.")
-        return pd.DataFrame()
+        return dataset_service.FacilityDataset(pd.DataFrame(), "missing")
 
     try:
-        # 필요한 열만 선택하여 로드
-        df = pd.read_csv(file_path, usecols=['RCPT_YR', 'CGG_NM', 'STDG_NM', 'BLDG_NM', 'THING_AMT', 'ARCH_AREA', 'latitude', 'longitude'])
-        # 필수 정보가 없는 행은 제거
-        df = df.dropna(subset=['latitude', 'longitude', 'THING_AMT', 'BLDG_NM'])
-        # 만 원 단위 금액을 '억' 단위로 변환하여 새 열 생성
-        df['price_억'] = df['THING_AMT'] / 10000.0
-        return df
+        if use_store:
+            df = real_estate_store.load_transactions(store_dir)
+            version = real_estate_store.read_meta(store_dir)["version"]
+        else:
+            # 필요한 열만 선택하여 로드하고 가격(억) 열 추가, 압축 스키마로 변환
+            df = real_estate_store.read_source(file_path)
+            version = real_estate_store.store_version(real_estate_store.source_signature(file_path),
+                                                      real_estate_store.DEFAULT_AGG_CELL_M)
+        return dataset_service.FacilityDataset(
+            df, version, lat_col='latitude', lon_col='longitude', cell_m=REAL_ESTATE_CELL_M
+        )
     except Exception as e:
         st.error(f"데이터 로드 중 오류: {e}")
-        return pd.DataFrame()
+        return dataset_service.FacilityDataset(pd.DataFrame(), "error")
+
+@st.cache_resource
+def load_real_estate_aggregates():
+    """
+    실거래가 저장소의 가격 집계(법정동/연도별, 셀별)를 한 번만 읽습니다. 저장소가 없거나 오래되었으면 None.
+    경계 셀 거래 행은 세션 공용 실거래 테이블(load_real_estate_data)을 그대로 사용합니다.
+    """
+    store_dir = real_estate_store.default_store_dir()
+    if not real_estate_store.is_store_fresh(store_dir, real_estate_data_path()):
+        return None
+    dataset = load_real_estate_data()
+    if dataset.version != real_estate_store.read_meta(store_dir)["version"]:
+        return None
+    return real_estate_store.load_aggregates(store_dir, dataset.data)
+
+def real_estate_summary(center_lat, center_lon, rows, radius_km):
+    """
+    반경 시장 요약(건수/평균/중앙값/최고가 거래)을 계산합니다.
+    가격 집계가 있으면 반경 안쪽 셀은 집계를, 경계 셀은 그 셀의 거래 행만 사용하고,
+    없으면 반경 안 거래 행(rows)에서 직접 계산합니다.
+    """
+    aggregates = load_real_estate_aggregates()
+    if aggregates is None:
+        return real_estate_store.summarize_rows(rows)
+    return real_estate_store.radius_summary(aggregates, center_lat, center_lon, radius_km * 1000.0)
+
+def dong_price_trend(address, center_lat, center_lon):
+    """
+    위치의 법정동 연도별 가격 집계를 (자치구, 법정동, 연도별 집계) 로 반환합니다.
+    주소에서 자치구/법정동을 찾고, 없으면 중심 셀의 대표 법정동을 사용합니다. 집계가 없으면 None.
+    """
+    aggregates = load_real_estate_aggregates()
+    if aggregates is None:
+        return None
+    candidates = []
+    match = re.search(r'([가-힣]+구)\s+([가-힣0-9]+(?:동|가|리))(?:\s|$)', address or "")
+    if match:
+        candidates.append(match.groups())
+    located = aggregates.dong_at(center_lat, center_lon)
+    if located is not None:
+        candidates.append(located)
+    for district, dong in candidates:
+        rows = aggregates.dong_year_summary(district, dong)
+        if not rows.empty:
+            return district, dong, rows
+    return None
 
-def filter_data_within_radius(center_lat, center_lon, data, radius_km):
-    """위도/경도 기반으로 지정된 반경 내의 부동산 데이터를 필터링합니다."""
-    if data.empty: return pd.DataFrame()
-    
-    # 사각형 범위로 1차 필터링 (계산 속도 향상)
-    lat_margin = radius_km / 111.0
-    lon_margin = radius_km / (111.0 * 0.8)
-    
-    mask = (data['latitude'].between(center_lat - lat_margin, center_lat + lat_margin)) & \
-           (data['longitude'].between(center_lon - lon_margin, center_lon + lon_margin))
-    candidates = data[mask].copy()
-    
-    if candidates.empty: return pd.DataFrame()
-    
-    # 각 점과의 정확한 거리(미터) 계산 후 반경 내 데이터만 반환
-    candidates['distance'] = candidates.apply(
-        lambda row: geodesic((center_lat, center_lon), (row['latitude'], row['longitude'])).meters, axis=1
+def filter_data_within_radius(center_lat, center_lon, dataset, radius_km):
+    """
+    반경 내의 부동산 거래를 거리(distance, m) 열과 함께 반환합니다.
+    격자 인덱스로 후보 셀만 고른 뒤 타원체 보정 거리(geodesic 과 mm 단위로 일치)를 배열로 한 번에 계산하고,
+    결과는 (좌표, 반경, 데이터 버전) 키로 프로세스 공용 캐시에 보관합니다. (반환값은 수정하지 않아야 합니다)
+    """
+    if dataset.empty: return pd.DataFrame()
+
+    lat, lon, radius_m, version = analysis_cache.location_key(center_lat, center_lon, radius_km * 1000.0, dataset.version)
+    return analysis_cache.get_analysis_cache().get_or_compute(
+        ('real_estate', lat, lon, radius_m, version),
+        lambda: seulsekwon_engine.within_radius(
+            lat, lon, dataset.data, radius_m, exact=True,
+            lat_col=dataset.lat_col, lon_col=dataset.lon_col, index=dataset.index
+        )
     )
-    return candidates[candidates['distance'] <= (radius_km * 1000)].copy()
 
-def get_ai_real_estate_report(re_data):
-    """부동산 거래 데이터를 분석하여 시장 특성 리포트를 생성합니다."""
-    if re_data.empty:
+@st.cache_resource
+def load_price_score_table(real_estate_version, infra_version):
+    """
+    건물별 가격 x 슬세권 시설 수 결합 분석 결과(scripts/build_price_scores.py)를 한 번만 읽습니다.
+    실거래/인프라 데이터 버전이 다르거나 결과가 없으면 None.
+    """
+    return price_score.load_price_scores(price_score.default_output_dir(), real_estate_version, infra_version,
+                                         CATEGORY_GROUPS)
+
+def get_price_score_report(t_score, summary, table, weights, radius_m, center_lat, center_lon):
+    """슬세권 점수 대비 가격 리포트 문장을 생성합니다. 결합 분석 결과가 없으면 빈 문자열."""
+    fit = table.fit(weights, radius_m, MAX_CAPS) if table is not None and summary else None
+    if fit is None:
+        return ""
+
+    expected = float(fit.expected_price(t_score))
+    premium = summary['median'] / expected - 1
+    direction = "높습니다" if premium >= 0 else "낮습니다"
+    report = f"<br>슬세권 점수 {t_score:.1f}점에서 기대되는 중위 거래가는 **{expected:.1f}억**으로, "
+    report += f"이 지역 중간 거래가는 기대보다 **{abs(premium):.0%} {direction}**."
+
+    position = table.find(summary['max_bldg'], center_lat, center_lon, max_distance_m=3000)
+    top = table.building_premium(position, weights, radius_m, MAX_CAPS) if position is not None else None
+    if top is not None:
+        report += f"<br>최고가 단지 **{top['name']}**은 점수({top['score']:.1f}점) 대비 가격이 기대보다 "
+        report += f"**{top['premium']:+.0%}** (서울 건물 중 상위 {max(100 - top['percentile'], 1):.0f}%)입니다."
+    return report
+
+def get_ai_real_estate_report(summary, dong_trend=None):
+    """반경 시장 요약(real_estate_summary)과 법정동 연도별 집계(dong_price_trend)로 시장 특성 리포트를 생성합니다."""
+    if not summary:
         return "현재 반경 내에 최근 실거래 데이터가 충분하지 않습니다."
 
-    avg_price = re_data['price_억'].mean()
-    vol = len(re_data)
-    max_row = re_data.loc[re_data['price_억'].idxmax()]
+    avg_price = summary['mean']
+    vol = summary['count']
     
     # 평균 가격에 따른 시장 성격 분류
     if avg_price >= 15: market_type = "상급지의 **고급 주거 시장**"
@@ -759,7 +804,19 @@ def get_ai_real_estate_report(re_data):
         
     report = f"이 지역은 평균 거래가 **{avg_price:.1f}억**으로 형성된 {market_type}입니다.<br>"
     report += f"최근 해당 반경 내 총 **{vol:,}건**의 거래가 확인되었습니다.<br>"
-    report += f"최고가 거래 단지는 **{max_row['BLDG_NM']}**({max_row['price_억']:.1f}억)입니다."
+    p25, p75 = summary['percentiles'][25], summary['percentiles'][75]
+    report += f"거래가의 중간 50%는 **{p25:.1f}억 ~ {p75:.1f}억** 사이입니다.<br>"
+    report += f"최고가 거래 단지는 **{summary['max_bldg']}**({summary['max']:.1f}억)입니다."
+    if dong_trend is not None:
+        district, dong, rows = dong_trend
+        first, last = rows.iloc[0], rows.iloc[-1]
+        report += f"<br>{district} {dong}의 중간 거래가는 "
+        if len(rows) > 1:
+            change = last['median'] / first['median'] - 1
+            report += f"{first['RCPT_YR']}년 {first['median']:.1f}억에서 "
+            report += f"**{last['RCPT_YR']}년 {last['median']:.1f}억**으로 **{change:+.0%}** 변했습니다."
+        else:
+            report += f"**{last['RCPT_YR']}년 {last['median']:.1f}억**입니다."
     return report
 
 def create_price_map(lat, lon, re_data, radius_km):
@@ -957,7 +1014,7 @@ def render_dashboard_page():
                 query = st.text_input("📍 위치 변경", value=st.session_state.config['address']) # 주소 입력창
             with c2:
                 # 분석 반경 선택 슬라이더
-                radius = st.select_slider("📏 반경 (m)", options=[300, 500, 700, 1000, 1500], value=st.session_state.config['radius'])
+                radius = st.select_slider("📏 반경 (m)", options=RADIUS_OPTIONS, value=st.session_state.config['radius'])
             with c3:
                 st.markdown('<div style="height: 28px;"></div>', unsafe_allow_html=True) # 줄맞춤을 위한 공백
                 btn_submit = st.form_submit_button("다시 분석하기", use_container_width=True) # 전송 버튼
@@ -978,11 +1035,13 @@ def render_dashboard_page():
     t_score, scores, counts, facilities, raw_progress = calculate_seulsekwon_index(
         st.session_state.config['coords'][0], 
         st.session_state.config['coords'][1], 
-        st.session_state.data, 
+        load_infrastructure_dataset(), 
         st.session_state.config['weights'], 
         st.session_state.config['radius']
     )
-    viz = create_viz_objects(t_score, scores, counts, facilities, raw_progress)
+    grid = load_score_grid(st.session_state.config['radius'])
+    seoul_avg = grid.average_scores(st.session_state.config['weights'], MAX_CAPS) if grid is not None else None
+    viz = create_viz_objects(t_score, scores, counts, facilities, raw_progress, seoul_avg)
 
     # 5. Layout - Sidebar
     with st.sidebar:
@@ -1013,6 +1072,9 @@ def render_dashboard_page():
                            file_name=f"analysis_{datetime.datetime.now().strftime('%Y%m%d')}.csv", use_container_width=True)
         
         st.markdown("---")
+        cache_stats = analysis_cache.get_analysis_cache().stats()
+        st.caption(f"⚡ 분석 캐시: 적중 {cache_stats['hits']:,} / 미스 {cache_stats['misses']:,} · "
+                   f"{cache_stats['entries']}건 ({cache_stats['bytes'] / 1024 / 1024:.1f}MB)")
         st.caption(f"Engine v2.5 | {datetime.datetime.now().strftime('%Y-%m-%d')}")
 
     # ✨ 탭 시스템 추가 (검색창 및 설정 아래)
@@ -1058,6 +1120,13 @@ def render_dashboard_page():
         with col_r:
             # 종합 점수에 따른 등급 산정
             grade_char = "s" if t_score >= 90 else ("a" if t_score >= 75 else ("b" if t_score >= 60 else ("c" if t_score >= 40 else "d")))
+
+            # 서울 전역 격자가 있으면 서울 내 위치(상위 %)와 서울 평균을 함께 표시
+            summary_text = "주변 인프라 밀도 분석 결과입니다."
+            if grid is not None:
+                weights = st.session_state.config['weights']
+                pct = grid.percentile(t_score, weights, MAX_CAPS)
+                summary_text = f"서울 상위 {max(100 - pct, 1):.0f}% · 서울 평균 {grid.average_total(weights, MAX_CAPS)}점"
             
             # 3. 이미지 기반 커스텀 종합 점수 카드 구현
             # HTML 문자열 내부의 들여쓰기를 제거하여 텍스트로 노출되는 오류를 방지합니다.
@@ -1078,7 +1147,7 @@ def render_dashboard_page():
             <div style="background: linear-gradient(90deg, #5b86e5, #3628e2); width: {t_score}%; height: 100%; border-radius: 20px;"></div>
         </div>
     </div>
-    <p style="color: #64748b; margin-top: 20px; font-size: 0.95rem; font-weight: 500;">주변 인프라 밀도 분석 결과입니다.</p>
+    <p style="color: #64748b; margin-top: 20px; font-size: 0.95rem; font-weight: 500;">{summary_text}</p>
 </div>
 """, unsafe_allow_html=True)
 
@@ -1115,23 +1184,37 @@ def render_dashboard_page():
         # 이미지 기반의 고도화된 레이아웃을 적용합니다.
         st.markdown("### 🏠 반경 3km 내 실거래가 분포 분석")
         
-        # 세션 상태에 부동산 데이터가 없을 경우를 대비한 방어 코드
-        if 're_data' not in st.session_state or st.session_state.re_data.empty:
-            with st.spinner("부동산 데이터를 불러오고 있습니다..."):
-                st.session_state.re_data = load_real_estate_data()
+        # 부동산 데이터/공간 인덱스는 모든 세션이 공유하는 읽기 전용 객체입니다. (첫 호출에서만 로드)
+        with st.spinner("부동산 데이터를 불러오고 있습니다..."):
+            re_dataset = load_real_estate_data()
 
         with st.spinner("주변 실거래 데이터 분석 중..."):
             recent_re = filter_data_within_radius(
                 st.session_state.config['coords'][0], 
                 st.session_state.config['coords'][1], 
-                st.session_state.re_data, 
+                re_dataset, 
                 3.0 # 3km radius
             )
             
         if not recent_re.empty:
+            # 반경 시장 요약: 리포트와 요약 카드가 거래 행 대신 가격 집계를 사용합니다.
+            re_summary = real_estate_summary(
+                st.session_state.config['coords'][0], st.session_state.config['coords'][1], recent_re, 3.0
+            )
+
             # 🤖 AI 실거래 시장 분석 리포트
             st.markdown(f'### 🤖 AI 실거래 시장 분석')
-            re_ai_report = get_ai_real_estate_report(recent_re)
+            # 위치의 법정동 연도별 가격 추이는 저장소의 법정동/연도별 집계에서 바로 찾습니다.
+            re_dong_trend = dong_price_trend(
+                st.session_state.config['address'], st.session_state.config['coords'][0], st.session_state.config['coords'][1]
+            )
+            re_ai_report = get_ai_real_estate_report(re_summary, re_dong_trend)
+            # 건물별 가격 x 점수 회귀가 있으면 현재 점수 대비 이 지역/최고가 단지의 가격 위치를 덧붙입니다.
+            price_table = load_price_score_table(re_dataset.version, infrastructure_version())
+            re_ai_report += get_price_score_report(
+                t_score, re_summary, price_table, st.session_state.config['weights'], st.session_state.config['radius'],
+                st.session_state.config['coords'][0], st.session_state.config['coords'][1]
+            )
             st.markdown(f"""
             <div class="dashboard-card" style="border-left: 5px solid {THEME['primary']}; display: flex; align-items: flex-start; gap: 15px;">
                 <div style="font-size: 1.5rem; margin-top: 5px;">📊</div>
@@ -1173,15 +1256,24 @@ def render_dashboard_page():
                 </div>
                 ''', unsafe_allow_html=True)
 
-                # 통계 수치 계산
-                avg_price = recent_re['price_억'].mean()
-                median_price = recent_re['price_억'].median()
+                # 통계 수치 (반경 시장 요약)
+                avg_price = re_summary['mean']
+                median_price = re_summary['median']
                 
-                # 최고가 거래 정보 추출
-                max_row = recent_re.loc[recent_re['price_억'].idxmax()]
-                max_price = max_row['price_억']
-                max_bldg = max_row['BLDG_NM']
-                max_area = max_row['ARCH_AREA']
+                # 최고가 거래 정보
+                max_price = re_summary['max']
+                max_bldg = re_summary['max_bldg']
+                max_area = re_summary['max_area']
+
+                # 법정동 최근 연도 중간 거래가 (법정동/연도별 집계)
+                dong_row = ""
+                if re_dong_trend is not None:
+                    dong_latest = re_dong_trend[2].iloc[-1]
+                    dong_row = f"""
+                        <div style="display: flex; justify-content: space-between;">
+                            <span style="color: #64748b;">{re_dong_trend[1]} 중간 거래가 ({dong_latest['RCPT_YR']}년)</span>
+                            <span style="font-weight: 700;">{dong_latest['median']:.1f}억</span>
+                        </div>"""
                 
                 # 시장 요약 지표 카드
                 st.markdown(f"""
@@ -1194,7 +1286,7 @@ def render_dashboard_page():
                         <div style="display: flex; justify-content: space-between;">
                             <span style="color: #64748b;">중간 거래가</span>
                             <span style="font-weight: 700;">{median_price:.1f}억</span>
-                        </div>
+                        </div>{dong_row}
                         <div style="display: flex; justify-content: space-between; align-items: flex-start;">
                             <span style="color: #64748b;">최고 거래가</span>
                             <div style="text-align: right;">
@@ -1204,7 +1296,7 @@ def render_dashboard_page():
                         </div>
                         <div style="display: flex; justify-content: space-between;">
                             <span style="color: #64748b;">분석 거래 건수</span>
-                            <span style="font-weight: 700;">{len(recent_re):,}건</span>
+                            <span style="font-weight: 700;">{re_summary['count']:,}건</span>
                         </div>
                     </div>
                 </div>
@@ -1240,20 +1332,19 @@ def main():
     inject_custom_css()
     
     # 1. 앱 실행을 위한 데이터 초기화 및 로드
-    # 인프라 데이터 및 부동산 데이터가 세션 상태에 없을 경우 로드합니다.
-    if 'data' not in st.session_state or 're_data' not in st.session_state:
+    # 데이터는 st.cache_resource 로 모든 세션이 공유하므로 세션 상태에는 로드 여부만 기록합니다.
+    if 'data_ready' not in st.session_state:
         with st.status("🚀 분석 엔진 및 부동산 데이터 준비 중...", expanded=True) as status:
             # 인프라 데이터 로드 (서울 생활권 기반)
-            if 'data' not in st.session_state:
-                st.session_state.data = load_infrastructure_data()
+            dataset = load_infrastructure_dataset()
             
             # 실거래가 부동산 데이터 로드 (서울 아파트/건물 기반)
-            if 're_data' not in st.session_state:
-                st.session_state.re_data = load_real_estate_data()
+            load_real_estate_data()
             
             # 로드 성공 여부 확인 및 알림 업데이트
-            if not st.session_state.data.empty:
-                status.update(label=f"준비 완료 (인프라 {len(st.session_state.data):,}건 로드)", state="complete")
+            if not dataset.empty:
+                st.session_state.data_ready = True
+                status.update(label=f"준비 완료 (인프라 {len(dataset):,}건 로드)", state="complete")
             else:
                 st.error("기본 데이터 로드에 실패했습니다. 파일을 확인해주세요.")
                 st.stop()
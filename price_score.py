@@ -0,0 +1,257 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import batch_scoring
+import real_estate_store
+import seulsekwon_engine
+import spatial_index
+
+# ==========================================
+# 실거래가 x 슬세권 점수 결합 분석
+# 실거래 테이블의 건물(건물명 + 좌표)마다 한 번만 반경별 그룹 시설 수를 계산해 가격(중위 거래가) 옆에 저장하고,
+# 대시보드는 가중치/반경별 점수 -> log(가격) 회귀로 "점수 대비 기대 가격"과 가격 위치(백분위)를 바로 조회합니다.
+# 시설 수만 저장하므로 가중치와 기준치(max_caps)는 조회 시점에 적용됩니다. (score_grid 와 같은 방식)
+# ==========================================
+
+PRICE_SCORE_FORMAT_VERSION = 1
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BUILDINGS_FILE = "buildings.parquet"
+META_FILE = "meta.json"
+
+# 같은 건물로 보는 좌표 자릿수 (소수 5자리, 약 1m)
+COORD_DECIMALS = 5
+# 회귀에 필요한 최소 건물 수
+MIN_FIT_BUILDINGS = 30
+
+
+def default_output_dir():
+    """결합 분석 결과 기본 경로(data/price_score)를 반환합니다."""
+    return os.path.join(PROJECT_DIR, "data", "price_score")
+
+
+def count_column(group, radius_m):
+    return f"count_{group}_{radius_m:g}m"
+
+
+def distinct_buildings(transactions, decimals=COORD_DECIMALS):
+    """
+    거래 테이블을 건물(건물명 + 반올림 좌표) 단위로 묶습니다.
+    반환값: BLDG_NM, CGG_NM, STDG_NM, latitude, longitude, count, price(중위 거래가, 억), area(중위 면적)
+    """
+    df = pd.DataFrame({
+        'BLDG_NM': transactions['BLDG_NM'].astype(str),
+        'lat_key': transactions['latitude'].astype(np.float64).round(decimals),
+        'lon_key': transactions['longitude'].astype(np.float64).round(decimals),
+        'CGG_NM': transactions['CGG_NM'].astype(str),
+        'STDG_NM': transactions['STDG_NM'].astype(str),
+        'price': transactions[real_estate_store.PRICE_COL].astype(np.float64),
+        'area': transactions['ARCH_AREA'].astype(np.float64),
+    })
+    grouped = df.groupby(['BLDG_NM', 'lat_key', 'lon_key'], sort=True)
+    buildings = grouped.agg(CGG_NM=('CGG_NM', 'first'), STDG_NM=('STDG_NM', 'first'), count=('price', 'size'),
+                            price=('price', 'median'), area=('area', 'median')).reset_index()
+    buildings = buildings.rename(columns={'lat_key': 'latitude', 'lon_key': 'longitude'})
+    buildings['count'] = buildings['count'].astype(np.int32)
+    return buildings[['BLDG_NM', 'CGG_NM', 'STDG_NM', 'latitude', 'longitude', 'count', 'price', 'area']]
+
+
+def score_buildings(buildings, facilities, radii, index=None, category_groups=seulsekwon_engine.CATEGORY_GROUPS,
+                    emoji_map=seulsekwon_engine.EMOJI_MAP, ignore_case=True, progress=None, workers=None):
+    """
+    건물별 반경별 그룹 시설 수 열(count_{그룹}_{반경}m, uint16)을 반환합니다.
+    scripts/bulk_score.py 와 같은 프로세스 풀 일괄 계산(batch_scoring)을 사용합니다.
+    """
+    group_names = list(category_groups.keys())
+    if index is None:
+        index = spatial_index.GridIndex.from_frame(facilities)
+    counts = batch_scoring.count_points(
+        buildings['latitude'].to_numpy(dtype=np.float64), buildings['longitude'].to_numpy(dtype=np.float64),
+        facilities, radii, index, category_groups, emoji_map, ignore_case, workers=workers, progress=progress
+    )
+    counts = np.minimum(counts, np.iinfo(np.uint16).max).astype(np.uint16)
+
+    return pd.DataFrame({count_column(g, r): counts[:, j, k]
+                         for j, r in enumerate(radii) for k, g in enumerate(group_names)})
+
+
+def build_price_scores(transactions, real_estate_version, facilities, infrastructure_version, output_dir=None,
+                       radii=seulsekwon_engine.RADIUS_OPTIONS, index=None,
+                       category_groups=seulsekwon_engine.CATEGORY_GROUPS, emoji_map=seulsekwon_engine.EMOJI_MAP,
+                       progress=None, workers=None):
+    """
+    건물별 가격과 반경별 그룹 시설 수를 계산해 저장합니다. 두 입력 데이터의 버전을 함께 기록합니다.
+    반환값: 메타데이터(dict)
+    """
+    output_dir = output_dir or default_output_dir()
+    radii = sorted(set(radii))
+    buildings = distinct_buildings(transactions)
+    counts = score_buildings(buildings, facilities, radii, index, category_groups, emoji_map,
+                             progress=progress, workers=workers)
+    table = pd.concat([buildings, counts], axis=1)
+
+    tmp_dir = output_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    table.to_parquet(os.path.join(tmp_dir, BUILDINGS_FILE), index=False)
+    meta = {
+        "format": PRICE_SCORE_FORMAT_VERSION, "buildings": len(buildings), "transactions": len(transactions),
+        "radii": radii, "groups": list(category_groups.keys()),
+        "real_estate_version": real_estate_version, "infrastructure_version": infrastructure_version,
+    }
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return meta
+
+
+def read_meta(output_dir=None):
+    """결합 분석 메타데이터를 읽습니다. 없거나 읽을 수 없으면 None."""
+    try:
+        with open(os.path.join(output_dir or default_output_dir(), META_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_price_scores(output_dir=None, real_estate_version=None, infrastructure_version=None,
+                      category_groups=seulsekwon_engine.CATEGORY_GROUPS):
+    """
+    현재 실거래/인프라 데이터 버전과 일치하는 결합 분석 결과를 읽습니다. 없거나 오래되었으면 None.
+    버전을 None 으로 주면 해당 버전은 확인하지 않습니다.
+    """
+    output_dir = output_dir or default_output_dir()
+    meta = read_meta(output_dir)
+    if not meta or meta.get("format") != PRICE_SCORE_FORMAT_VERSION or \
+            meta.get("groups") != list(category_groups.keys()):
+        return None
+    if real_estate_version is not None and meta.get("real_estate_version") != real_estate_version:
+        return None
+    if infrastructure_version is not None and meta.get("infrastructure_version") != infrastructure_version:
+        return None
+    return PriceScoreTable(pd.read_parquet(os.path.join(output_dir, BUILDINGS_FILE)), meta)
+
+
+class PriceScoreFit:
+    """
+    log(가격) = intercept + slope * 점수 회귀 결과입니다.
+    잔차(log 가격 - 기대 log 가격)를 정렬해 두어 "점수 대비 가격" 백분위를 바로 조회합니다.
+    """
+
+    def __init__(self, intercept, slope, r, residuals):
+        self.intercept = float(intercept)
+        self.slope = float(slope)
+        self.r = float(r)
+        self.residuals = np.sort(residuals)
+
+    @property
+    def n(self):
+        return int(self.residuals.size)
+
+    @property
+    def r2(self):
+        return self.r * self.r
+
+    @property
+    def score_effect(self):
+        """점수 10점당 기대 가격 변화율 (예: 0.08 이면 +8%)"""
+        return float(np.expm1(self.slope * 10.0))
+
+    def expected_price(self, score):
+        """점수에서 기대되는 중위 거래가(억)"""
+        return np.exp(self.intercept + self.slope * np.asarray(score, dtype=np.float64))
+
+    def premium(self, price, score):
+        """기대 가격 대비 가격 차이 비율 (예: 0.12 이면 기대보다 12% 높음)"""
+        return np.asarray(price, dtype=np.float64) / self.expected_price(score) - 1.0
+
+    def premium_percentile(self, price, score):
+        """점수 대비 가격이 전체 건물 중 몇 %보다 높거나 같은지(0~100)"""
+        residual = np.log(np.asarray(price, dtype=np.float64)) - np.log(self.expected_price(score))
+        return np.searchsorted(self.residuals, residual, side='right') / self.residuals.size * 100.0
+
+
+class PriceScoreTable:
+    """건물별 가격/반경별 그룹 시설 수 테이블입니다. 가중치/반경별 점수와 회귀 결과를 한 번만 계산합니다."""
+
+    def __init__(self, buildings, meta):
+        self.buildings = buildings
+        self.meta = meta
+        self.radii = [float(r) for r in meta["radii"]]
+        self.group_names = list(meta["groups"])
+        self.prices = buildings['price'].to_numpy(dtype=np.float64)
+        self._scores = {}
+        self._fits = {}
+
+    def __len__(self):
+        return len(self.buildings)
+
+    def counts(self, radius_m):
+        """반경의 (건물 x 그룹) 시설 수 배열"""
+        return self.buildings[[count_column(g, radius_m) for g in self.group_names]].to_numpy(dtype=np.float64)
+
+    def _key(self, weights, radius_m, max_caps):
+        return (float(radius_m), tuple(weights.get(g, 0) for g in self.group_names),
+                tuple(max_caps.get(g, seulsekwon_engine.DEFAULT_CAP) for g in self.group_names))
+
+    def scores(self, weights, radius_m, max_caps=None):
+        """건물별 총점 배열 (seulsekwon_engine.score_counts 와 같은 반올림)"""
+        max_caps = seulsekwon_engine.MAX_CAPS if max_caps is None else max_caps
+        key = self._key(weights, radius_m, max_caps)
+        if key not in self._scores:
+            caps = np.array(key[2], dtype=np.float64)
+            w = np.array(key[1], dtype=np.float64)
+            group_scores = np.round(np.minimum(self.counts(radius_m), caps) / caps * w, 2)
+            self._scores[key] = np.round(group_scores.sum(axis=1), 1)
+        return self._scores[key]
+
+    def fit(self, weights, radius_m, max_caps=None):
+        """점수 -> log(가격) 회귀를 반환합니다. 계산하지 않은 반경이거나 건물이 부족하거나 점수가 모두 같으면 None."""
+        if float(radius_m) not in self.radii:
+            return None
+        max_caps = seulsekwon_engine.MAX_CAPS if max_caps is None else max_caps
+        key = self._key(weights, radius_m, max_caps)
+        if key not in self._fits:
+            x = self.scores(weights, radius_m, max_caps)
+            valid = np.isfinite(self.prices) & (self.prices > 0)
+            x, y = x[valid], np.log(self.prices[valid])
+            fit = None
+            if x.size >= MIN_FIT_BUILDINGS and np.ptp(x) > 0:
+                slope, intercept = np.polyfit(x, y, 1)
+                r = np.corrcoef(x, y)[0, 1]
+                fit = PriceScoreFit(intercept, slope, r, y - (intercept + slope * x))
+            self._fits[key] = fit
+        return self._fits[key]
+
+    def find(self, name, lat, lon, max_distance_m=None):
+        """건물명이 같은 건물 중 좌표에 가장 가까운 건물의 행 위치를 반환합니다. 없으면 None."""
+        positions = np.flatnonzero(self.buildings['BLDG_NM'].to_numpy() == str(name))
+        if not positions.size:
+            return None
+        rows = self.buildings.iloc[positions]
+        dist = seulsekwon_engine.haversine_m(lat, lon, rows['latitude'].to_numpy(dtype=np.float64),
+                                             rows['longitude'].to_numpy(dtype=np.float64))
+        nearest = int(np.argmin(dist))
+        if max_distance_m is not None and dist[nearest] > max_distance_m:
+            return None
+        return int(positions[nearest])
+
+    def building_premium(self, position, weights, radius_m, max_caps=None):
+        """
+        건물 하나의 점수/가격/기대 가격/차이 비율/백분위를 반환합니다. 회귀가 없으면 None.
+        반환값: {"name", "score", "price", "expected", "premium", "percentile"}
+        """
+        fit = self.fit(weights, radius_m, max_caps)
+        if fit is None:
+            return None
+        score = float(self.scores(weights, radius_m, max_caps)[position])
+        price = float(self.prices[position])
+        return {"name": str(self.buildings['BLDG_NM'].iloc[position]), "score": score, "price": price,
+                "expected": float(fit.expected_price(score)), "premium": float(fit.premium(price, score)),
+                "percentile": float(fit.premium_percentile(price, score))}
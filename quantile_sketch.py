@@ -0,0 +1,53 @@
+import numpy as np
+
+# ==========================================
+# 병합 가능한 분위수 스케치 (로그 구간 히스토그램, DDSketch 방식)
+# 값 x 를 ceil(log_gamma(x)) 구간에 세어 두면, 구간 건수를 더하는 것만으로 스케치가 병합되고
+# 모든 분위수를 상대 오차 alpha 이내로 추정할 수 있습니다. (크기는 값의 범위에만 비례, 건수와 무관)
+# ==========================================
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# 0 이하 값은 이 값으로 올려 같은 최소 구간에 셉니다.
+MIN_POSITIVE = 1e-9
+
+
+class LogBucketSketch:
+    """상대 오차 alpha 를 보장하는 로그 구간 정의입니다. 같은 alpha 의 (구간, 건수) 배열끼리 병합할 수 있습니다."""
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = float(relative_accuracy)
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+
+    def buckets(self, values):
+        """값 배열의 구간 번호 배열"""
+        values = np.maximum(np.asarray(values, dtype=np.float64), MIN_POSITIVE)
+        return np.ceil(np.log(values) / self._log_gamma).astype(np.int32)
+
+    def bucket_values(self, buckets):
+        """구간의 대표값 (구간 양 끝과의 상대 오차가 alpha 이내)"""
+        return 2.0 * self.gamma ** np.asarray(buckets, dtype=np.float64) / (self.gamma + 1.0)
+
+    def merge(self, buckets, counts):
+        """(구간, 건수) 배열을 구간별로 합쳐 구간 오름차순으로 반환합니다."""
+        buckets = np.asarray(buckets, dtype=np.int64)
+        if buckets.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        unique, inverse = np.unique(buckets, return_inverse=True)
+        return unique, np.bincount(inverse, weights=np.asarray(counts, dtype=np.float64))
+
+    def quantiles(self, buckets, counts, qs):
+        """
+        (구간, 건수) 배열(여러 셀의 스케치를 이어 붙인 것도 가능)에서 분위수들을 추정합니다.
+        건수가 없으면 NaN 배열을 반환합니다.
+        """
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        unique, merged = self.merge(buckets, counts)
+        total = merged.sum()
+        if total <= 0:
+            return np.full(qs.shape, np.nan)
+        cumulative = np.cumsum(merged)
+        ranks = qs * (total - 1)
+        idx = np.minimum(np.searchsorted(cumulative, ranks, side='right'), len(unique) - 1)
+        return self.bucket_values(unique[idx])
@@ -0,0 +1,381 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import facility_store
+import quantile_sketch
+import seulsekwon_engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow가 없으면 저장소 없이 원본 CSV를 직접 읽습니다.
+    pa = None
+    ds = None
+    pq = None
+
+# ==========================================
+# 부동산 실거래가 저장소 (Parquet)
+# 원본 CSV를 한 번만 읽어 자료형을 지정한 거래 테이블을 거래연도(RCPT_YR)/자치구(CGG_NM)별 폴더로 나눠 저장하고,
+# 법정동/연도별, 격자 셀별 가격 집계(건수/합계/평균/중앙값/최고가)와 셀별 분위수 스케치를 함께 만들어 둡니다.
+# 대시보드는 반경 요약에서 반경 안에 완전히 들어오는 셀은 집계/스케치를, 경계 셀에 속한 거래 행만 읽어 사용하고,
+# 위치의 법정동(주소 또는 중심 셀의 대표 법정동) 연도별 가격 추이를 법정동/연도별 집계에서 바로 찾습니다.
+# ==========================================
+
+STORE_FORMAT_VERSION = 3
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SOURCE_FILE_NAME = "seoul_real_estate_combined_2023_2026_geo.csv"
+# 원본 CSV 후보 경로 (앞선 것 우선)
+SOURCE_CANDIDATES = [
+    os.path.join("share", "data", SOURCE_FILE_NAME),
+    os.path.join(PROJECT_DIR, "..", "data", SOURCE_FILE_NAME),
+]
+
+COLUMNS = ['RCPT_YR', 'CGG_NM', 'STDG_NM', 'BLDG_NM', 'THING_AMT', 'ARCH_AREA', 'latitude', 'longitude']
+CATEGORY_COLS = ['CGG_NM', 'STDG_NM', 'BLDG_NM']
+PARTITION_COLS = ['RCPT_YR', 'CGG_NM']
+PRICE_COL = 'price_억'
+
+DEFAULT_AGG_CELL_M = 500.0
+
+# 셀별 가격 분위수 스케치의 상대 오차, 반경 안 거래가 이 건수 이하이면 스케치 대신 거래 행으로 정확히 계산
+SKETCH_RELATIVE_ACCURACY = quantile_sketch.DEFAULT_RELATIVE_ACCURACY
+PRECISE_MAX_ROWS = 5000
+# 반경 요약에 포함하는 가격 분위수
+SUMMARY_QUANTILES = (0.25, 0.5, 0.75)
+
+TRANSACTIONS_DIR = "transactions"
+DONG_YEAR_FILE = "agg_dong_year.parquet"
+CELL_FILE = "agg_cell.parquet"
+CELL_SKETCH_FILE = "agg_cell_sketch.parquet"
+META_FILE = "meta.json"
+
+
+def default_source_path():
+    """원본 실거래가 CSV 경로를 반환합니다. (후보 중 존재하는 첫 경로, 없으면 마지막 후보)"""
+    return next((p for p in SOURCE_CANDIDATES if os.path.exists(p)), SOURCE_CANDIDATES[-1])
+
+
+def default_store_dir():
+    """저장소 기본 경로(data/real_estate)를 반환합니다."""
+    return os.path.join(PROJECT_DIR, "data", "real_estate")
+
+
+def source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_source(csv_path):
+    """원본 CSV에서 필요한 열만 읽어 정제하고 가격(억) 열을 붙인 압축 스키마 테이블을 반환합니다."""
+    df = pd.read_csv(csv_path, usecols=COLUMNS)
+    # 필수 정보가 없는 행은 제거
+    df = df.dropna(subset=['latitude', 'longitude', 'THING_AMT', 'BLDG_NM'])
+    # 만 원 단위 금액을 '억' 단위로 변환
+    df[PRICE_COL] = df['THING_AMT'] / 10000.0
+    # 구/동/건물명은 범주형, 금액/면적/좌표는 float32, 연도는 작은 정수형
+    return facility_store.compact_frame(df, category_cols=CATEGORY_COLS).reset_index(drop=True)
+
+
+def aggregate_prices(df, keys):
+    """keys 별 거래 건수/가격 합계/평균/중앙값/최고가와 최고가 거래의 건물명/면적을 반환합니다."""
+    prices = df[PRICE_COL].astype(np.float64)
+    grouped = prices.groupby([df[k] for k in keys], observed=True)
+    agg = grouped.agg(['size', 'sum', 'mean', 'median', 'max'])
+    agg.columns = ['count', 'sum', 'mean', 'median', 'max']
+    top = df.loc[grouped.idxmax().to_numpy(), ['BLDG_NM', 'ARCH_AREA']]
+    agg['max_bldg'] = top['BLDG_NM'].astype(str).to_numpy()
+    agg['max_area'] = top['ARCH_AREA'].to_numpy(dtype=np.float64)
+    return agg.reset_index()
+
+
+def cell_dongs(df, cell_row, cell_col):
+    """셀별 대표 법정동(거래가 가장 많은 자치구/법정동)을 반환합니다."""
+    counts = df.groupby([pd.Series(cell_row, name='cell_row', index=df.index),
+                         pd.Series(cell_col, name='cell_col', index=df.index), df['CGG_NM'], df['STDG_NM']],
+                        observed=True).size().rename('n').reset_index()
+    top = counts.sort_values('n', ascending=False, kind='stable').drop_duplicates(['cell_row', 'cell_col'])
+    return top[['cell_row', 'cell_col']].assign(CGG_NM=top['CGG_NM'].astype(str), STDG_NM=top['STDG_NM'].astype(str))
+
+
+class CellGrid:
+    """집계 셀 격자 (원점/간격). 좌표 -> (행, 열) 변환과 셀 모서리 좌표를 제공합니다."""
+
+    def __init__(self, lat0, lon0, dlat, dlon, cell_m):
+        self.lat0, self.lon0 = float(lat0), float(lon0)
+        self.dlat, self.dlon = float(dlat), float(dlon)
+        self.cell_m = float(cell_m)
+
+    @classmethod
+    def covering(cls, lats, lons, cell_m=DEFAULT_AGG_CELL_M):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        dlat, dlon = seulsekwon_engine.bbox_margins(float(lats.mean()) if lats.size else 0.0, cell_m)
+        return cls(lats.min() if lats.size else 0.0, lons.min() if lons.size else 0.0, dlat, dlon, cell_m)
+
+    def cells(self, lats, lons):
+        rows = np.floor((np.asarray(lats, dtype=np.float64) - self.lat0) / self.dlat).astype(np.int32)
+        cols = np.floor((np.asarray(lons, dtype=np.float64) - self.lon0) / self.dlon).astype(np.int32)
+        return rows, cols
+
+    def bbox_cells(self, center_lat, center_lon, radius_m):
+        """반경을 덮는 사각형 범위의 셀 (행, 열) 배열을 반환합니다."""
+        lat_margin, lon_margin = seulsekwon_engine.bbox_margins(center_lat, radius_m)
+        r0, c0 = self.cells(center_lat - lat_margin, center_lon - lon_margin)
+        r1, c1 = self.cells(center_lat + lat_margin, center_lon + lon_margin)
+        rows, cols = np.meshgrid(np.arange(r0, r1 + 1), np.arange(c0, c1 + 1), indexing='ij')
+        return rows.ravel().astype(np.int32), cols.ravel().astype(np.int32)
+
+    def interior_cells(self, center_lat, center_lon, radius_m):
+        """네 모서리가 모두 반경 안에 있는(반경에 완전히 포함되는) 셀의 (행, 열) 배열을 반환합니다."""
+        rows, cols = self.bbox_cells(center_lat, center_lon, radius_m)
+        inside = np.ones(rows.shape, dtype=bool)
+        for dr in (0, 1):
+            for dc in (0, 1):
+                corner_lat = self.lat0 + (rows + dr) * self.dlat
+                corner_lon = self.lon0 + (cols + dc) * self.dlon
+                dist = seulsekwon_engine.distances_m(center_lat, center_lon, corner_lat, corner_lon, exact=True)
+                inside &= dist <= radius_m
+        return rows[inside], cols[inside]
+
+    def to_meta(self):
+        return {"lat0": self.lat0, "lon0": self.lon0, "dlat": self.dlat, "dlon": self.dlon, "cell_m": self.cell_m}
+
+
+def store_version(signature, cell_m):
+    payload = json.dumps([STORE_FORMAT_VERSION, signature, float(cell_m)])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def build_store(csv_path, store_dir=None, cell_m=DEFAULT_AGG_CELL_M):
+    """
+    원본 CSV를 읽어 거래 테이블(연도/자치구 분할 Parquet)과 법정동/연도별, 셀별 가격 집계를 저장합니다.
+    반환값: 저장소 메타데이터(dict)
+    """
+    if pa is None:
+        raise ImportError("실거래가 저장소에는 pyarrow가 필요합니다.")
+    store_dir = store_dir or default_store_dir()
+    df = read_source(csv_path)
+
+    grid = CellGrid.covering(df['latitude'].to_numpy(), df['longitude'].to_numpy(), cell_m)
+    cell_row, cell_col = grid.cells(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+    cells = aggregate_prices(df.assign(cell_row=cell_row, cell_col=cell_col), ['cell_row', 'cell_col'])
+    cells = cells.merge(cell_dongs(df, cell_row, cell_col), on=['cell_row', 'cell_col'], how='left')
+    dong_year = aggregate_prices(df, ['RCPT_YR', 'CGG_NM', 'STDG_NM'])
+    sketch = quantile_sketch.LogBucketSketch(SKETCH_RELATIVE_ACCURACY)
+    cell_sketches = pd.DataFrame({'cell_row': cell_row, 'cell_col': cell_col,
+                                  'bucket': sketch.buckets(df[PRICE_COL].to_numpy())})
+    cell_sketches = cell_sketches.groupby(['cell_row', 'cell_col', 'bucket']).size().rename('count').reset_index()
+
+    # 새 폴더에 모두 쓴 뒤 교체하여 읽는 쪽이 반쯤 쓰인 저장소를 보지 않게 합니다.
+    tmp_dir = store_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    pq.write_to_dataset(pa.Table.from_pandas(df, preserve_index=False),
+                        os.path.join(tmp_dir, TRANSACTIONS_DIR), partition_cols=PARTITION_COLS)
+    dong_year.to_parquet(os.path.join(tmp_dir, DONG_YEAR_FILE), index=False)
+    cells.to_parquet(os.path.join(tmp_dir, CELL_FILE), index=False)
+    cell_sketches.to_parquet(os.path.join(tmp_dir, CELL_SKETCH_FILE), index=False)
+
+    signature = source_signature(csv_path)
+    meta = {
+        "version": store_version(signature, cell_m), "format": STORE_FORMAT_VERSION,
+        "source": os.path.abspath(csv_path), "signature": signature,
+        "rows": len(df), "grid": grid.to_meta(), "sketch_relative_accuracy": SKETCH_RELATIVE_ACCURACY,
+    }
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    return meta
+
+
+def read_meta(store_dir=None):
+    """저장소 메타데이터를 읽습니다. 없거나 읽을 수 없으면 None."""
+    try:
+        with open(os.path.join(store_dir or default_store_dir(), META_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_store_fresh(store_dir, csv_path):
+    """저장소가 현재 원본 CSV/형식 버전과 일치하는지 확인합니다. (원본이 없으면 저장소만으로 판단)"""
+    meta = read_meta(store_dir)
+    if pa is None or not meta or meta.get("format") != STORE_FORMAT_VERSION:
+        return False
+    return not os.path.exists(csv_path) or meta.get("signature") == source_signature(csv_path)
+
+
+def load_transactions(store_dir=None, years=None, districts=None):
+    """
+    거래 테이블을 읽습니다. years/districts 를 주면 해당 분할 폴더만 읽습니다.
+    분할 열(RCPT_YR, CGG_NM)은 원래 자료형(작은 정수형, 범주형)으로 되돌립니다.
+    """
+    dataset = ds.dataset(os.path.join(store_dir or default_store_dir(), TRANSACTIONS_DIR),
+                         format='parquet', partitioning='hive')
+    condition = None
+    if years is not None:
+        condition = ds.field('RCPT_YR').isin(list(years))
+    if districts is not None:
+        in_districts = ds.field('CGG_NM').isin(list(districts))
+        condition = in_districts if condition is None else condition & in_districts
+    df = dataset.to_table(filter=condition).to_pandas()
+    df['RCPT_YR'] = pd.to_numeric(df['RCPT_YR'], downcast='integer')
+    df['CGG_NM'] = df['CGG_NM'].astype('category')
+    return df[COLUMNS + [PRICE_COL]]
+
+
+def cell_key(cell_row, cell_col):
+    """(셀 행, 셀 열) 을 정수 하나로 묶은 셀 번호"""
+    return (np.asarray(cell_row, dtype=np.int64) << 32) + np.asarray(cell_col, dtype=np.int64)
+
+
+def _cell_slots(sorted_keys, keys):
+    """셀 번호 순으로 정렬된 배열에서 keys 셀들에 해당하는 위치를 반환합니다."""
+    starts = np.searchsorted(sorted_keys, keys, side='left')
+    ends = np.searchsorted(sorted_keys, keys, side='right')
+    spans = [np.arange(a, b) for a, b in zip(starts, ends) if b > a]
+    return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+
+class PriceAggregates:
+    """
+    법정동/연도별, 셀별 가격 집계와 셀별 분위수 스케치, 셀 격자입니다.
+    셀 집계는 셀 번호(cell_key)로 바로 찾도록 색인해 두고, 스케치와 거래 행(rows)의 위치는
+    셀 번호 순으로 정렬해 구간 단위로 잘라 씁니다.
+    """
+
+    def __init__(self, dong_year, cells, grid, version=None, cell_sketches=None,
+                 relative_accuracy=SKETCH_RELATIVE_ACCURACY, rows=None):
+        self.dong_year = dong_year
+        self.cells = cells.set_index(cell_key(cells['cell_row'], cells['cell_col'])).sort_index()
+        self.grid = grid
+        self.version = version
+        self.sketch = quantile_sketch.LogBucketSketch(relative_accuracy)
+        if cell_sketches is None:
+            cell_sketches = pd.DataFrame({'cell_row': [], 'cell_col': [], 'bucket': [], 'count': []})
+        keys = cell_key(cell_sketches['cell_row'], cell_sketches['cell_col'])
+        order = np.argsort(keys, kind='stable')
+        self._sketch_keys = keys[order]
+        self._sketch_buckets = cell_sketches['bucket'].to_numpy(dtype=np.int64)[order]
+        self._sketch_counts = cell_sketches['count'].to_numpy(dtype=np.float64)[order]
+
+        # 거래 행 위치를 셀 번호 순으로 정렬 (반경 요약에서 필요한 셀의 행만 잘라 읽습니다)
+        self.rows = rows if rows is not None else pd.DataFrame(columns=COLUMNS + [PRICE_COL])
+        row_keys = cell_key(*grid.cells(self.rows['latitude'].to_numpy(dtype=np.float64),
+                                        self.rows['longitude'].to_numpy(dtype=np.float64)))
+        order = np.argsort(row_keys, kind='stable')
+        self._row_keys = row_keys[order]
+        self._row_positions = order
+
+    def cell_sketch(self, keys):
+        """여러 셀(셀 번호 배열)의 스케치를 이어 붙인 (구간, 건수) 배열을 반환합니다. (셀 수에만 비례)"""
+        slots = _cell_slots(self._sketch_keys, keys)
+        return self._sketch_buckets[slots], self._sketch_counts[slots]
+
+    def cell_rows(self, keys):
+        """여러 셀(셀 번호 배열)에 속한 거래 행을 반환합니다. (해당 셀의 거래 건수에만 비례)"""
+        positions = np.sort(self._row_positions[_cell_slots(self._row_keys, keys)])
+        return self.rows.iloc[positions]
+
+    def dong_year_summary(self, district, dong):
+        """자치구/법정동의 연도별 집계 행을 연도순으로 반환합니다. (없으면 빈 테이블)"""
+        rows = self.dong_year[(self.dong_year['CGG_NM'] == district) & (self.dong_year['STDG_NM'] == dong)]
+        return rows.sort_values('RCPT_YR')
+
+    def dong_at(self, lat, lon):
+        """좌표가 속한 셀의 대표 (자치구, 법정동)을 반환합니다. 셀에 거래가 없으면 None."""
+        key = int(cell_key(*self.grid.cells(lat, lon)))
+        if key not in self.cells.index:
+            return None
+        cell = self.cells.loc[key]
+        return str(cell['CGG_NM']), str(cell['STDG_NM'])
+
+
+def load_aggregates(store_dir=None, rows=None):
+    """
+    저장소의 가격 집계를 읽습니다. 없으면 None.
+    rows 는 반경 요약의 경계 셀에 쓰는 거래 테이블입니다. (없으면 저장소의 거래 테이블을 읽습니다)
+    """
+    store_dir = store_dir or default_store_dir()
+    meta = read_meta(store_dir)
+    if pa is None or not meta:
+        return None
+    dong_year = pd.read_parquet(os.path.join(store_dir, DONG_YEAR_FILE))
+    cells = pd.read_parquet(os.path.join(store_dir, CELL_FILE))
+    cell_sketches = pd.read_parquet(os.path.join(store_dir, CELL_SKETCH_FILE))
+    if rows is None:
+        rows = load_transactions(store_dir)
+    return PriceAggregates(dong_year, cells, CellGrid(**meta["grid"]), meta.get("version"), cell_sketches,
+                           meta.get("sketch_relative_accuracy", SKETCH_RELATIVE_ACCURACY), rows)
+
+
+def _quantile_summary(values, approximate):
+    """분위수 배열을 요약 항목(median, percentiles, approximate)으로 바꿉니다."""
+    percentiles = {int(round(q * 100)): float(v) for q, v in zip(SUMMARY_QUANTILES, values)}
+    return {"median": percentiles[50], "percentiles": percentiles, "approximate": approximate}
+
+
+def summarize_rows(rows):
+    """거래 행에서 직접 요약(건수/평균/분위수/최고가 거래)을 계산합니다. 거래가 없으면 None."""
+    if rows.empty:
+        return None
+    prices = rows[PRICE_COL].to_numpy(dtype=np.float64)
+    top = rows.iloc[int(np.argmax(prices))]
+    summary = {"count": len(prices), "mean": float(prices.mean()),
+               "max": float(prices.max()), "max_bldg": str(top['BLDG_NM']), "max_area": float(top['ARCH_AREA'])}
+    summary.update(_quantile_summary(np.quantile(prices, SUMMARY_QUANTILES), approximate=False))
+    return summary
+
+
+def radius_summary(aggregates, center_lat, center_lon, radius_m):
+    """
+    반경 요약을 계산합니다. 반경에 완전히 포함되는 셀은 셀 집계/스케치를, 경계 셀은 그 셀의 거래 행만 읽어 사용하므로
+    비용은 반경을 덮는 셀 수와 경계 셀의 거래 건수에 비례합니다. (반경 안쪽 셀의 거래 건수와 무관)
+    건수/평균/최고가는 행에서 직접 계산한 값과 같고, 분위수는 안쪽 셀 스케치와 경계 거래 가격을 병합해
+    상대 오차 SKETCH_RELATIVE_ACCURACY 이내로 추정합니다.
+    반경 안 거래가 PRECISE_MAX_ROWS 건 이하이면 안쪽 셀의 거래 행까지 읽어 정확히 계산합니다. 거래가 없으면 None.
+    """
+    grid = aggregates.grid
+    interior_keys = cell_key(*grid.interior_cells(center_lat, center_lon, radius_m))
+    edge_keys = np.setdiff1d(cell_key(*grid.bbox_cells(center_lat, center_lon, radius_m)), interior_keys)
+    interior = aggregates.cells.reindex(interior_keys).dropna(subset=['count'])
+
+    edge = aggregates.cell_rows(edge_keys)
+    dist = seulsekwon_engine.distances_m(center_lat, center_lon, edge['latitude'].to_numpy(dtype=np.float64),
+                                         edge['longitude'].to_numpy(dtype=np.float64), exact=True)
+    edge = edge[dist <= radius_m]
+    edge_prices = edge[PRICE_COL].to_numpy(dtype=np.float64)
+
+    count = int(interior['count'].sum()) + len(edge_prices)
+    if count == 0:
+        return None
+    if count <= PRECISE_MAX_ROWS:
+        return summarize_rows(pd.concat([aggregates.cell_rows(interior.index.to_numpy()), edge]))
+    total = float(interior['sum'].sum()) + float(edge_prices.sum())
+
+    # 분위수: 안쪽 셀 스케치 + 경계 거래 가격(건수 1)을 병합
+    sketch = aggregates.sketch
+    buckets, counts = aggregates.cell_sketch(interior.index.to_numpy())
+    quantiles = sketch.quantiles(np.concatenate([buckets, sketch.buckets(edge_prices)]),
+                                 np.concatenate([counts, np.ones(len(edge_prices))]), SUMMARY_QUANTILES)
+
+    summary = {"count": count, "mean": total / count}
+    summary.update(_quantile_summary(quantiles, approximate=True))
+    interior_max = float(interior['max'].max()) if len(interior) else -np.inf
+    edge_max = float(edge_prices.max()) if len(edge_prices) else -np.inf
+    if interior_max >= edge_max:
+        top = interior.iloc[int(np.argmax(interior['max'].to_numpy()))]
+        summary.update(max=interior_max, max_bldg=str(top['max_bldg']), max_area=float(top['max_area']))
+    else:
+        top = edge.iloc[int(np.argmax(edge_prices))]
+        summary.update(max=edge_max, max_bldg=str(top['BLDG_NM']), max_area=float(top['ARCH_AREA']))
+    return summary
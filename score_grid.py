@@ -0,0 +1,206 @@
+import json
+import os
+
+import numpy as np
+
+import facility_store
+import seulsekwon_engine
+
+# ==========================================
+# 서울 전역 슬세권 격자 (사전 계산)
+# 서울 범위를 일정 간격(m)의 정사각 격자로 나누어 각 셀 중심의 그룹별 시설 수를 미리 계산해 두고,
+# 대시보드는 이 배열에서 서울 평균/백분위/주변 평균을 바로 조회합니다.
+# 시설 수만 저장하므로 가중치와 기준치(max_caps)는 조회 시점에 적용됩니다.
+# 분류 기준(그룹/이모지/대소문자 구분)마다 파일을 따로 두어 엔진 기준(app.py, myang)과 utils 기준(app2)이 각자 격자를 씁니다.
+# ==========================================
+
+GRID_FORMAT_VERSION = 3
+DEFAULT_GRID_CELL_M = 250.0
+
+# 서울 지역 좌표 범위 (위도 36~39, 경도 125~129) - 시설 데이터 필터링 기준과 동일
+SEOUL_BOUNDS = (36.0, 39.0, 125.0, 129.0)
+
+
+def grid_file_name(radius_m, scheme):
+    return f"score_grid_{int(radius_m)}m_{scheme[:8]}.npz"
+
+
+def default_grid_path(base_path=None, radius_m=500, category_groups=seulsekwon_engine.CATEGORY_GROUPS,
+                      emoji_map=seulsekwon_engine.EMOJI_MAP, ignore_case=True):
+    """격자 파일 기본 경로(data/cleaned/score_grid_{반경}m_{분류 기준 해시}.npz)를 반환합니다."""
+    scheme = facility_store.scheme_key(category_groups, emoji_map, ignore_case)
+    return os.path.join(base_path or facility_store.default_data_dir(), grid_file_name(radius_m, scheme))
+
+
+class ScoreGrid:
+    """셀별 그룹 시설 수 배열(rows x cols x groups)과 격자 좌표 정보를 가진 사전 계산 결과입니다."""
+
+    def __init__(self, counts, lat0, lon0, dlat, dlon, radius_m, cell_m, group_names, meta=None):
+        self.counts = counts
+        self.lat0, self.lon0 = float(lat0), float(lon0)
+        self.dlat, self.dlon = float(dlat), float(dlon)
+        self.radius_m = float(radius_m)
+        self.cell_m = float(cell_m)
+        self.group_names = list(group_names)
+        self.meta = meta or {}
+        # 반경 내 시설이 하나라도 있는 셀만 서울 평균/백분위 모집단으로 사용합니다. (하천/산지 등 제외)
+        self.populated = counts.sum(axis=2) > 0
+        self._totals = {}
+
+    @property
+    def shape(self):
+        return self.counts.shape[:2]
+
+    def cell_of(self, lat, lon):
+        """좌표가 속한 셀의 (행, 열)을 반환합니다. 격자 밖이면 None."""
+        r = int(np.floor((lat - self.lat0) / self.dlat))
+        c = int(np.floor((lon - self.lon0) / self.dlon))
+        if 0 <= r < self.shape[0] and 0 <= c < self.shape[1]:
+            return r, c
+        return None
+
+    def _group_scores(self, counts, weights, max_caps):
+        caps = np.array([max_caps.get(g, seulsekwon_engine.DEFAULT_CAP) for g in self.group_names], dtype=np.float64)
+        w = np.array([weights.get(g, 0) for g in self.group_names], dtype=np.float64)
+        return np.round(np.minimum(counts, caps) / caps * w, 2)
+
+    def totals(self, weights, max_caps=None):
+        """사람이 사는 셀 전체의 총점 배열(오름차순)을 반환합니다. 가중치/기준치별로 한 번만 계산합니다."""
+        max_caps = seulsekwon_engine.MAX_CAPS if max_caps is None else max_caps
+        key = (tuple(weights.get(g, 0) for g in self.group_names),
+               tuple(max_caps.get(g, seulsekwon_engine.DEFAULT_CAP) for g in self.group_names))
+        if key not in self._totals:
+            scores = self._group_scores(self.counts[self.populated], weights, max_caps)
+            self._totals[key] = np.sort(np.round(scores.sum(axis=1), 1))
+        return self._totals[key]
+
+    def average_scores(self, weights, max_caps=None):
+        """서울 평균 그룹별 점수(dict)를 반환합니다."""
+        max_caps = seulsekwon_engine.MAX_CAPS if max_caps is None else max_caps
+        if not self.populated.any():
+            return {g: 0.0 for g in self.group_names}
+        scores = self._group_scores(self.counts[self.populated], weights, max_caps).mean(axis=0)
+        return {g: float(s) for g, s in zip(self.group_names, scores)}
+
+    def average_total(self, weights, max_caps=None):
+        """서울 평균 총점을 반환합니다."""
+        totals = self.totals(weights, max_caps)
+        return round(float(totals.mean()), 1) if totals.size else 0.0
+
+    def percentile(self, total_score, weights, max_caps=None):
+        """총점이 서울 셀 중 몇 %보다 높거나 같은지(0~100) 반환합니다."""
+        totals = self.totals(weights, max_caps)
+        if not totals.size:
+            return None
+        return float(np.searchsorted(totals, total_score, side='right')) / totals.size * 100.0
+
+    def local_average(self, lat, lon, weights, max_caps=None, window_m=1000.0):
+        """좌표 주변(window_m 반경의 정사각 범위) 셀들의 평균 총점을 반환합니다. 범위 밖이면 None."""
+        max_caps = seulsekwon_engine.MAX_CAPS if max_caps is None else max_caps
+        cell = self.cell_of(lat, lon)
+        if cell is None:
+            return None
+        k = int(np.ceil(window_m / self.cell_m))
+        r, c = cell
+        window = (slice(max(r - k, 0), r + k + 1), slice(max(c - k, 0), c + k + 1))
+        populated = self.populated[window]
+        if not populated.any():
+            return None
+        totals = self._group_scores(self.counts[window][populated], weights, max_caps).sum(axis=1)
+        return round(float(totals.mean()), 1)
+
+
+def grid_nodes(facilities, cell_m=DEFAULT_GRID_CELL_M, bounds=SEOUL_BOUNDS):
+    """
+    시설 분포 범위(서울 범위로 제한)를 덮는 격자의 원점/간격/크기를 계산합니다.
+    반환값: (lat0, lon0, dlat, dlon, n_rows, n_cols)
+    """
+    lat_min, lat_max, lon_min, lon_max = bounds
+    lats = facilities['lat'].to_numpy(dtype=np.float64)
+    lons = facilities['lon'].to_numpy(dtype=np.float64)
+    lat0, lat1 = max(lats.min(), lat_min), min(lats.max(), lat_max)
+    lon0, lon1 = max(lons.min(), lon_min), min(lons.max(), lon_max)
+
+    dlat, dlon = seulsekwon_engine.bbox_margins((lat0 + lat1) / 2.0, cell_m)
+    n_rows = int(np.floor((lat1 - lat0) / dlat)) + 1
+    n_cols = int(np.floor((lon1 - lon0) / dlon)) + 1
+    return lat0, lon0, dlat, dlon, n_rows, n_cols
+
+
+def build_score_grids(facilities, radii, cell_m=DEFAULT_GRID_CELL_M, index=None, bounds=SEOUL_BOUNDS,
+                      category_groups=seulsekwon_engine.CATEGORY_GROUPS, emoji_map=seulsekwon_engine.EMOJI_MAP,
+                      ignore_case=True, progress=None):
+    """
+    각 셀 중심의 반경 내 그룹별 시설 수를 계산하여 {반경: ScoreGrid} 로 반환합니다.
+    셀마다 가장 큰 반경으로 한 번만 조회하고 작은 반경은 같은 거리 배열에서 나눕니다.
+    """
+    group_names = list(category_groups.keys())
+    lat0, lon0, dlat, dlon, n_rows, n_cols = grid_nodes(facilities, cell_m, bounds)
+    counts = {r: np.zeros((n_rows, n_cols, len(group_names)), dtype=np.uint16) for r in radii}
+    max_count = np.iinfo(np.uint16).max
+
+    for row in range(n_rows):
+        lat = lat0 + (row + 0.5) * dlat
+        for col in range(n_cols):
+            lon = lon0 + (col + 0.5) * dlon
+            cell_counts = seulsekwon_engine.facility_counts_radii(
+                lat, lon, facilities, radii, index=index,
+                category_groups=category_groups, emoji_map=emoji_map, ignore_case=ignore_case
+            )
+            for r in radii:
+                counts[r][row, col] = [min(cell_counts[r][g], max_count) for g in group_names]
+        if progress is not None:
+            progress(row + 1, n_rows)
+
+    return {r: ScoreGrid(counts[r], lat0, lon0, dlat, dlon, r, cell_m, group_names) for r in radii}
+
+
+def build_score_grid(facilities, radius_m=500, cell_m=DEFAULT_GRID_CELL_M, index=None, bounds=SEOUL_BOUNDS,
+                     category_groups=seulsekwon_engine.CATEGORY_GROUPS, emoji_map=seulsekwon_engine.EMOJI_MAP,
+                     ignore_case=True, progress=None):
+    """반경 하나의 격자를 계산합니다."""
+    return build_score_grids(facilities, [radius_m], cell_m, index, bounds,
+                             category_groups, emoji_map, ignore_case, progress)[radius_m]
+
+
+def save_score_grid(grid, path, base_path, category_groups=seulsekwon_engine.CATEGORY_GROUPS,
+                    emoji_map=seulsekwon_engine.EMOJI_MAP, ignore_case=True):
+    """격자를 압축 npz 파일로 저장합니다. 원본 CSV 서명과 분류 기준 해시를 함께 기록합니다."""
+    meta = {
+        "version": GRID_FORMAT_VERSION,
+        "lat0": grid.lat0, "lon0": grid.lon0, "dlat": grid.dlat, "dlon": grid.dlon,
+        "radius_m": grid.radius_m, "cell_m": grid.cell_m, "groups": grid.group_names,
+        "sources": facility_store.source_signature(base_path),
+        "scheme": facility_store.scheme_key(category_groups, emoji_map, ignore_case),
+    }
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, counts=grid.counts, meta=np.array(json.dumps(meta, ensure_ascii=False)))
+    os.replace(tmp_path, path)
+
+
+def read_score_grid(path):
+    """격자 파일을 읽습니다. 파일이 없거나 읽을 수 없으면 None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as npz:
+            meta = json.loads(str(npz['meta']))
+            counts = npz['counts']
+    except (OSError, ValueError, KeyError):
+        return None
+    return ScoreGrid(counts, meta['lat0'], meta['lon0'], meta['dlat'], meta['dlon'],
+                     meta['radius_m'], meta['cell_m'], meta['groups'], meta)
+
+
+def load_score_grid(base_path, radius_m, category_groups=seulsekwon_engine.CATEGORY_GROUPS,
+                    emoji_map=seulsekwon_engine.EMOJI_MAP, ignore_case=True):
+    """현재 원본 CSV/분류 기준과 일치하는 반경별 격자를 반환합니다. 없거나 오래되었으면 None."""
+    grid = read_score_grid(default_grid_path(base_path, radius_m, category_groups, emoji_map, ignore_case))
+    if grid is None:
+        return None
+    meta = grid.meta
+    fresh = meta.get("version") == GRID_FORMAT_VERSION and \
+        meta.get("sources") == facility_store.source_signature(base_path) and \
+        meta.get("scheme") == facility_store.scheme_key(category_groups, emoji_map, ignore_case) and \
+        meta.get("groups") == list(category_groups.keys())
+    return grid if fresh else None
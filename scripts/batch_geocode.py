@@ -0,0 +1,204 @@
+import argparse
+import csv
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+import requests
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import kakao_geo
+
+# ==========================================
+# 주소 목록 일괄 지오코딩
+# 입력 CSV를 청크 단위로 읽어 제한된 동시성 + 초당 요청 제한 + 재시도(지수 백오프)로 좌표를 구하고,
+# 결과를 한 줄씩 바로 출력 CSV에 기록합니다. 출력 파일이 곧 체크포인트이므로
+# 중단 후 같은 명령을 다시 실행하면 이미 기록된 행(row_id)은 건너뛰고 이어서 처리합니다.
+# ==========================================
+
+OUTPUT_COLUMNS = ['row_id', 'query', 'address_name', 'lat', 'lng', 'status']
+
+
+class RateLimiter:
+    """여러 스레드가 공유하는 초당 호출 수 제한기입니다."""
+
+    def __init__(self, rate_per_sec):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_s = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self.interval
+        if wait_s > 0:
+            time.sleep(wait_s)
+
+
+def iter_queries(input_path, column, encoding, chunksize):
+    """입력 CSV를 청크 단위로 읽어 (row_id, 주소) 쌍을 순서대로 내보냅니다."""
+    row_id = 0
+    for chunk in pd.read_csv(input_path, encoding=encoding, usecols=[column], dtype=str, chunksize=chunksize):
+        for query in chunk[column].tolist():
+            yield row_id, query
+            row_id += 1
+
+
+def truncate_partial_line(output_path):
+    """
+    중단된 실행이 마지막 줄을 쓰다 만 경우 그 줄을 잘라냅니다. (잘라낸 바이트 수 반환)
+    완전히 기록된 행은 모두 줄바꿈으로 끝나므로 마지막 줄바꿈 뒤의 내용만 지우며, 파일 끝부분만 읽습니다.
+    """
+    if not os.path.exists(output_path):
+        return 0
+    with open(output_path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        keep, end = 0, size
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            pos = f.read(end - start).rfind(b'\n')
+            if pos >= 0:
+                keep = start + pos + 1
+                break
+            end = start
+        if keep < size:
+            f.truncate(keep)
+    return size - keep
+
+
+def load_done_rows(output_path):
+    """이미 출력 파일에 기록된 row_id 집합을 읽습니다. (재시작 지점)"""
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return set()
+    done = pd.read_csv(output_path, encoding='utf-8-sig', usecols=['row_id'])
+    return set(done['row_id'].astype(int))
+
+
+def resolve(geocoder, limiter, query, retries, backoff):
+    """
+    주소 하나를 좌표로 변환합니다.
+    반환값: ('ok', 결과) / ('not_found', None) / ('failed', None: 재시도 모두 실패)
+    """
+    if not isinstance(query, str) or not query.strip():
+        return 'not_found', None
+    # 캐시 적중은 API를 호출하지 않으므로 요청 제한을 거치지 않습니다.
+    if geocoder.cache is not None:
+        cached = geocoder.cache.get(query)
+        if cached is not None:
+            return 'ok', cached
+
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            result = geocoder.geocode(query, raise_on_error=True)
+            return ('ok', result) if result else ('not_found', None)
+        except requests.RequestException:
+            if attempt == retries:
+                break
+            time.sleep(backoff * (2 ** attempt) + random.uniform(0, backoff))
+    return 'failed', None
+
+
+def write_row(writer, row_id, query, status, result):
+    writer.writerow([
+        row_id, query,
+        result['address_name'] if result else '',
+        result['lat'] if result else '',
+        result['lng'] if result else '',
+        status
+    ])
+
+
+def batch_geocode(input_path, output_path, column, api_key, workers=4, rate=10.0, retries=3,
+                  backoff=0.5, encoding='utf-8-sig', chunksize=10000, base_url=kakao_geo.KAKAO_API_BASE):
+    """입력 CSV의 주소 열을 일괄 지오코딩하여 출력 CSV에 이어 씁니다."""
+    geocoder = kakao_geo.get_geocoder(api_key, base_url=base_url, pool_size=max(2 * workers, 2))
+    limiter = RateLimiter(rate)
+    # 중단 시 마지막 행이 일부만 기록되었을 수 있으므로 이어 쓰기 전에 잘라내고 그 행은 다시 처리합니다.
+    if truncate_partial_line(output_path):
+        print("이전 실행에서 끝까지 기록되지 않은 마지막 행을 지우고 다시 처리합니다.")
+    done = load_done_rows(output_path)
+    if done:
+        print(f"이전 진행분 {len(done):,}건을 건너뛰고 이어서 처리합니다.")
+
+    is_new = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+    stats = {'ok': 0, 'not_found': 0, 'failed': 0}
+    start = time.time()
+
+    # 새 파일에만 BOM을 기록하고, 이어 쓰기는 일반 UTF-8로 추가합니다.
+    with open(output_path, 'a', newline='', encoding='utf-8-sig' if is_new else 'utf-8') as f, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        writer = csv.writer(f)
+        if is_new:
+            writer.writerow(OUTPUT_COLUMNS)
+
+        in_flight = {}
+
+        def drain(return_when):
+            finished, _ = wait(list(in_flight), return_when=return_when)
+            for future in finished:
+                row_id, query = in_flight.pop(future)
+                status, result = future.result()
+                stats[status] += 1
+                if status == 'failed':
+                    # 실패한 행은 기록하지 않아 다음 실행에서 다시 시도합니다.
+                    print(f"[failed] row {row_id}: {query}", file=sys.stderr)
+                    continue
+                write_row(writer, row_id, query, status, result)
+            f.flush()
+
+        for row_id, query in iter_queries(input_path, column, encoding, chunksize):
+            if row_id in done:
+                continue
+            future = pool.submit(resolve, geocoder, limiter, query, retries, backoff)
+            in_flight[future] = (row_id, query)
+            # 동시에 처리 중인 작업 수를 제한하여 대용량 입력도 일정한 메모리로 처리
+            if len(in_flight) >= workers * 2:
+                drain(FIRST_COMPLETED)
+        while in_flight:
+            drain(FIRST_COMPLETED)
+
+    total = sum(stats.values())
+    print(f"처리 {total:,}건 ({time.time() - start:.1f}s) - 성공 {stats['ok']:,}, "
+          f"결과 없음 {stats['not_found']:,}, 실패 {stats['failed']:,}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주소 CSV를 카카오 로컬 API로 일괄 지오코딩합니다. (중단 후 재실행 시 이어서 처리)")
+    parser.add_argument('input', help="주소가 들어 있는 입력 CSV")
+    parser.add_argument('output', help="결과 CSV (row_id, query, address_name, lat, lng, status)")
+    parser.add_argument('--column', default='주소', help="주소 열 이름 (기본: 주소)")
+    parser.add_argument('--workers', type=int, default=4, help="동시 작업 수")
+    parser.add_argument('--rate', type=float, default=10.0, help="초당 최대 주소 처리 수 (주소 1건당 API 최대 2회 호출)")
+    parser.add_argument('--retries', type=int, default=3, help="일시적 오류 재시도 횟수")
+    parser.add_argument('--backoff', type=float, default=0.5, help="재시도 기본 대기 시간(초), 시도마다 2배")
+    parser.add_argument('--encoding', default='utf-8-sig', help="입력 CSV 인코딩")
+    parser.add_argument('--chunksize', type=int, default=10000, help="입력 CSV 청크 크기")
+    parser.add_argument('--base-url', default=kakao_geo.KAKAO_API_BASE, help="API 주소 (테스트용 스텁 서버 지정 가능)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("KAKAO_REST_API_KEY")
+    if not api_key:
+        print("Error: KAKAO_REST_API_KEY 환경 변수가 설정되지 않았습니다.")
+        sys.exit(1)
+
+    try:
+        batch_geocode(args.input, args.output, args.column, api_key, args.workers, args.rate, args.retries,
+                      args.backoff, args.encoding, args.chunksize, args.base_url)
+    except kakao_geo.KakaoAuthError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import os
+import sys
+import time
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import combined_dataset
+import facility_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="data/cleaned CSV를 합쳐 myang_renew_app 용 통합 인프라 데이터를 생성합니다.")
+    parser.add_argument('--data-dir', default=facility_store.default_data_dir(), help="원본 CSV 폴더 (기본: data/cleaned)")
+    parser.add_argument('--output', default=None,
+                        help="통합 데이터 경로 (기본: data/combined/seoul_combined_infrastructure.feather)")
+    parser.add_argument('--parts-dir', default=combined_dataset.DEFAULT_PARTS_DIR, help="파일별 정규화 조각 캐시 폴더")
+    parser.add_argument('--force', action='store_true', help="캐시와 관계없이 모든 파일을 다시 읽어 생성")
+    args = parser.parse_args()
+
+    start = time.time()
+    result = combined_dataset.build_combined(args.data_dir, args.output, args.parts_dir, force=args.force)
+    print(f"다시 읽은 파일 {len(result['rebuilt'])}개: {', '.join(result['rebuilt']) or '-'}")
+    print(f"캐시 재사용 {len(result['reused'])}개")
+    for file, error in result['failed'].items():
+        print(f"! 읽기 실패 (통합 데이터에서 제외, 다음 빌드에서 다시 시도): {file} - {error}")
+    state = "생성" if result['written'] else "이미 최신"
+    print(f"{state}: 시설 {result['rows']:,}건, 버전 {result['version']} -> {result['path']} ({time.time() - start:.1f}s)")
+    if result['failed']:
+        print("읽지 못한 파일이 있어 앱은 이 통합 데이터 대신 기존 통합 CSV를 사용합니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import time
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import facility_store
+import seulsekwon_engine
+
+
+def build_store(data_dir, output_path, force=False):
+    """
+    data/cleaned 의 CSV를 한 번 정규화하여 컬럼형 시설 저장소(Feather)를 생성합니다.
+    (매니페스트 기반 읽기, 좌표 변환, 행별 위경도 교정, 중복 제거, 카테고리 분류를 모두 여기서 수행)
+    """
+    groups, emojis = seulsekwon_engine.CATEGORY_GROUPS, seulsekwon_engine.EMOJI_MAP
+
+    if not force and facility_store.is_store_fresh(output_path, data_dir, groups, emojis):
+        print(f"저장소가 이미 최신입니다: {output_path}")
+        return
+
+    start = time.time()
+    reports = {}
+    df = facility_store.build_facility_table(data_dir, groups, emojis, reports=reports)
+    print_quality_report(reports)
+    if df.empty:
+        print(f"Error: 정규화할 데이터가 없습니다 - {data_dir}")
+        return
+
+    facility_store.write_store(df, output_path, data_dir, groups, emojis)
+    print(f"시설 {len(df):,}건 -> {output_path} ({time.time() - start:.1f}s)")
+    print(f"파일 크기: {os.path.getsize(output_path) / 1024:.0f} KB")
+
+
+def print_quality_report(reports):
+    """파일별 좌표 품질 보고: 전체 행, 정상, 위경도 교정, 좌표 없음, 서울 범위 밖(제거), 읽기 실패"""
+    print(f"{'파일':<40} {'전체':>8} {'정상':>8} {'교정':>6} {'없음':>6} {'범위밖':>6}")
+    for file, report in reports.items():
+        counts = [report.get(key, 0) for key in facility_store.QUALITY_KEYS]
+        print(f"{file:<40} " + " ".join(f"{n:>{w},}" for n, w in zip(counts, (8, 8, 6, 6, 6))))
+        if report.get(facility_store.ERROR_KEY):
+            print(f"  ! 읽기 실패 (시설 테이블에서 제외): {report[facility_store.ERROR_KEY]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="data/cleaned CSV로 컬럼형 시설 저장소(Feather)를 생성합니다.")
+    parser.add_argument('--data-dir', default=facility_store.default_data_dir(), help="원본 CSV 폴더 (기본: data/cleaned)")
+    parser.add_argument('--output', default=None, help="저장소 파일 경로 (기본: data/cleaned/facility_store.feather)")
+    parser.add_argument('--force', action='store_true', help="최신 여부와 관계없이 다시 생성")
+    args = parser.parse_args()
+
+    build_store(args.data_dir, args.output or facility_store.default_store_path(args.data_dir), args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import time
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import combined_dataset
+import dataset_service
+import price_score
+import real_estate_store
+import seulsekwon_engine
+
+
+def load_transactions(csv_path):
+    """대시보드와 같은 방식으로 실거래 테이블과 버전을 읽습니다. (최신 저장소 우선, 없으면 원본 CSV)"""
+    store_dir = real_estate_store.default_store_dir()
+    if real_estate_store.is_store_fresh(store_dir, csv_path):
+        return real_estate_store.load_transactions(store_dir), real_estate_store.read_meta(store_dir)["version"]
+    version = real_estate_store.store_version(real_estate_store.source_signature(csv_path),
+                                              real_estate_store.DEFAULT_AGG_CELL_M)
+    return real_estate_store.read_source(csv_path), version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실거래 건물별 가격과 반경별 슬세권 시설 수를 계산합니다. (대시보드 점수 대비 가격 분석용)")
+    parser.add_argument('--csv', default=None, help="실거래가 통합 CSV 경로 (기본: share/data 또는 ../data)")
+    parser.add_argument('--combined', default=combined_dataset.default_combined_path(),
+                        help="통합 인프라 데이터 (scripts/build_combined_dataset.py 산출물)")
+    parser.add_argument('--output', default=price_score.default_output_dir(), help="결과 폴더 (기본: data/price_score)")
+    parser.add_argument('--radius', type=float, nargs='+', default=seulsekwon_engine.RADIUS_OPTIONS,
+                        help="분석 반경(m) 목록 (기본: 대시보드 선택지 전체)")
+    parser.add_argument('--workers', type=int, default=None, help="작업 프로세스 수 (기본: CPU 수, 1이면 단일 프로세스)")
+    args = parser.parse_args()
+
+    csv_path = args.csv or real_estate_store.default_source_path()
+    if not os.path.exists(csv_path):
+        print(f"Error: 실거래가 CSV를 찾을 수 없습니다 - {csv_path}")
+        sys.exit(1)
+    facilities = combined_dataset.load_combined(args.combined)
+    if facilities is None:
+        print(f"Error: 통합 인프라 데이터가 없습니다. scripts/build_combined_dataset.py 를 먼저 실행하세요 - {args.combined}")
+        sys.exit(1)
+    infra = dataset_service.FacilityDataset(facilities, combined_dataset.read_combined_version(args.combined))
+
+    transactions, re_version = load_transactions(csv_path)
+    start = time.time()
+
+    def progress(done, total):
+        print(f"\r건물 {done:,}/{total:,} ({time.time() - start:.0f}s)", end='', flush=True)
+
+    meta = price_score.build_price_scores(transactions, re_version, infra.data, infra.version, args.output,
+                                          args.radius, index=infra.index, progress=progress, workers=args.workers)
+    print()
+    print(f"거래 {meta['transactions']:,}건 -> 건물 {meta['buildings']:,}곳 -> {args.output} ({time.time() - start:.1f}s)")
+
+    table = price_score.load_price_scores(args.output)
+    for radius_m in table.radii:
+        fit = table.fit(seulsekwon_engine.DEFAULT_WEIGHTS, radius_m)
+        if fit is None:
+            print(f"반경 {radius_m:g}m: 회귀에 필요한 건물이 부족합니다.")
+            continue
+        print(f"반경 {radius_m:g}m: 상관계수 {fit.r:+.2f} (R² {fit.r2:.2f}), 점수 10점당 기대 가격 {fit.score_effect:+.1%}")
+
+
+if __name__ == "__main__":
+    main()
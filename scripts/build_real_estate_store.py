@@ -0,0 +1,35 @@
+import argparse
+import os
+import sys
+import time
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import real_estate_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실거래가 CSV로 연도/자치구 분할 Parquet 저장소와 가격 집계를 생성합니다.")
+    parser.add_argument('--csv', default=None, help="실거래가 통합 CSV 경로 (기본: share/data 또는 ../data)")
+    parser.add_argument('--output', default=real_estate_store.default_store_dir(), help="저장소 폴더 (기본: data/real_estate)")
+    parser.add_argument('--cell-m', type=float, default=real_estate_store.DEFAULT_AGG_CELL_M, help="가격 집계 셀 크기(m)")
+    parser.add_argument('--force', action='store_true', help="최신 여부와 관계없이 다시 생성")
+    args = parser.parse_args()
+
+    csv_path = args.csv or real_estate_store.default_source_path()
+    if not os.path.exists(csv_path):
+        print(f"Error: 실거래가 CSV를 찾을 수 없습니다 - {csv_path}")
+        sys.exit(1)
+    if not args.force and real_estate_store.is_store_fresh(args.output, csv_path):
+        print(f"저장소가 이미 최신입니다: {args.output}")
+        return
+
+    start = time.time()
+    meta = real_estate_store.build_store(csv_path, args.output, args.cell_m)
+    print(f"거래 {meta['rows']:,}건, 버전 {meta['version']} -> {args.output} ({time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import time
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import facility_store
+import score_grid
+import seulsekwon_engine
+import spatial_index
+
+SCHEMES = ('engine', 'utils')
+
+
+def scheme_facilities(scheme, data_dir):
+    """
+    분류 기준별 시설 테이블과 (그룹, 이모지, 대소문자 무시 여부)를 반환합니다.
+    engine: app.py / myang_renew_app.py (seulsekwon_engine 기준, 시설 저장소)
+    utils: app2.py (utils.py 의 데이터 적재/분류 기준, 대소문자 구분)
+    """
+    if scheme == 'utils':
+        import utils
+        return utils.load_all_data(data_dir), (utils.CATEGORY_GROUPS, utils.EMOJI_MAP, False)
+    groups, emojis = seulsekwon_engine.CATEGORY_GROUPS, seulsekwon_engine.EMOJI_MAP
+    return facility_store.load_facilities(data_dir, groups, emojis), (groups, emojis, True)
+
+
+def build_grids(data_dir, radii, cell_m, scheme='engine'):
+    """
+    반경별로 서울 전역 격자의 그룹별 시설 수를 계산하여 data/cleaned/score_grid_{반경}m_{분류 기준}.npz 로 저장합니다.
+    """
+    facilities, (groups, emojis, ignore_case) = scheme_facilities(scheme, data_dir)
+    if facilities.empty:
+        print(f"Error: 시설 데이터가 없습니다 - {data_dir}")
+        return
+    index = spatial_index.GridIndex.from_frame(facilities)
+
+    start = time.time()
+
+    def progress(done, total):
+        print(f"\r[{scheme}] {done}/{total}행 ({time.time() - start:.0f}s)", end='', flush=True)
+
+    # 셀마다 가장 큰 반경으로 한 번만 조회하여 모든 반경의 격자를 함께 계산
+    grids = score_grid.build_score_grids(facilities, sorted(set(radii)), cell_m, index=index,
+                                         category_groups=groups, emoji_map=emojis, ignore_case=ignore_case,
+                                         progress=progress)
+    print()
+
+    for radius_m, grid in grids.items():
+        path = score_grid.default_grid_path(data_dir, radius_m, groups, emojis, ignore_case)
+        score_grid.save_score_grid(grid, path, data_dir, groups, emojis, ignore_case)
+        rows, cols = grid.shape
+        print(f"반경 {radius_m:g}m: 격자 {rows}x{cols} (시설 있는 셀 {int(grid.populated.sum()):,}개), "
+              f"서울 평균 {grid.average_total(seulsekwon_engine.DEFAULT_WEIGHTS)}점 -> {path} "
+              f"({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="서울 전역 격자의 슬세권 시설 수를 사전 계산합니다. (대시보드 서울 평균/백분위용)")
+    parser.add_argument('--data-dir', default=facility_store.default_data_dir(), help="원본 CSV 폴더 (기본: data/cleaned)")
+    parser.add_argument('--radius', type=float, nargs='+', default=[300, 500, 700, 1000, 1500],
+                        help="분석 반경(m) 목록 (기본: 대시보드 선택지 전체)")
+    parser.add_argument('--cell-m', type=float, default=score_grid.DEFAULT_GRID_CELL_M, help="격자 간격(m), 기본 250")
+    parser.add_argument('--scheme', nargs='+', choices=SCHEMES, default=list(SCHEMES),
+                        help="분류 기준 (engine: app.py/myang, utils: app2, 기본: 모두)")
+    args = parser.parse_args()
+
+    for scheme in args.scheme:
+        build_grids(args.data_dir, args.radius, args.cell_m, scheme)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import batch_scoring
+import facility_store
+import seulsekwon_engine
+import spatial_index
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow가 없으면 CSV 입출력만 사용합니다.
+    pa = None
+    pq = None
+
+# ==========================================
+# 여러 지점 슬세권 지수 일괄 계산
+# 위경도 목록(CSV/Parquet)을 청크 단위로 읽어 프로세스 풀에서 계산하고, (청크 안에서는 지점 묶음마다 배열 연산으로 한 번에 계산)
+# 결과(총점, 그룹별 점수/시설 수/달성률)를 입력 순서대로 바로 CSV/Parquet에 기록합니다.
+# 반경을 여러 개 주면 가장 큰 반경으로 한 번만 조회하여 반경별 결과 열(예: total_score_500m)을 함께 기록합니다.
+# 시설 데이터와 격자 공간 인덱스는 작업 프로세스마다 한 번만 받아 모든 청크에 재사용합니다. (batch_scoring)
+# ==========================================
+
+GROUP_NAMES = list(seulsekwon_engine.CATEGORY_GROUPS.keys())
+
+
+def radius_suffix(radius_m, radii):
+    """반경이 여러 개일 때만 열 이름에 반경을 붙입니다."""
+    return f'_{radius_m:g}m' if len(radii) > 1 else ''
+
+
+def result_columns(radii):
+    """결과 열 이름: 반경별 총점 + 그룹별 점수/시설 수/달성률"""
+    columns = []
+    for r in radii:
+        sfx = radius_suffix(r, radii)
+        columns += [f'total_score{sfx}'] + \
+            [f'score_{g}{sfx}' for g in GROUP_NAMES] + \
+            [f'count_{g}{sfx}' for g in GROUP_NAMES] + \
+            [f'progress_{g}{sfx}' for g in GROUP_NAMES]
+    return columns
+
+
+def score_points(lats, lons, weights, radii, facilities=None, index=None):
+    """
+    지점 목록의 슬세권 지수를 계산하여 결과 열 dict(열 이름: 배열)로 반환합니다.
+    주변 시설 목록은 만들지 않고 그룹별 시설 수를 지점 묶음 단위로 한 번에 세어 배열로 점수화합니다.
+    (calculate_index 와 같은 결과) 좌표가 비어 있는 지점은 NaN 으로 채웁니다.
+    facilities/index 를 주지 않으면 작업 프로세스의 시설 데이터(batch_scoring.init_worker)를 사용합니다.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    valid = np.isfinite(lats) & np.isfinite(lons)
+
+    if facilities is None:
+        counts = batch_scoring.count_chunk(lats, lons, radii)
+    else:
+        counts = seulsekwon_engine.facility_counts_batch(lats, lons, facilities, radii, index)
+    counts = counts.astype(np.float64)
+    caps = np.array([seulsekwon_engine.MAX_CAPS.get(g, seulsekwon_engine.DEFAULT_CAP) for g in GROUP_NAMES],
+                    dtype=np.float64)
+    w = np.array([weights.get(g, 0) for g in GROUP_NAMES], dtype=np.float64)
+    progress = np.minimum(counts, caps) / caps
+    scores = np.round(progress * w, 2)
+    totals = np.round(scores.sum(axis=2), 1)
+    counts[~valid] = np.nan
+
+    columns = {}
+    for j, r in enumerate(radii):
+        sfx = radius_suffix(r, radii)
+        columns[f'total_score{sfx}'] = np.where(valid, totals[:, j], np.nan)
+        for name, values in (('score', scores), ('count', counts), ('progress', progress)):
+            for k, g in enumerate(GROUP_NAMES):
+                columns[f'{name}_{g}{sfx}'] = np.where(valid, values[:, j, k], np.nan)
+    return {name: columns[name] for name in result_columns(radii)}
+
+
+def score_chunk(chunk, lat_col, lon_col, weights, radii):
+    """입력 청크 하나를 계산하여 입력 열 뒤에 결과 열을 붙인 데이터프레임을 반환합니다."""
+    lats = pd.to_numeric(chunk[lat_col], errors='coerce').to_numpy(dtype=np.float64)
+    lons = pd.to_numeric(chunk[lon_col], errors='coerce').to_numpy(dtype=np.float64)
+    result = chunk.reset_index(drop=True)
+    scored = pd.DataFrame(score_points(lats, lons, weights, radii))
+    for name in scored.columns:
+        if name.startswith('count_'):
+            scored[name] = scored[name].astype('Int32')
+    return pd.concat([result, scored], axis=1)
+
+
+def iter_chunks(input_path, columns, chunksize, encoding):
+    """입력 파일(CSV/Parquet)을 필요한 열만 청크 단위로 읽습니다."""
+    if input_path.lower().endswith('.parquet'):
+        if pq is None:
+            raise ImportError("Parquet 입력에는 pyarrow가 필요합니다.")
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, encoding=encoding, usecols=columns, chunksize=chunksize)
+
+
+class ResultWriter:
+    """결과 청크를 받는 즉시 CSV 또는 Parquet(행 그룹 단위) 파일에 이어 씁니다."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.is_parquet = output_path.lower().endswith('.parquet')
+        if self.is_parquet and pq is None:
+            raise ImportError("Parquet 출력에는 pyarrow가 필요합니다.")
+        self._parquet = None
+        self._started = False
+
+    def write(self, df):
+        if self.is_parquet:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        else:
+            df.to_csv(self.output_path, mode='a' if self._started else 'w', header=not self._started,
+                      index=False, encoding='utf-8' if self._started else 'utf-8-sig')
+        self._started = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def load_weights(weights):
+    """가중치 프로필(JSON 파일 경로 또는 JSON 문자열)을 읽습니다. 없으면 기본 가중치."""
+    if not weights:
+        return dict(seulsekwon_engine.DEFAULT_WEIGHTS)
+    if os.path.exists(weights):
+        with open(weights, encoding='utf-8') as f:
+            profile = json.load(f)
+    else:
+        profile = json.loads(weights)
+    unknown = set(profile) - set(GROUP_NAMES)
+    if unknown:
+        raise ValueError(f"알 수 없는 그룹 이름: {', '.join(sorted(unknown))}")
+    return {g: float(profile.get(g, 0)) for g in GROUP_NAMES}
+
+
+def bulk_score(input_path, output_path, lat_col='lat', lon_col='lon', keep_cols=(), radii=(500,),
+               weights=None, workers=None, chunksize=1000, encoding='utf-8-sig', data_dir=None):
+    """입력 지점 전체의 슬세권 지수를 계산하여 출력 파일에 기록합니다. 처리한 지점 수를 반환합니다."""
+    weights = weights or dict(seulsekwon_engine.DEFAULT_WEIGHTS)
+    radii = sorted(set(radii))
+    data_dir = data_dir or facility_store.default_data_dir()
+    workers = workers or os.cpu_count() or 1
+
+    facilities = facility_store.load_facilities(
+        data_dir, seulsekwon_engine.CATEGORY_GROUPS, seulsekwon_engine.EMOJI_MAP, ignore_case=True
+    )
+    if facilities.empty:
+        raise ValueError(f"시설 데이터가 없습니다 - {data_dir}")
+    index = spatial_index.GridIndex.from_frame(facilities)
+    print(f"시설 {len(facilities):,}건, 반경 {', '.join(f'{r:g}m' for r in radii)}, 작업 프로세스 {workers}개")
+
+    columns = list(dict.fromkeys(list(keep_cols) + [lat_col, lon_col]))
+    chunks = iter_chunks(input_path, columns, chunksize, encoding)
+    writer = ResultWriter(output_path)
+    n_points = 0
+    start = time.time()
+
+    def emit(df):
+        nonlocal n_points
+        writer.write(df)
+        n_points += len(df)
+        print(f"\r{n_points:,}건 처리 ({time.time() - start:.1f}s)", end='', flush=True)
+
+    try:
+        # 입력 순서대로 기록하면서 동시에 처리 중인 청크 수를 제한 (대용량 입력도 일정한 메모리)
+        tasks = ((chunk, lat_col, lon_col, weights, radii) for chunk in chunks)
+        for scored in batch_scoring.ordered_map(score_chunk, tasks, workers, (facilities, index)):
+            emit(scored)
+    finally:
+        writer.close()
+
+    print()
+    return n_points
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위경도 목록의 슬세권 지수를 일괄 계산하여 CSV/Parquet로 저장합니다.")
+    parser.add_argument('input', help="지점 목록 (CSV 또는 .parquet)")
+    parser.add_argument('output', help="결과 파일 (.csv 또는 .parquet)")
+    parser.add_argument('--lat-col', default='lat', help="위도 열 이름 (기본: lat)")
+    parser.add_argument('--lon-col', default='lon', help="경도 열 이름 (기본: lon)")
+    parser.add_argument('--keep-cols', default='', help="결과에 함께 남길 입력 열 (쉼표 구분, 예: BLDG_NM,CGG_NM)")
+    parser.add_argument('--radius', type=float, nargs='+', default=[500],
+                        help="분석 반경(m), 여러 개 지정 가능 (예: --radius 300 500 700 1000 1500), 기본 500")
+    parser.add_argument('--weights', default=None, help="그룹별 가중치 JSON 파일 또는 JSON 문자열 (기본: 앱 기본 가중치)")
+    parser.add_argument('--workers', type=int, default=None, help="작업 프로세스 수 (기본: CPU 수, 1이면 단일 프로세스)")
+    parser.add_argument('--chunksize', type=int, default=1000, help="작업 하나에 넘길 지점 수")
+    parser.add_argument('--encoding', default='utf-8-sig', help="입력 CSV 인코딩")
+    parser.add_argument('--data-dir', default=facility_store.default_data_dir(), help="시설 CSV 폴더 (기본: data/cleaned)")
+    args = parser.parse_args()
+
+    try:
+        weights = load_weights(args.weights)
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"Error: 가중치 프로필 오류 - {e}")
+        sys.exit(1)
+
+    keep_cols = [c.strip() for c in args.keep_cols.split(',') if c.strip()]
+    start = time.time()
+    n_points = bulk_score(args.input, args.output, args.lat_col, args.lon_col, keep_cols, args.radius,
+                          weights, args.workers, args.chunksize, args.encoding, args.data_dir)
+    print(f"지점 {n_points:,}건 -> {args.output} ({time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,34 @@
 
 import os
-import chardet
+import sys
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import csv_encoding
+
 
 def detect_encoding(file_path):
-    with open(file_path, 'rb') as f:
-        # 파일의 앞부분 10000바이트를 읽어서 인코딩을 감지합니다.
-        rawdata = f.read(10000)
-        result = chardet.detect(rawdata)
-        return result['encoding']
+    # BOM 확인 -> 앞부분 표본 디코딩(utf-8, cp949) -> chardet 순서로 판별하고 매니페스트에 기록합니다.
+    return csv_encoding.detect_encoding(file_path)
 
 def main():
     # 스크립트 위치(pj1/output)를 기준으로 데이터 폴더 경로 설정 (pj1/data)
     current_dir = os.path.dirname(os.path.abspath(__file__))
     data_dir = os.path.join(current_dir, '..', 'data')
     
-    # 데이터 디렉토리 내의 모든 CSV 파일을 찾습니다.
+    # 데이터 디렉토리 내의 모든 CSV 파일을 찾습니다. (하위 폴더 포함)
     if not os.path.exists(data_dir):
         print(f"Error: Directory not found - {data_dir}")
         return
 
-    for filename in os.listdir(data_dir):
-        if filename.lower().endswith('.csv'):
-            file_path = os.path.join(data_dir, filename)
-            encoding = detect_encoding(file_path)
-            print(f"{filename}: {encoding}")
+    for root, _, files in os.walk(data_dir):
+        for filename in sorted(files):
+            if filename.lower().endswith('.csv'):
+                file_path = os.path.join(root, filename)
+                encoding = detect_encoding(file_path)
+                print(f"{os.path.relpath(file_path, data_dir)}: {encoding}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import facility_store
+import seulsekwon_engine
+
+REAL_ESTATE_COLUMNS = ['RCPT_YR', 'CGG_NM', 'STDG_NM', 'BLDG_NM', 'THING_AMT', 'ARCH_AREA', 'latitude', 'longitude']
+
+
+def print_report(title, before, after):
+    report = facility_store.memory_report(before, after)
+    print(f"\n[{title}] {len(before):,}행 -> {len(after):,}행")
+    print(report.to_string(float_format=lambda v: f"{v:,.2f}"))
+
+
+def facility_report(data_dir):
+    """원본 CSV를 그대로 합친 테이블(문자열/float64)과 압축 스키마 시설 테이블을 비교합니다."""
+    groups, emojis = seulsekwon_engine.CATEGORY_GROUPS, seulsekwon_engine.EMOJI_MAP
+    before = facility_store.normalize_sources(data_dir)
+    if before.empty:
+        print(f"Error: 시설 데이터가 없습니다 - {data_dir}")
+        return
+    # 이전 앱이 메모리에 두던 형태: 파이썬 문자열(object) 열 + float64 좌표 + 그룹 코드
+    before = seulsekwon_engine.attach_category_codes(before, groups, emojis, ignore_case=True)
+    before = before.astype({'name': object, 'sub_category': object})
+    after = facility_store.build_facility_table(data_dir, groups, emojis)
+    print_report("시설 테이블", before, after)
+
+
+def real_estate_report(path):
+    """실거래가 CSV(대시보드가 읽는 열)의 기본 자료형과 압축 스키마를 비교합니다."""
+    before = pd.read_csv(path, usecols=REAL_ESTATE_COLUMNS)
+    before = before.dropna(subset=['latitude', 'longitude', 'THING_AMT', 'BLDG_NM'])
+    before['price_억'] = before['THING_AMT'] / 10000.0
+    before = before.astype({c: object for c in ['CGG_NM', 'STDG_NM', 'BLDG_NM']})
+    after = facility_store.compact_frame(before, category_cols=['CGG_NM', 'STDG_NM', 'BLDG_NM'])
+    print_report("실거래가", before, after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시설/실거래가 데이터의 기존 자료형과 압축 스키마의 메모리 사용량을 비교합니다.")
+    parser.add_argument('--data-dir', default=facility_store.default_data_dir(), help="시설 CSV 폴더 (기본: data/cleaned)")
+    parser.add_argument('--real-estate', default=None, help="실거래가 통합 CSV 경로 (지정 시 함께 비교)")
+    args = parser.parse_args()
+
+    facility_report(args.data_dir)
+    if args.real_estate:
+        real_estate_report(args.real_estate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import os
+import sys
+
+# scripts 폴더 기준으로 프로젝트 루트의 공통 모듈을 불러옵니다.
+PROJECT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+import dataset_manifest
+import facility_store
+import seulsekwon_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="data/cleaned 의 CSV가 dataset_manifest 선언(인코딩/열/좌표계)과 일치하는지 검사합니다.")
+    parser.add_argument('--data-dir', default=facility_store.default_data_dir(), help="시설 CSV 폴더 (기본: data/cleaned)")
+    parser.add_argument('--sample-rows', type=int, default=None, help="파일마다 앞쪽 N행만 검사 (기본: 전체)")
+    parser.add_argument('--strict', action='store_true', help="경고(warning)도 실패로 처리")
+    args = parser.parse_args()
+
+    failed = ('error', 'warning') if args.strict else ('error',)
+    n_failed = 0
+    for file, spec in dataset_manifest.DATASETS.items():
+        issues = dataset_manifest.validate_dataset(os.path.join(args.data_dir, file), spec,
+                                                   seulsekwon_engine.CATEGORY_GROUPS, sample_rows=args.sample_rows)
+        print(f"{'OK  ' if all(s == 'info' for s, _ in issues) else 'DIFF'} {file} ({spec['encoding']}, {spec['crs']})")
+        for severity, message in issues:
+            print(f"     [{severity}] {message}")
+        n_failed += any(severity in failed for severity, _ in issues)
+
+    if n_failed:
+        print(f"\n선언과 다른 파일 {n_failed}개")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 슬세권 공통 분석 엔진
+# app.py / utils.py / myang_renew_app.py 가 함께 사용하는 거리 계산 / 카테고리 분류 / 지수 계산 모듈입니다.
+# ==========================================
+
+# 평균 지구 반지름 (IUGG, m)
+EARTH_RADIUS_M = 6371008.8
+
+# WGS84 타원체 상수 (geopy.distance.geodesic 기본 타원체와 동일)
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+# 위도 1도의 최소 길이(적도 기준, m) - 사각형 필터가 반경을 잘라내지 않도록 여유 있게 사용합니다.
+METERS_PER_LAT_DEG_MIN = 110574.0
+METERS_PER_LON_DEG_EQUATOR = 111320.0
+
+DEFAULT_EMOJI = "📍"
+
+# 시설 분류 기준 (app.py / myang_renew_app.py 공통)
+EMOJI_MAP = {
+    "스타벅스": "☕", "카페": "☕", "편의점": "🏪", "세탁소": "🏪", "마트": "🏪", "대형마트": "🏬",
+    "백화점": "🏬", "버스": "🚌", "bus": "🚌", "정류장": "🚌", "정류소": "🚌",
+    "지하철": "🚇", "metro": "🚇", "역": "🚇", "병원": "🏥", "의원": "💊",
+    "약국": "💊", "경찰": "🚓", "파출소": "🚓", "도서관": "📚", "서점": "📚",
+    "학교": "🏫", "공원": "🌳", "park": "🌳", "체육": "🏋️", "운동": "🏋️", "은행": "🏦", "금융": "🏦"
+}
+
+CATEGORY_GROUPS = {
+    "생활/편의🏪": ["스타벅스", "편의점", "세탁소", "마트", "대형마트", "백화점", "카페"],
+    "교통🚌": ["버스", "지하철", "정류장", "정류소", "역", "bus", "metro"],
+    "의료💊": ["병원", "의원", "약국", "치과", "한의원"],
+    "안전/치안🚨": ["경찰", "파출소", "치안", "소방", "119"],
+    "교육/문화📚": ["도서관", "서점", "학교", "유치원", "학원"],
+    "자연/여가🌳": ["공원", "체육", "운동", "산책", "park"],
+    "금융🏦": ["은행", "금융", "ATM"]
+}
+
+# 카테고리별 정상 기여 최대치 (도심 내 500m 반경 기준)
+MAX_CAPS = {
+    "생활/편의🏪": 15, "교통🚌": 8, "의료💊": 5,
+    "안전/치안🚨": 1, "교육/문화📚": 2, "자연/여가🌳": 2, "금융🏦": 3
+}
+DEFAULT_CAP = 5
+
+DEFAULT_WEIGHTS = {
+    "생활/편의🏪": 30, "교통🚌": 20, "의료💊": 15, "안전/치안🚨": 10,
+    "교육/문화📚": 5, "자연/여가🌳": 15, "금융🏦": 5
+}
+
+# 대시보드 반경 선택지 (m) - 가장 큰 반경으로 한 번만 조회하고 나머지는 거리 배열에서 나눕니다.
+RADIUS_OPTIONS = [300, 500, 700, 1000, 1500]
+
+# 여러 지점 일괄 계산(facility_counts_batch)에서 한 번에 (지점, 시설) 쌍을 만드는 지점 수
+BATCH_POINTS = 256
+
+# 같은 그룹의 같은 이름 시설이 이 거리(m) 안에 있으면 중복으로 봅니다. (데이터 적재 시 1회 제거)
+DUPLICATE_TOLERANCE_M = 5.0
+
+
+def haversine_m(center_lat, center_lon, lats, lons):
+    """기준점과 좌표 배열 사이의 구면(하버사인) 거리(m)를 한 번에 계산합니다."""
+    lat1 = np.radians(center_lat)
+    lon1 = np.radians(center_lon)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def ellipsoid_distance_m(center_lat, center_lon, lats, lons):
+    """
+    WGS84 타원체의 곡률 반경으로 보정한 거리(m)를 계산합니다.
+    두 점의 중간 위도에서 자오선/묘유선 곡률 반경을 구해 평면 거리로 합성하므로,
+    분석 반경(수 km) 안에서는 geodesic 결과와 mm 단위로 일치합니다.
+    """
+    lat1 = np.radians(center_lat)
+    lon1 = np.radians(center_lon)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+
+    mid_lat = (lat1 + lat2) / 2.0
+    sin_mid = np.sin(mid_lat)
+    w = np.sqrt(1.0 - WGS84_E2 * sin_mid ** 2)
+    meridian_r = WGS84_A * (1.0 - WGS84_E2) / w ** 3   # 자오선 곡률 반경 M
+    normal_r = WGS84_A / w                             # 묘유선 곡률 반경 N
+
+    dy = meridian_r * (lat2 - lat1)
+    dx = normal_r * np.cos(mid_lat) * (lon2 - lon1)
+    return np.hypot(dx, dy)
+
+
+def distances_m(center_lat, center_lon, lats, lons, exact=False):
+    """
+    거리 계산 커널입니다.
+    exact=False 이면 하버사인(구면), exact=True 이면 타원체 보정 거리를 반환합니다.
+    """
+    if exact:
+        return ellipsoid_distance_m(center_lat, center_lon, lats, lons)
+    return haversine_m(center_lat, center_lon, lats, lons)
+
+
+def bbox_margins(center_lat, radius_m):
+    """반경을 빠짐없이 덮는 위도/경도 여유폭(도)을 반환합니다."""
+    lat_margin = radius_m / METERS_PER_LAT_DEG_MIN
+    lon_margin = radius_m / (METERS_PER_LON_DEG_EQUATOR * np.maximum(np.cos(np.radians(center_lat)), 1e-6))
+    return lat_margin, lon_margin
+
+
+def within_radius(center_lat, center_lon, data, radius_m, exact=False, lat_col='lat', lon_col='lon', index=None):
+    """
+    반경 안의 행만 'distance' 열과 함께 반환합니다. (원본 행 순서 유지)
+    index(spatial_index.GridIndex)가 주어지면 격자 인덱스로 후보를 찾고,
+    없으면 사각형 범위로 후보를 좁힌 뒤 전체 후보의 거리를 한 번에 계산합니다.
+    """
+    if data.empty or lat_col not in data.columns:
+        empty = data.iloc[0:0].copy()
+        empty['distance'] = np.empty(0, dtype=np.float64)
+        return empty
+
+    if index is not None and len(index) == len(data):
+        positions, dist = index.query(center_lat, center_lon, radius_m, exact=exact)
+        # assign 은 Copy-on-Write 환경에서 원본 열을 복사하지 않고 거리 열만 붙입니다.
+        return data.iloc[positions].assign(distance=dist)
+
+    lat_margin, lon_margin = bbox_margins(center_lat, radius_m)
+    lats = data[lat_col].to_numpy(dtype=np.float64)
+    lons = data[lon_col].to_numpy(dtype=np.float64)
+    mask = (np.abs(lats - center_lat) <= lat_margin) & (np.abs(lons - center_lon) <= lon_margin)
+
+    candidates = data[mask]
+    dist = distances_m(center_lat, center_lon, lats[mask], lons[mask], exact=exact)
+    inside = dist <= radius_m
+
+    return candidates[inside].assign(distance=dist[inside])
+
+
+# ==========================================
+# 카테고리 사전 분류 (로드 시 1회)
+# ==========================================
+
+def _group_mask_dtype(n_groups):
+    """그룹 수에 맞는 가장 작은 비트마스크 정수형을 반환합니다."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_groups < np.iinfo(dtype).bits:
+            return dtype
+    return np.int64
+
+
+def classify_categories(sub_categories, category_groups, emoji_map, ignore_case=False):
+    """
+    sub_category 값마다 소속 그룹 비트마스크와 이모지를 계산합니다.
+    고유값 단위로 한 번만 문자열 매칭을 수행하고 행에는 정수 코드로 펼칩니다.
+    - 그룹: 키워드가 부분 문자열로 포함되면 해당 그룹 비트를 켭니다. (여러 그룹 동시 소속 가능)
+    - 이모지: EMOJI_MAP 순서대로 처음 일치한 키의 이모지를 사용합니다.
+    """
+    codes, uniques = pd.factorize(pd.Series(sub_categories), use_na_sentinel=False)
+    group_keywords = list(category_groups.values())
+    emojis = list(dict.fromkeys(list(emoji_map.values()) + [DEFAULT_EMOJI]))
+
+    unique_masks = np.zeros(len(uniques), dtype=np.int64)
+    unique_emojis = np.zeros(len(uniques), dtype=np.int8)
+    for u, value in enumerate(uniques):
+        text = str(value)
+        folded = text.lower() if ignore_case else text
+        for g, keywords in enumerate(group_keywords):
+            if any((str(kw).lower() if ignore_case else str(kw)) in folded for kw in keywords):
+                unique_masks[u] |= 1 << g
+        emoji = next((e for key, e in emoji_map.items() if key in text), DEFAULT_EMOJI)
+        unique_emojis[u] = emojis.index(emoji)
+
+    group_mask = unique_masks[codes].astype(_group_mask_dtype(len(group_keywords)))
+    emoji = pd.Categorical.from_codes(unique_emojis[codes], categories=emojis)
+    return group_mask, emoji
+
+
+def attach_category_codes(data, category_groups, emoji_map, ignore_case=False):
+    """데이터프레임에 group_mask(정수 비트마스크)와 emoji(범주형) 열을 추가합니다."""
+    data = data.copy()
+    if data.empty or 'sub_category' not in data.columns:
+        data['group_mask'] = np.zeros(len(data), dtype=_group_mask_dtype(len(category_groups)))
+        data['emoji'] = pd.Categorical([DEFAULT_EMOJI] * len(data))
+        return data
+    data['group_mask'], data['emoji'] = classify_categories(data['sub_category'], category_groups, emoji_map, ignore_case)
+    return data
+
+
+def group_members(group_mask, n_groups):
+    """각 행이 속한 (행 위치, 그룹 번호) 쌍을 행 순서대로 반환합니다."""
+    group_mask = np.asarray(group_mask, dtype=np.int64)
+    bits = (group_mask[:, None] >> np.arange(n_groups)) & 1
+    return np.nonzero(bits)
+
+
+def group_counts(group_mask, n_groups):
+    """그룹별 시설 수를 np.bincount 로 한 번에 집계합니다."""
+    _, groups = group_members(group_mask, n_groups)
+    return np.bincount(groups, minlength=n_groups)
+
+
+def facilities_by_group(inside, category_groups, emoji_map, ignore_case=False):
+    """
+    반경 내 시설을 그룹별 레코드 목록으로 나누고 그룹별 개수를 함께 반환합니다.
+    group_mask 열이 없으면(사전 분류되지 않은 데이터) 이 자리에서 분류합니다.
+    """
+    if 'group_mask' not in inside.columns:
+        inside = attach_category_codes(inside, category_groups, emoji_map, ignore_case)
+
+    group_names = list(category_groups.keys())
+    rows, groups = group_members(inside['group_mask'].to_numpy(), len(group_names))
+    records = inside.drop(columns=['group_mask']).to_dict('records')
+
+    by_group = {name: [] for name in group_names}
+    for r, g in zip(rows, groups):
+        record = dict(records[r])
+        record['group'] = group_names[g]
+        by_group[group_names[g]].append(record)
+
+    counts = np.bincount(groups, minlength=len(group_names))
+    return by_group, {name: int(counts[g]) for g, name in enumerate(group_names)}
+
+
+# ==========================================
+# 중복 시설 제거 (데이터 적재 시 1회)
+# ==========================================
+
+def nearby_duplicate_mask(names, lats, lons, keys=None, tolerance_m=DUPLICATE_TOLERANCE_M):
+    """
+    같은 이름(+ 같은 키)의 시설이 서로 tolerance_m 미만 거리에 있으면 먼저 나온 행만 남기는 마스크를 반환합니다.
+    좌표를 tolerance_m 크기 셀로 스냅하여 (이름, 키, 셀) 해시 버킷에 넣고 주변 3x3 셀만 비교하므로 선형 시간입니다.
+    """
+    names = np.asarray(names, dtype=object)
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    keys = np.zeros(len(names), dtype=np.int8) if keys is None else np.asarray(keys)
+    keep = np.ones(len(names), dtype=bool)
+    if not len(names):
+        return keep
+
+    # 가장 높은 위도 기준으로 셀 크기를 정해 모든 셀이 tolerance_m 이상이 되도록 합니다.
+    dlat, dlon = bbox_margins(float(np.nanmax(np.abs(lats))), tolerance_m)
+    rows = np.floor(lats / dlat).astype(np.int64)
+    cols = np.floor(lons / dlon).astype(np.int64)
+
+    buckets = {}
+    for i in range(len(names)):
+        name, key, r, c = names[i], keys[i], rows[i], cols[i]
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                for j in buckets.get((name, key, r + dr, c + dc), ()):
+                    if haversine_m(lats[i], lons[i], lats[j], lons[j]) < tolerance_m:
+                        keep[i] = False
+                        break
+                if not keep[i]:
+                    break
+            if not keep[i]:
+                break
+        if keep[i]:
+            buckets.setdefault((name, key, r, c), []).append(i)
+    return keep
+
+
+def drop_nearby_duplicates(data, tolerance_m=DUPLICATE_TOLERANCE_M, key_col='group_mask'):
+    """
+    같은 그룹(key_col)에서 이름이 같고 tolerance_m 안에 있는 시설을 제거합니다.
+    적재 시 한 번 수행하므로 반경 질의 경로에서는 중복 제거를 하지 않습니다.
+    """
+    if data.empty or 'name' not in data.columns:
+        return data
+    keys = data[key_col].to_numpy() if key_col in data.columns else None
+    keep = nearby_duplicate_mask(data['name'].astype(str).to_numpy(), data['lat'].to_numpy(),
+                                 data['lon'].to_numpy(), keys, tolerance_m)
+    return data[keep].reset_index(drop=True)
+
+
+# ==========================================
+# 슬세권 지수 계산 (Streamlit 없이 사용 가능)
+# 시설 데이터는 적재 시 drop_nearby_duplicates 로 중복이 제거되어 있어야 합니다.
+# ==========================================
+
+def score_counts(counts, weights, max_caps=None):
+    """
+    가중치 단계: 그룹별 시설 수에 기준치(max_caps)와 가중치를 적용합니다.
+    반환값: (총점, 그룹별 점수, 그룹별 달성률)
+    """
+    max_caps = MAX_CAPS if max_caps is None else max_caps
+    scores, raw_progress = {}, {}
+    for g_name, count in counts.items():
+        cap = max_caps.get(g_name, DEFAULT_CAP)
+        progress = min(count, cap) / cap
+        raw_progress[g_name] = progress
+        scores[g_name] = round(progress * weights.get(g_name, 0), 2)
+    return round(sum(scores.values()), 1), scores, raw_progress
+
+
+def facility_counts_radii(center_lat, center_lon, data, radii, index=None,
+                          category_groups=CATEGORY_GROUPS, emoji_map=EMOJI_MAP, ignore_case=True):
+    """
+    여러 반경의 그룹별 시설 수를 한 번의 조회로 계산합니다. 반환값: {반경: 그룹별 시설 수}
+    가장 큰 반경으로 조회한 뒤 그룹별 정렬된 거리 배열을 searchsorted 로 나눕니다.
+    주변 시설 레코드를 만들지 않으므로 여러 지점을 일괄 계산할 때 사용합니다.
+    """
+    inside = within_radius(center_lat, center_lon, data, max(radii), exact=True, index=index)
+    if 'group_mask' not in inside.columns:
+        inside = attach_category_codes(inside, category_groups, emoji_map, ignore_case)
+
+    group_names = list(category_groups.keys())
+    rows, groups = group_members(inside['group_mask'].to_numpy(), len(group_names))
+    dist = inside['distance'].to_numpy()
+
+    counts = {r: {} for r in radii}
+    for g, g_name in enumerate(group_names):
+        group_dist = np.sort(dist[rows[groups == g]])
+        for r in radii:
+            counts[r][g_name] = int(np.searchsorted(group_dist, r, side='right'))
+    return counts
+
+
+def facility_counts_batch(lats, lons, data, radii, index, category_groups=CATEGORY_GROUPS, emoji_map=EMOJI_MAP,
+                          ignore_case=True, batch_size=BATCH_POINTS):
+    """
+    여러 지점의 반경별 그룹 시설 수를 (지점 x 반경 x 그룹) 정수 배열로 계산합니다.
+    batch_size 지점씩 격자 인덱스(index)로 (지점, 시설) 쌍을 한 번에 만들고, 반경마다 (지점, 그룹) 별 개수를
+    np.bincount 한 번으로 셉니다. 좌표가 없는 지점은 0 입니다. (지점마다 facility_counts_radii 를 호출한 결과와 같음)
+    """
+    if 'group_mask' not in data.columns:
+        data = attach_category_codes(data, category_groups, emoji_map, ignore_case)
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    n_groups = len(category_groups)
+    masks = data['group_mask'].to_numpy(dtype=np.int64)
+    counts = np.zeros((len(lats), len(radii), n_groups), dtype=np.int64)
+
+    for start in range(0, len(lats), batch_size):
+        stop = min(start + batch_size, len(lats))
+        points, positions, dist = index.query_many(lats[start:stop], lons[start:stop], max(radii), exact=True)
+        pairs, groups = group_members(masks[positions], n_groups)
+        slots = points[pairs] * n_groups + groups
+        dist = dist[pairs]
+        for j, r in enumerate(radii):
+            inside = dist <= r
+            counts[start:stop, j] = np.bincount(slots[inside], minlength=(stop - start) * n_groups) \
+                .reshape(stop - start, n_groups)
+    return counts
+
+
+def facility_counts(center_lat, center_lon, data, radius_m, index=None,
+                    category_groups=CATEGORY_GROUPS, emoji_map=EMOJI_MAP, ignore_case=True):
+    """반경 하나의 그룹별 시설 수만 계산합니다."""
+    return facility_counts_radii(center_lat, center_lon, data, [radius_m], index,
+                                 category_groups, emoji_map, ignore_case)[radius_m]
+
+
+def analyze_location(center_lat, center_lon, data, radius_m, index=None,
+                     category_groups=CATEGORY_GROUPS, emoji_map=EMOJI_MAP, ignore_case=True):
+    """
+    위치 단계: 반경 내 시설을 그룹별로 나눕니다. (가중치와 무관)
+    반환값: (그룹별 시설 수, 거리순 주변 시설 목록)
+    """
+    # 공간 인덱스(없으면 사각형 범위) + 벡터화 거리 계산 (그룹 루프 밖에서 한 번만 수행)
+    inside = within_radius(center_lat, center_lon, data, radius_m, exact=True, index=index)
+    by_group, counts = facilities_by_group(inside, category_groups, emoji_map, ignore_case)
+
+    nearby = []
+    for g_name in category_groups:
+        nearby.extend(by_group[g_name])
+    return counts, sorted(nearby, key=lambda x: x['distance'])
+
+
+def analyze_location_radii(center_lat, center_lon, data, radii=RADIUS_OPTIONS, index=None,
+                           category_groups=CATEGORY_GROUPS, emoji_map=EMOJI_MAP, ignore_case=True):
+    """
+    여러 반경의 위치 단계를 가장 큰 반경 한 번의 조회로 계산합니다.
+    반환값: {반경: (그룹별 시설 수, 거리순 주변 시설 목록)}
+    """
+    _, nearby = analyze_location(center_lat, center_lon, data, max(radii), index,
+                                 category_groups, emoji_map, ignore_case)
+    dist = np.array([f['distance'] for f in nearby], dtype=np.float64)
+    group_dist = {g: dist[[i for i, f in enumerate(nearby) if f['group'] == g]] for g in category_groups}
+
+    result = {}
+    for r in radii:
+        counts = {g: int(np.searchsorted(group_dist[g], r, side='right')) for g in category_groups}
+        result[r] = (counts, nearby[:int(np.searchsorted(dist, r, side='right'))])
+    return result
+
+
+def calculate_index(center_lat, center_lon, data, weights, radius_m, index=None, max_caps=None,
+                    category_groups=CATEGORY_GROUPS, emoji_map=EMOJI_MAP, ignore_case=True):
+    """
+    한 지점의 슬세권 지수를 계산합니다. (위치 단계 + 가중치 단계)
+    반환값: (총점, 그룹별 점수, 그룹별 시설 수, 거리순 주변 시설 목록, 그룹별 달성률)
+    """
+    counts, nearby = analyze_location(center_lat, center_lon, data, radius_m, index,
+                                      category_groups, emoji_map, ignore_case)
+    total, scores, raw_progress = score_counts(counts, weights, max_caps)
+    return total, scores, counts, nearby, raw_progress
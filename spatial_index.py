@@ -0,0 +1,148 @@
+import numpy as np
+
+import seulsekwon_engine
+
+# ==========================================
+# 균일 격자 공간 인덱스
+# 데이터 로드 직후 한 번만 만들어 두고 반경 질의에 재사용합니다.
+# (앱에서는 st.cache_resource 로 모든 세션이 같은 인덱스를 공유합니다.)
+# ==========================================
+
+DEFAULT_CELL_M = 250.0
+
+
+class GridIndex:
+    """위경도 좌표를 일정 크기(m)의 격자 셀로 나누어 정렬해 둔 공간 인덱스입니다."""
+
+    def __init__(self, lats, lons, cell_m=DEFAULT_CELL_M):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        self.size = len(lats)
+        self.cell_m = float(cell_m)
+
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        positions = np.flatnonzero(valid)
+
+        if positions.size:
+            self.lat0 = float(lats[valid].min())
+            self.lon0 = float(lons[valid].min())
+            ref_lat = float(lats[valid].mean())
+        else:
+            self.lat0, self.lon0, ref_lat = 0.0, 0.0, 0.0
+
+        # 셀 한 칸의 위도/경도 크기(도)
+        self.dlat, self.dlon = seulsekwon_engine.bbox_margins(ref_lat, self.cell_m)
+
+        rows = np.floor((lats[valid] - self.lat0) / self.dlat).astype(np.int64)
+        cols = np.floor((lons[valid] - self.lon0) / self.dlon).astype(np.int64)
+        self.n_rows = int(rows.max()) + 1 if rows.size else 0
+        self.n_cols = int(cols.max()) + 1 if cols.size else 0
+
+        # 셀 번호 순으로 정렬해 두면 한 행(row)의 연속된 셀들이 하나의 구간이 됩니다.
+        keys = rows * self.n_cols + cols
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.positions = positions[order]
+        self.lats = lats[self.positions]
+        self.lons = lons[self.positions]
+
+    @classmethod
+    def from_frame(cls, data, lat_col='lat', lon_col='lon', cell_m=DEFAULT_CELL_M):
+        """데이터프레임의 위경도 열로 인덱스를 생성합니다."""
+        if data.empty or lat_col not in data.columns:
+            return cls(np.empty(0), np.empty(0), cell_m)
+        return cls(data[lat_col].to_numpy(dtype=np.float64), data[lon_col].to_numpy(dtype=np.float64), cell_m)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.positions.nbytes + self.lats.nbytes + self.lons.nbytes
+
+    def freeze(self):
+        """인덱스 배열을 쓰기 금지로 고정합니다. (세션 간 공유용)"""
+        for values in (self.keys, self.positions, self.lats, self.lons):
+            values.flags.writeable = False
+        return self
+
+    def _candidate_slots(self, center_lat, center_lon, radius_m):
+        """반경을 덮는 셀들에 속한 정렬 배열상의 위치를 반환합니다."""
+        if self.n_rows == 0:
+            return np.empty(0, dtype=np.int64)
+
+        lat_margin, lon_margin = seulsekwon_engine.bbox_margins(center_lat, radius_m)
+        r0 = max(int(np.floor((center_lat - lat_margin - self.lat0) / self.dlat)), 0)
+        r1 = min(int(np.floor((center_lat + lat_margin - self.lat0) / self.dlat)), self.n_rows - 1)
+        c0 = max(int(np.floor((center_lon - lon_margin - self.lon0) / self.dlon)), 0)
+        c1 = min(int(np.floor((center_lon + lon_margin - self.lon0) / self.dlon)), self.n_cols - 1)
+        if r0 > r1 or c0 > c1:
+            return np.empty(0, dtype=np.int64)
+
+        row_ids = np.arange(r0, r1 + 1, dtype=np.int64)
+        starts = np.searchsorted(self.keys, row_ids * self.n_cols + c0, side='left')
+        ends = np.searchsorted(self.keys, row_ids * self.n_cols + c1, side='right')
+        spans = [np.arange(s, e) for s, e in zip(starts, ends) if e > s]
+        if not spans:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(spans)
+
+    def query_many(self, lats, lons, radius_m, exact=False):
+        """
+        여러 지점의 반경 질의를 한 번에 수행합니다. 지점마다 반경을 덮는 셀 행 구간을 배열로 찾아
+        (지점, 후보) 쌍을 만든 뒤 거리를 한 번에 계산합니다. 좌표가 없는 지점은 건너뜁니다.
+        반환값: 반경 안 (지점 번호, 원본 행 위치, 거리(m)) 배열 - 지점 번호 순
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        if self.n_rows == 0 or not valid.any():
+            return empty
+
+        lat_margin, lon_margin = seulsekwon_engine.bbox_margins(np.where(valid, lats, 0.0), radius_m)
+        with np.errstate(invalid='ignore'):
+            r0 = np.floor((lats - lat_margin - self.lat0) / self.dlat)
+            r1 = np.floor((lats + lat_margin - self.lat0) / self.dlat)
+            c0 = np.floor((lons - lon_margin - self.lon0) / self.dlon)
+            c1 = np.floor((lons + lon_margin - self.lon0) / self.dlon)
+        r0 = np.where(valid, np.maximum(r0, 0), 0).astype(np.int64)
+        r1 = np.where(valid, np.minimum(r1, self.n_rows - 1), -1).astype(np.int64)
+        c0 = np.where(valid, np.maximum(c0, 0), 0).astype(np.int64)
+        c1 = np.where(valid, np.minimum(c1, self.n_cols - 1), -1).astype(np.int64)
+
+        # (지점 x 셀 행) 구간의 시작/끝 위치를 한 번에 찾습니다.
+        span_rows = int(max((r1 - r0).max() + 1, 0))
+        row_ids = r0[:, None] + np.arange(span_rows)
+        starts = np.searchsorted(self.keys, (row_ids * self.n_cols + c0[:, None]).ravel(), side='left')
+        ends = np.searchsorted(self.keys, (row_ids * self.n_cols + c1[:, None]).ravel(), side='right')
+        in_span = ((row_ids <= r1[:, None]) & (c0 <= c1)[:, None]).ravel()
+        lengths = np.where(in_span, np.maximum(ends - starts, 0), 0)
+        total = int(lengths.sum())
+        if total == 0:
+            return empty
+
+        # 구간들을 펼쳐 (지점, 정렬 배열상 위치) 쌍으로 만듭니다.
+        points = np.repeat(np.repeat(np.arange(len(lats)), span_rows), lengths)
+        slots = np.repeat(starts, lengths) + np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+        dist = seulsekwon_engine.distances_m(lats[points], lons[points], self.lats[slots], self.lons[slots],
+                                             exact=exact)
+        inside = dist <= radius_m
+        return points[inside], self.positions[slots[inside]], dist[inside]
+
+    def query(self, center_lat, center_lon, radius_m, exact=False):
+        """
+        반경 안에 있는 원본 행 위치(iloc)와 거리(m)를 원본 행 순서대로 반환합니다.
+        """
+        slots = self._candidate_slots(center_lat, center_lon, radius_m)
+        if slots.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        dist = seulsekwon_engine.distances_m(center_lat, center_lon, self.lats[slots], self.lons[slots], exact=exact)
+        inside = dist <= radius_m
+        positions = self.positions[slots[inside]]
+        dist = dist[inside]
+
+        order = np.argsort(positions, kind='stable')
+        return positions[order], dist[order]
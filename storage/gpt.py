@@ -10,10 +10,13 @@ import plotly.express as px
 from streamlit_folium import st_folium
 import numpy as np
 import os
-import requests
 import re
 from math import radians, cos, sin, asin, sqrt
 from dotenv import load_dotenv
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import kakao_geo
 
 # ============================================================
 # 1. CONFIGURATION
@@ -51,7 +54,6 @@ CATEGORY_CAPS = {
 class KakaoLocalAPI:
     def __init__(self):
         self.api_key = self._get_key()
-        self.headers = {"Authorization": f"KakaoAK {self.api_key}"} if self.api_key else {}
 
     def _get_key(self):
         try:
@@ -65,20 +67,17 @@ class KakaoLocalAPI:
         if not self.api_key:
             return None
 
-        url = "https://dapi.kakao.com/v2/local/search/keyword.json"
+        # 루트의 공용 지오코딩 클라이언트 사용 (커넥션 풀 + 동시 검색 + 디스크 캐시)
         try:
-            res = requests.get(url, headers=self.headers, params={"query": query})
-            if res.status_code == 200:
-                data = res.json()
-                if data["documents"]:
-                    doc = data["documents"][0]
-                    return {
-                        "name": doc.get("address_name", query),
-                        "lat": float(doc["y"]),
-                        "lon": float(doc["x"])
-                    }
-        except:
-            pass
+            doc = kakao_geo.get_geocoder(self.api_key).geocode(query)
+        except Exception:
+            return None
+        if doc:
+            return {
+                "name": doc["address_name"],
+                "lat": doc["lat"],
+                "lon": doc["lng"]
+            }
         return None
 
 # ============================================================
@@ -9,6 +9,12 @@ import requests
 import re
 from math import radians, cos, sin, asin, sqrt
 from dotenv import load_dotenv
+import sys
+
+# 리팩토링 노트: 루트 폴더의 공통 분석 엔진을 불러오기 위해 상위 경로를 추가합니다.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import seulsekwon_engine
+import spatial_index
 
 # .env 파일 로드 (카카오 API 키 등 보안 변수 관리용)
 # 초보자 팁: .env 파일은 API 키처럼 노출되면 안 되는 정보를 저장하는 비밀 장부입니다.
@@ -196,6 +202,11 @@ CURRENT_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "data/cleaned")
 raw_df = load_and_preprocess_data(DATA_DIR)
 
+@st.cache_resource
+def load_spatial_index(data_dir):
+    """통합 데이터의 격자 공간 인덱스를 한 번만 만들어 모든 세션이 공유합니다."""
+    return spatial_index.GridIndex.from_frame(load_and_preprocess_data(data_dir))
+
 # --- 사이드바: 검색 및 설정 ---
 st.sidebar.title("🔍 슬세권 주소 검색")
 kakao_handler = KakaoLocalHandler()
@@ -266,9 +277,8 @@ def calculate_seulsekwon_index(df_final, weights):
 
 # --- 데이터 필터링 및 분석 실행 ---
 if not raw_df.empty:
-    # 하버사인 공식을 사용하여 기준 위치 주변 시설만 추출
-    mask = raw_df.apply(lambda r: haversine(target_lon, target_lat, r['lon'], r['lat']) <= radius_km, axis=1)
-    df_final = raw_df[mask].copy()
+    # 격자 공간 인덱스로 기준 위치 주변 시설만 추출 (전체 행 하버사인 계산 제거)
+    df_final = seulsekwon_engine.within_radius(target_lat, target_lon, raw_df, radius_km * 1000, index=load_spatial_index(DATA_DIR))
     
     weights = {"traffic": w_traffic, "life": w_life, "safety": w_safety, "culture": w_culture}
     final_index, group_scores = calculate_seulsekwon_index(df_final, weights)
@@ -0,0 +1,39 @@
+import importlib.util
+import os
+
+# ==========================================
+# scripts/batch_geocode.py 이어 쓰기(재시작) 테스트
+# ==========================================
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'batch_geocode.py')
+
+
+def load_batch_script():
+    spec = importlib.util.spec_from_file_location('batch_geocode', SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_partial_trailing_line_is_dropped_before_resuming(tmp_path):
+    batch_geocode = load_batch_script()
+    output = tmp_path / "out.csv"
+    complete = "\ufeffrow_id,query,address_name,lat,lng,status\r\n0,강남역,서울 강남구 역삼동 858,37.4979,127.0276,ok\r\n"
+    output.write_bytes((complete + "1,역삼역,서울 강남구").encode('utf-8'))
+
+    assert batch_geocode.truncate_partial_line(str(output)) > 0
+    assert output.read_bytes() == complete.encode('utf-8')
+    assert batch_geocode.load_done_rows(str(output)) == {0}
+
+    # 완전한 파일은 그대로 둡니다.
+    assert batch_geocode.truncate_partial_line(str(output)) == 0
+
+
+def test_partial_header_leaves_an_empty_file(tmp_path):
+    batch_geocode = load_batch_script()
+    output = tmp_path / "out.csv"
+    output.write_bytes("\ufeffrow_id,qu".encode('utf-8'))
+
+    batch_geocode.truncate_partial_line(str(output))
+    assert output.stat().st_size == 0
+    assert batch_geocode.load_done_rows(str(output)) == set()
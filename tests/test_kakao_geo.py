@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+import kakao_geo
+
+# ==========================================
+# kakao_geo 지오코딩 클라이언트 테스트 (로컬 스텁 HTTP 서버 사용)
+# ==========================================
+
+KEYWORD_DOC = {"address_name": "서울 강남구 역삼동 858", "place_name": "강남역 2호선", "x": "127.0276", "y": "37.4979"}
+ADDRESS_DOC = {"address_name": "서울 강남구 강남대로 396", "x": "127.0286", "y": "37.4982"}
+
+
+class StubKakao:
+    """경로별 응답(상태 코드, 문서 목록, 지연 초)을 지정할 수 있는 스텁 서버입니다."""
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                stub.calls.append(path)
+                status, documents, delay = stub.routes.get(path, (200, [], 0))
+                time.sleep(delay)
+                body = json.dumps({"documents": documents}).encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:  # 클라이언트가 시간 초과로 먼저 연결을 끊은 경우
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def route(self, path, status=200, documents=(), delay=0):
+        self.routes[path] = (status, list(documents), delay)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubKakao()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def make_geocoder(stub, tmp_path):
+    geocoders = []
+
+    def make(**kwargs):
+        kwargs.setdefault("cache_path", str(tmp_path / "geocode.sqlite3"))
+        geocoder = kakao_geo.KakaoGeocoder("test-key", base_url=stub.url, **kwargs)
+        geocoders.append(geocoder)
+        return geocoder
+
+    yield make
+    for geocoder in geocoders:
+        geocoder.close()
+
+
+def test_keyword_result_wins_even_when_address_arrives_first(stub, make_geocoder):
+    stub.route(kakao_geo.KEYWORD_PATH, documents=[KEYWORD_DOC], delay=0.3)
+    stub.route(kakao_geo.ADDRESS_PATH, documents=[ADDRESS_DOC])
+    geocoder = make_geocoder(hedge_delay=0.05)
+
+    result = geocoder.geocode("강남역")
+    assert result["place_name"] == "강남역 2호선"
+    assert geocoder.cache.get("강남역")["lat"] == pytest.approx(37.4979)
+    # 키워드 응답이 hedge_delay 보다 늦었으므로 주소 검색도 함께 보냈습니다.
+    assert kakao_geo.ADDRESS_PATH in stub.calls
+
+
+def test_address_request_skipped_when_keyword_answers_quickly(stub, make_geocoder):
+    stub.route(kakao_geo.KEYWORD_PATH, documents=[KEYWORD_DOC])
+    stub.route(kakao_geo.ADDRESS_PATH, documents=[ADDRESS_DOC])
+
+    assert make_geocoder(hedge_delay=1.0).geocode("강남역")["place_name"] == "강남역 2호선"
+    assert stub.calls == [kakao_geo.KEYWORD_PATH]
+
+
+def test_address_result_used_when_keyword_is_empty(stub, make_geocoder):
+    stub.route(kakao_geo.KEYWORD_PATH, documents=[])
+    stub.route(kakao_geo.ADDRESS_PATH, documents=[ADDRESS_DOC])
+
+    result = make_geocoder().geocode("강남대로 396")
+    assert result["address_name"] == "서울 강남구 강남대로 396"
+
+
+def test_address_result_after_keyword_failure_is_not_cached(stub, make_geocoder):
+    stub.route(kakao_geo.KEYWORD_PATH, status=500)
+    stub.route(kakao_geo.ADDRESS_PATH, documents=[ADDRESS_DOC])
+    geocoder = make_geocoder()
+
+    assert geocoder.geocode("강남역")["address_name"] == "서울 강남구 강남대로 396"
+    assert geocoder.cache.get("강남역") is None
+
+
+def test_repeat_query_is_served_from_cache_across_instances(stub, make_geocoder):
+    stub.route(kakao_geo.KEYWORD_PATH, documents=[KEYWORD_DOC])
+    stub.route(kakao_geo.ADDRESS_PATH, documents=[ADDRESS_DOC])
+
+    geocoder = make_geocoder(hedge_delay=1.0)
+    first = geocoder.geocode("강남역")
+    n_calls = len(stub.calls)
+    assert n_calls == 1
+
+    # 같은 인스턴스(정규화된 검색어)와 같은 SQLite 파일을 쓰는 새 인스턴스 모두 요청 없이 캐시에서 반환
+    assert geocoder.geocode("  강남역 ") == first
+    assert len(stub.calls) == n_calls
+    assert make_geocoder().geocode("강남역  ") == first
+    assert len(stub.calls) == n_calls
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_auth_errors_raise_kakao_auth_error(stub, make_geocoder, status):
+    stub.route(kakao_geo.KEYWORD_PATH, status=status)
+    stub.route(kakao_geo.ADDRESS_PATH, status=status)
+
+    with pytest.raises(kakao_geo.KakaoAuthError) as excinfo:
+        make_geocoder(cache_path=None).geocode("강남역")
+    assert excinfo.value.status_code == status
+
+
+def test_server_error_raises_only_with_raise_on_error(stub, make_geocoder):
+    stub.route(kakao_geo.KEYWORD_PATH, status=503)
+    stub.route(kakao_geo.ADDRESS_PATH, status=503)
+    geocoder = make_geocoder()
+
+    assert geocoder.geocode("강남역") is None
+    with pytest.raises(requests.HTTPError):
+        geocoder.geocode("강남역", raise_on_error=True)
+    assert len(geocoder.cache) == 0
+
+
+def test_timeout_raises_only_with_raise_on_error(stub, make_geocoder):
+    stub.route(kakao_geo.KEYWORD_PATH, documents=[KEYWORD_DOC], delay=1.0)
+    stub.route(kakao_geo.ADDRESS_PATH, documents=[ADDRESS_DOC], delay=1.0)
+    geocoder = make_geocoder(timeout=0.2)
+
+    assert geocoder.geocode("강남역") is None
+    with pytest.raises(requests.Timeout):
+        geocoder.geocode("강남역", raise_on_error=True)
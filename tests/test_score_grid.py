@@ -0,0 +1,65 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import facility_store
+import seulsekwon_engine
+import utils
+
+# ==========================================
+# 서울 전역 슬세권 격자 테스트
+# scripts/build_score_grid.py 로 만든 격자를 app2(utils.py)가 실제로 읽는지 확인합니다.
+# ==========================================
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'build_score_grid.py')
+
+
+def load_build_script():
+    spec = importlib.util.spec_from_file_location('build_score_grid', SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """스타벅스 매장 몇 곳만 있는 data/cleaned 폴더를 만들고 기본 데이터 경로로 지정합니다."""
+    rng = np.random.default_rng(0)
+    n = 20
+    pd.DataFrame({
+        '점포명': [f"스타벅스 {i}호점" for i in range(n)],
+        '주소': ["서울특별시 중구 세종대로 110"] * n,
+        '위도': 37.5665 + rng.uniform(-0.005, 0.005, n),
+        '경도': 126.9780 + rng.uniform(-0.005, 0.005, n),
+        '카테고리_대': ["cafe"] * n,
+        '카테고리_소': ["cafe"] * n,
+    }).to_csv(tmp_path / 'starbucks_seoul_cleaned.csv', index=False, encoding='utf-8-sig')
+    monkeypatch.setattr(facility_store, 'default_data_dir', lambda: str(tmp_path))
+    utils.load_score_grid.clear()
+    yield str(tmp_path)
+    utils.load_score_grid.clear()
+
+
+def test_app2_uses_grid_built_for_utils_scheme(data_dir):
+    build_score_grid = load_build_script()
+
+    # 엔진 기준 격자만 있으면 app2 점수와 비교할 수 없으므로 사용하지 않습니다.
+    build_score_grid.build_grids(data_dir, [500], cell_m=500.0, scheme='engine')
+    assert utils.seoul_average_score(seulsekwon_engine.DEFAULT_WEIGHTS, 500) is None
+
+    build_score_grid.build_grids(data_dir, [500], cell_m=500.0, scheme='utils')
+    utils.load_score_grid.clear()
+    average = utils.seoul_average_score(seulsekwon_engine.DEFAULT_WEIGHTS, 500)
+    assert average is not None and average > 0
+
+
+def test_grids_for_each_scheme_are_stored_separately(data_dir):
+    build_score_grid = load_build_script()
+    for scheme in build_score_grid.SCHEMES:
+        build_score_grid.build_grids(data_dir, [500], cell_m=500.0, scheme=scheme)
+
+    grid_files = sorted(f for f in os.listdir(data_dir) if f.startswith('score_grid_'))
+    assert len(grid_files) == len(build_score_grid.SCHEMES)
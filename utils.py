@@ -2,10 +2,16 @@ import pandas as pd
 import folium
 import plotly.express as px
 import plotly.graph_objects as go
-from geopy.distance import geodesic
 import os
 import streamlit as st
 import kakao_geo
+import seulsekwon_engine
+import dataset_service
+import facility_store
+import dataset_manifest
+import score_grid
+import analysis_cache
+import map_layers
 
 # 카테고리별 이모지 매핑 (작업지시서 기준)
 EMOJI_MAP = {
@@ -42,124 +48,119 @@ CATEGORY_GROUPS = {
     "금융🏦": ["은행", "금융"]
 }
 
-@st.cache_data
-def load_all_data():
+# 카테고리별 max 설정 (임의 기준값, 요구사항에 맞춰 조정 가능)
+MAX_COUNTS = {
+    "생활/편의🏪": 20, "교통🚌": 10, "의료💊": 8, "안전/치안🚨": 3,
+    "교육/문화📚": 5, "자연/여가🌳": 5, "금융🏦": 5
+}
+
+# 분석 반경 선택지 (m)
+RADIUS_OPTIONS = seulsekwon_engine.RADIUS_OPTIONS
+
+def load_all_data(base_path=None):
     """
-    cleaned 폴더 내의 모든 CSV 데이터를 로드합니다.
+    cleaned 폴더(base_path) 내의 모든 CSV 데이터를 로드합니다.
     """
-    # 배포 환경과 로컬 환경 모두 호환되도록 상대 경로를 사용합니다.
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    base_path = os.path.join(current_dir, "data", "cleaned")
-    
-    # 만약 위의 경로에 데이터가 없다면 (app.py 기준 실행 시)
-    if not os.path.exists(base_path):
-        base_path = os.path.join("data", "cleaned")
-    
-    # 작업지시서 기반 파일 매핑
-    file_map = {
-        "starbucks_seoul_cleaned.csv": "스타벅스",
-        "bus_station_seoul_cleaned.csv": "버스정류장",
-        "metro_station_seoul_cleaned.csv": "지하철역",
-        "hospital_seoul_cleaned.csv": "병원",
-        "police_seoul_cleaned_ver2.csv": "경찰서",
-        "library_seoul_cleaned.csv": "도서관",
-        "bookstore_seoul_cleaned.csv": "서점",
-        "school_seoul_cleaned.csv": "학교",
-        "park_raw_cleaned_revised.csv": "공원",
-        "finance_seoul_cleaned.csv": "은행",
-        "large_scale_shop_seoul_cleaned.csv": "대형마트",
-        "sosang_seoul_cleaned.csv": "소상공인" # 필터링 필요
-    }
+    if base_path is None:
+        # 배포 환경과 로컬 환경 모두 호환되도록 상대 경로를 사용합니다.
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        base_path = os.path.join(current_dir, "data", "cleaned")
+
+        # 만약 위의 경로에 데이터가 없다면 (app.py 기준 실행 시)
+        if not os.path.exists(base_path):
+            base_path = os.path.join("data", "cleaned")
     
+    # 파일별 인코딩/열/좌표계는 dataset_manifest 선언을 그대로 사용합니다. (열 이름 추측 없음)
     all_dfs = []
-    for file, sub_cat in file_map.items():
+    for file, spec in dataset_manifest.DATASETS.items():
         file_path = os.path.join(base_path, file)
-        if os.path.exists(file_path):
-            encodings = ['utf-8-sig', 'cp949', 'utf-8', 'euc-kr']
-            df = None
-            for enc in encodings:
-                try:
-                    df = pd.read_csv(file_path, encoding=enc)
-                    break
-                except:
-                    continue
-            
-            if df is not None:
-                if sub_cat == "소상공인":
-                    # 소상공인 데이터에서 세부 카테고리 추출
-                    # 작업지시서: 편의점, 세탁소, 마트, 의원, 약국, 파출소, 체육시설 등
-                    # 여기서는 간단히 카테고리_소 열을 활용
-                    df['sub_category'] = df['카테고리_소']
-                else:
-                    df['sub_category'] = sub_cat
-                
-                # 공통 열 선택 (위도, 경도, 상호명/점포명)
-                name_col = '상호명' if '상호명' in df.columns else ('점포명' if '점포명' in df.columns else '이름')
-                if name_col in df.columns and '위도' in df.columns and '경도' in df.columns:
-                    temp_df = df[[name_col, '위도', '경도', 'sub_category']].copy()
-                    temp_df.columns = ['name', 'lat', 'lon', 'sub_category']
-                    # 주소 정보도 있으면 행정동 추출을 위해 가져옴
-                    if '주소' in df.columns:
-                        temp_df['address'] = df['주소']
-                    all_dfs.append(temp_df)
-                    
+        if not os.path.exists(file_path):
+            continue
+        if spec.get('streaming'):
+            # 소상공인 데이터는 청크 단위로 읽으며 그룹 키워드에 해당하는 업종(카테고리_소)만 남깁니다.
+            temp_df = facility_store.stream_sosang_csv(file_path, spec, CATEGORY_GROUPS, ignore_case=False,
+                                                       extra_roles=('address',))
+        else:
+            # 주소 정보도 있으면 행정동 추출을 위해 가져옴
+            temp_df = facility_store.read_source(file_path, spec, extra_roles=('address',))
+            if temp_df is not None:
+                # 이 화면은 파일의 기본 카테고리(스타벅스, 버스정류장 ...)를 세부 업종으로 사용합니다.
+                temp_df['sub_category'] = spec['category']
+        if temp_df is not None:
+            all_dfs.append(temp_df)
+
     if not all_dfs:
         # 데이터가 없을 경우 기본 컬럼 구조를 가진 빈 데이터프레임 반환
         return pd.DataFrame(columns=['name', 'lat', 'lon', 'sub_category', 'address'])
-    return pd.concat(all_dfs, ignore_index=True)
+    # 카테고리 그룹/이모지는 로드 시 한 번만 분류해 정수/범주형 열로 저장하고,
+    # 이름/카테고리/주소는 범주형, 좌표는 float32 로 줄여 둡니다.
+    df = seulsekwon_engine.attach_category_codes(pd.concat(all_dfs, ignore_index=True), CATEGORY_GROUPS, EMOJI_MAP)
+    return facility_store.compact_frame(df, category_cols=['name', 'sub_category', 'address'])
+
+@st.cache_resource
+def load_dataset():
+    """
+    load_all_data() 결과와 격자 공간 인덱스, 데이터 버전(원본 CSV 서명 + 이 모듈의 분류 기준)을
+    프로세스당 한 번만 만들어 모든 세션이 같은 읽기 전용 객체를 공유합니다.
+    """
+    version = facility_store.dataset_version(facility_store.default_data_dir(), CATEGORY_GROUPS, EMOJI_MAP, ignore_case=False)
+    return dataset_service.FacilityDataset(load_all_data(), version)
+
+@st.cache_resource
+def load_score_grid(radius_m):
+    """
+    scripts/build_score_grid.py 가 이 모듈의 데이터/분류 기준(CATEGORY_GROUPS/EMOJI_MAP, 대소문자 구분)으로
+    미리 계산한 서울 전역 격자를 반경별로 한 번만 읽습니다. 없거나 오래되었으면 None.
+    """
+    return score_grid.load_score_grid(facility_store.default_data_dir(), radius_m, CATEGORY_GROUPS, EMOJI_MAP,
+                                      ignore_case=False)
 
-def calculate_seulsekwon_index(center_lat, center_lon, data, weights, radius_m):
+def seoul_average_score(weights, radius_m):
+    """
+    서울 전역 격자의 평균 지수를 이 모듈의 기준치(MAX_COUNTS)로 계산합니다. 격자가 없으면 None.
+    """
+    grid = load_score_grid(radius_m)
+    if grid is None:
+        return None
+    max_caps = {g: MAX_COUNTS.get(g, 10) for g in grid.group_names}
+    return grid.average_total(weights, max_caps)
+
+def analyze_location(center_lat, center_lon, radii, dataset):
+    """
+    반경 내 시설을 그룹별로 집계합니다. (가중치와 무관한 위치 단계)
+    가장 큰 반경으로 한 번만 조회하고 반경별 결과({반경: (개수, 시설 목록)})를
+    (좌표, 반경, 데이터 버전) 키로 프로세스 공용 캐시에 보관하므로,
+    다른 세션의 같은 위치 검색이나 가중치/반경만 바꾼 재실행에서는 시설 데이터를 다시 조회하지 않습니다.
+    """
+    lat, lon, radii, version = analysis_cache.location_key(center_lat, center_lon, radii, dataset.version)
+    return analysis_cache.get_analysis_cache().get_or_compute(
+        (lat, lon, radii, version),
+        lambda: seulsekwon_engine.analyze_location_radii(
+            lat, lon, dataset.data, radii, index=dataset.index,
+            category_groups=CATEGORY_GROUPS, emoji_map=EMOJI_MAP, ignore_case=False
+        )
+    )
+
+def calculate_seulsekwon_index(center_lat, center_lon, dataset, weights, radius_m):
     """
     작업지시서 공식을 기반으로 슬세권 지수를 산출합니다.
+    dataset(load_dataset 결과)의 격자 공간 인덱스로 반경 질의를 수행합니다.
     """
-    radius_km = radius_m / 1000.0
     scores = {}
-    counts = {}
-    nearby_facilities = []
-    
+
     # 데이터가 비어있거나 필수 컬럼이 없는 경우 예외 처리
-    if data.empty or 'lat' not in data.columns:
+    if dataset.empty or 'lat' not in dataset.data.columns:
         empty_scores = {cat: 0.0 for cat in CATEGORY_GROUPS.keys()}
         empty_counts = {cat: 0 for cat in CATEGORY_GROUPS.keys()}
         return 0.0, empty_scores, empty_counts, []
 
-    # 카테고리별 max 설정 (임의 기준값, 요구사항에 맞춰 조정 가능)
-    max_counts = {
-        "생활/편의🏪": 20, "교통🚌": 10, "의료💊": 8, "안전/치안🚨": 3,
-        "교육/문화📚": 5, "자연/여가🌳": 5, "금융🏦": 5
-    }
+    radii = tuple(RADIUS_OPTIONS) if radius_m in RADIUS_OPTIONS else (radius_m,)
+    counts, nearby_facilities = analyze_location(center_lat, center_lon, radii, dataset)[radius_m]
 
-    # 위경도 박스 필터링 (속도 개선)
-    lat_margin = radius_km / 111.0
-    lon_margin = radius_km / 88.0
-    mask = (data['lat'] >= center_lat - lat_margin) & (data['lat'] <= center_lat + lat_margin) & \
-           (data['lon'] >= center_lon - lon_margin) & (data['lon'] <= center_lon + lon_margin)
-    filtered_data = data[mask].copy()
-
-    for group_name, sub_cats in CATEGORY_GROUPS.items():
-        group_data = filtered_data[filtered_data['sub_category'].apply(lambda x: any(sc in str(x) for sc in sub_cats))]
-        
-        actual_count = 0
-        for _, row in group_data.iterrows():
-            dist = geodesic((center_lat, center_lon), (row['lat'], row['lon'])).meters
-            if dist <= radius_m:
-                actual_count += 1
-                row_dict = row.to_dict()
-                row_dict['distance'] = dist
-                row_dict['group'] = group_name
-                # 이모지 추가
-                found_emoji = "📍"
-                for key, emoji in EMOJI_MAP.items():
-                    if key in str(row['sub_category']):
-                        found_emoji = emoji
-                        break
-                row_dict['emoji'] = found_emoji
-                nearby_facilities.append(row_dict)
-
-        counts[group_name] = actual_count
-        m = max_counts.get(group_name, 10)
+    for group_name in CATEGORY_GROUPS.keys():
+        m = MAX_COUNTS.get(group_name, 10)
         # 공식: (min(실제 개수, max) / max) * 가중치
-        score = (min(actual_count, m) / m) * weights.get(group_name, 0)
+        score = (min(counts[group_name], m) / m) * weights.get(group_name, 0)
         scores[group_name] = round(score, 2)
 
     total_score = sum(scores.values())
@@ -176,7 +177,7 @@ def get_dong_name(address):
     if match: return match.group(1)
     return "서울시 전체"
 
-def create_visualizations(total_score, scores, counts, facilities, dong_name):
+def create_visualizations(total_score, scores, counts, facilities, dong_name, avg_score=None):
     """
     5종 이상의 시각화 자료를 생성합니다.
     """
@@ -224,9 +225,9 @@ def create_visualizations(total_score, scores, counts, facilities, dong_name):
                 'value': total_score}}))
     viz['gauge'] = fig_gauge
 
-    # 3. 우리 동네 지수 비교 (임의의 동 평균값 시뮬레이션 - 실제 데이터 기반 시 부하 큼)
-    # 실제로는 해당 동의 데이터 샘플을 통해 계산 가능하나, 여기서는 시각화 목적상 랜덤 보정값 사용
-    avg_score = 75.5 # 서울시 평균 예시
+    # 3. 우리 동네 지수 비교 (서울 평균은 사전 계산 격자에서 조회한 값을 전달받음)
+    if avg_score is None:
+        avg_score = 75.5 # 서울시 평균 예시 (사전 계산 격자가 없을 때)
     fig_compare = px.bar(
         x=[f"현재 위치 ({dong_name})", "서울시 평균"],
         y=[total_score, avg_score],
@@ -269,18 +270,7 @@ def create_enhanced_map(lat, lon, facilities, radius_m):
     folium.Marker([lat, lon], icon=folium.Icon(color='red', icon='star')).add_to(m)
     folium.Circle([lat, lon], radius=radius_m, color='#3186cc', fill=True, fill_opacity=0.1).add_to(m)
 
-    # 시설 마커 (이모지 활용)
-    for f in facilities[:200]: # 성능을 위해 상위 200개만
-        html = f"""
-        <div style="font-size: 20px; background: white; border-radius: 50%; width: 30px; height: 30px; 
-                    display: flex; align-items: center; justify-content: center; border: 2px solid #1e3a8a;">
-            {f['emoji']}
-        </div>
-        """
-        folium.Marker(
-            [f['lat'], f['lon']],
-            icon=folium.DivIcon(html=html),
-            popup=f"{f['name']} ({f['distance']:.0f}m)"
-        ).add_to(m)
-        
+    # 시설 마커 (이모지 활용, 반경 내 전체를 확대 수준에 따라 클러스터로 표시)
+    map_layers.add_facility_markers(m, facilities, '#1e3a8a', size=30, font_size=20)
+
     return m